@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Optional, Dict, List, Tuple
 from datetime import datetime
 
@@ -8,6 +8,8 @@ from datetime import datetime
 @dataclass
 class DriftFeatures:
     """Data class to store drift calculation features for better type hints and organization"""
+    __slots__ = ('t_beg', 'man_beg', 't_end', 'man_end', 'slope_man', 'slope_trans', 'intercept', 'slope',
+                 'first_meas', 'last_meas', 'first_trans', 'last_trans', 'drift')
     t_beg: datetime
     man_beg: datetime
     t_end: datetime
@@ -22,12 +24,79 @@ class DriftFeatures:
     last_trans: float
     drift: float
 
+    @classmethod
+    def from_record(cls, record: np.void) -> 'DriftFeatures':
+        """Build the features of one segment from a row of `Drifting.segments`; missing dates become None."""
+        values = {}
+        for name in FEATURES:
+            value = record[name]
+            if name in DATE_FEATURES:
+                value = None if np.isnat(value) else pd.Timestamp(value)
+            else:
+                value = float(value)
+            values[name] = value
+        return cls(**values)
+
+
+FEATURES = [field.name for field in fields(DriftFeatures)]
+DATE_FEATURES = ('t_beg', 'man_beg', 't_end', 'man_end')
+
+# one row per segment between breakpoints; start and stop are positions in the readings that have data
+SEGMENT_DTYPE = np.dtype(
+    [('start', np.int64), ('stop', np.int64), ('julian_beg', np.float64), ('julian_end', np.float64)]
+    + [(name, 'M8[ns]' if name in DATE_FEATURES else np.float64) for name in FEATURES]
+)
+
+
+def _nearest_positions(times: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Positions of the closest of the sorted int64 `times` to each query; the earlier one on ties."""
+    n = len(times)
+    pos = np.searchsorted(times, queries, side='left')
+    before = np.clip(pos - 1, 0, n - 1)
+    after = np.clip(pos, 0, n - 1)
+    use_before = (pos >= n) | ((pos > 0) & (queries - times[before] <= times[after] - queries))
+    pick = np.where(use_before, before, after)
+    # first of any duplicated times
+    return np.searchsorted(times, times[pick], side='left')
+
+
+def _trim_bounds(times: np.ndarray, values: np.ndarray, jumptol: float = 0.5,
+                 window: int = 50) -> Tuple[int, int]:
+    """Range of a segment left after trimming jumps near its ends.
+
+    Follows `loader.dataendclean`: a jump larger than `jumptol` within the first `window` readings
+    drops everything up to and including it, and one within the last `window` readings drops it and
+    everything after, until the segment gets too short to check. Segments of `window` readings or
+    fewer are left untouched.
+    """
+    n = len(values)
+    if n <= window:
+        return 0, n
+    jumps = np.flatnonzero(np.abs(np.diff(values)) > jumptol) + 1
+    lo, hi = 0, n
+    for j in jumps:
+        if hi - lo <= window:
+            break
+        if times[j] < times[lo + window]:
+            lo = max(lo, int(np.searchsorted(times, times[j], side='right')))
+        if hi - lo < window:
+            break
+        if times[j] > times[hi - window]:
+            hi = min(hi, int(np.searchsorted(times, times[j], side='left')))
+    return lo, max(lo, hi)
+
 
 class Drifting:
     """Remove transducer drift from nonvented transducer data.
 
     This class implements drift correction by comparing manual measurements with
     transducer data and calculating necessary adjustments.
+
+    Segments, their end readings and nearest manual measurements are found for all
+    segments at once with sorted-array searches, and the segment parameters are kept
+    in the structured array `segments`. Results match `loader.Drifting`, except that
+    when no manual measurement falls within `daybuffer` days of the readings, nothing
+    is corrected and empty results are returned.
     """
 
     def __init__(
@@ -54,6 +123,10 @@ class Drifting:
             trim_end: Whether to remove jumps from data breakpoints
             well_id: Unique identifier for the well
             engine: Database connection engine
+
+        Raises:
+            ValueError: If either DataFrame is empty
+            KeyError: If drifting_field or man_field is not a column of its DataFrame
         """
         self.config = {
             'daybuffer': daybuffer,
@@ -70,6 +143,8 @@ class Drifting:
 
         # Initialize calculation storage
         self.breakpoints: List[datetime] = []
+        self.edges = pd.DatetimeIndex([])
+        self.segments = np.empty(0, dtype=SEGMENT_DTYPE)
         self.bracketedwls: Dict[int, pd.DataFrame] = {}
         self.drift_features: Dict[int, DriftFeatures] = {}
 
@@ -80,6 +155,12 @@ class Drifting:
 
     def _init_dataframes(self, manual_df: pd.DataFrame, transducer_df: pd.DataFrame) -> None:
         """Prepare input DataFrames by sorting and adding Julian dates."""
+        for df, field, name in [(manual_df, self.config['man_field'], 'manual_df'),
+                                (transducer_df, self.config['drifting_field'], 'transducer_df')]:
+            if len(df) == 0:
+                raise ValueError(f"{name} is empty")
+            if field not in df.columns:
+                raise KeyError(f"{field} is not a column of {name}")
         self.manual_df = self._prepare_df(manual_df)
         self.transducer_df = self._prepare_df(transducer_df)
 
@@ -101,28 +182,41 @@ class Drifting:
             - DataFrame summarizing drift corrections
             - Maximum drift value
         """
-        self._calculate_breakpoints()
-
-        for i in range(len(self.breakpoints) - 1):
-            segment = self._process_segment(i)
-            if segment is not None:
-                self.bracketedwls[i] = segment
-
-        self._finalize_results()
+        try:
+            self._calculate_breakpoints()
+        except ValueError as err:
+            print(err)
+            return self.wellbarofixed, self.drift_sum_table, self.max_drift
+
+        has_data = self.segments['stop'] > self.segments['start']
+        for i in np.flatnonzero(has_data):
+            self._process_segment(int(i))
+        self._collect_results()
+        self._finalize_results(has_data)
         return self.wellbarofixed, self.drift_sum_table, self.max_drift
 
     def _process_segment(self, segment_idx: int) -> Optional[pd.DataFrame]:
-        """Process a single segment between breakpoints."""
-        start, end = self.breakpoints[segment_idx], self.breakpoints[segment_idx + 1]
-        segment = self._get_segment_data(start, end)
+        """Process a single segment between breakpoints.
 
-        if segment.empty:
+        The readings of the segment are trimmed when trim_end is set, and their corrections are
+        written into the result arrays, so the returned frame shares its data with them.
+        """
+        if self.segments['stop'][segment_idx] <= self.segments['start'][segment_idx]:
             return None
-
         if self.config['trim_end']:
-            segment = self._clean_segment_ends(segment)
-
-        self._calculate_drift_correction(segment_idx, segment)
+            self._trim_segment(segment_idx)
+
+        rows = slice(self.segments['start'][segment_idx], self.segments['stop'][segment_idx])
+        slope, intercept = self._calculate_correction_params(segment_idx)
+        results = self._results
+        results['level_0'][rows] = segment_idx
+        results['driftcorrection'][rows] = (results['julian'][rows] - self.segments['julian_beg'][segment_idx]) * slope
+        results['driftcorrwoffset'][rows] = results['driftcorrection'][rows] + intercept
+        np.subtract(results['drifting'][rows], results['driftcorrwoffset'][rows],
+                    out=results[self.config['output_field']][rows])
+
+        segment = self._results_frame(rows)
+        self.bracketedwls[segment_idx] = segment
         return segment
 
     def _calculate_breakpoints(self) -> None:
@@ -135,125 +229,146 @@ class Drifting:
         - Data range validation
         - Edge cases at the start and end of the time series
 
-        The method updates self.breakpoints with a sorted list of datetime objects
-        representing the start/end points of drift correction segments.
+        The method updates self.breakpoints with a sorted list of the manual measurement
+        times within the buffered timeframe of the transducer readings, and self.edges with
+        the start/end points of the drift correction segments, which add the first and last
+        transducer readings where they lie beyond the manual measurements. The parameters of
+        every segment are then calculated at once (see `_calculate_segment_params`).
 
         Raises:
             ValueError: If no valid breakpoints can be established
             ValueError: If there's insufficient overlap between manual and transducer data
         """
-        # Get valid transducer readings
-        valid_transducer = self.transducer_df.dropna(subset=[self.config['drifting_field']]).sort_index()
-
-        if valid_transducer.empty:
+        # Get valid transducer readings; transducer_df is sorted by _prepare_df
+        field = self.config['drifting_field']
+        valid = self.transducer_df[field].notna().to_numpy() & self.transducer_df.index.notna()
+        if not valid.any():
             raise ValueError("No valid transducer readings found")
+        self._valid_transducer = self.transducer_df if valid.all() else self.transducer_df[valid]
 
         # Get valid manual measurements
-        valid_manual = (self.manual_df
-                        .dropna(subset=[self.config['man_field']])
-                        .sort_index())
+        valid_manual = self.manual_df[self.manual_df.index.notna()].dropna(subset=[self.config['man_field']])
 
         if valid_manual.empty:
             raise ValueError("No valid manual measurements found")
 
-        # Initialize breakpoints list
-        breakpoints = []
-
         # Calculate the buffer window
-        buffer_window = pd.Timedelta(days=self.config['daybuffer'])
+        buffer_window = pd.Timedelta(f"{self.config['daybuffer']:.0f}D")
 
         # Get the overall date range
-        transducer_start = valid_transducer.first_valid_index()
-        transducer_end = valid_transducer.last_valid_index()
+        transducer_start = self._valid_transducer.index[0]
+        transducer_end = self._valid_transducer.index[-1]
 
-        # Filter manual measurements to those within the transducer data range
-        # (plus buffer window)
-        valid_manual = valid_manual[
-            (valid_manual.index >= transducer_start - buffer_window) &
-            (valid_manual.index <= transducer_end + buffer_window)
-            ]
+        # Manual measurements from the buffer before the first reading on take part in the segments
+        valid_manual = valid_manual[valid_manual.index >= transducer_start - buffer_window]
+        in_window = valid_manual.index <= transducer_end + buffer_window
 
-        if valid_manual.empty:
+        if not in_window.any():
             raise ValueError(
                 "No manual measurements within the timeframe of transducer readings "
                 f"(including {self.config['daybuffer']} day buffer)"
             )
+        self._valid_manual = valid_manual
 
+        edges = valid_manual.index
         # Add first transducer reading if it precedes first manual measurement
-        if valid_manual.first_valid_index() > transducer_start:
-            breakpoints.append(transducer_start)
-
-        # Add manual measurements as breakpoints
-        manual_breakpoints = []
-        for manual_date in valid_manual.index:
-            # Find closest transducer reading within buffer window
-            window_start = manual_date - buffer_window
-            window_end = manual_date + buffer_window
-
-            window_readings = valid_transducer[
-                (valid_transducer.index >= window_start) &
-                (valid_transducer.index <= window_end)
-                ]
-
-            if not window_readings.empty:
-                # Find closest transducer reading to manual measurement
-                closest_idx = (window_readings.index - manual_date).abs().argmin()
-                closest_date = window_readings.index[closest_idx]
-
-                manual_breakpoints.append({
-                    'date': manual_date,
-                    'closest_transducer': closest_date,
-                    'time_diff': abs(closest_date - manual_date)
-                })
-
-        # Sort and filter manual breakpoints
-        if manual_breakpoints:
-            # Sort by date
-            manual_breakpoints.sort(key=lambda x: x['date'])
-
-            # Filter out breakpoints that are too close together
-            filtered_breakpoints = []
-            last_bp = None
-
-            for bp in manual_breakpoints:
-                if (last_bp is None or
-                        bp['date'] - last_bp['date'] > buffer_window):
-                    filtered_breakpoints.append(bp)
-                    last_bp = bp
-
-            # Add filtered manual measurement dates to breakpoints
-            breakpoints.extend(bp['date'] for bp in filtered_breakpoints)
-
+        if valid_manual.index[0] > transducer_start:
+            edges = edges.insert(0, transducer_start)
         # Add last transducer reading if it follows last manual measurement
-        if valid_manual.last_valid_index() < transducer_end:
-            breakpoints.append(transducer_end)
-
+        if valid_manual.index[-1] < transducer_end:
+            edges = edges.insert(len(edges), transducer_end)
         # Remove duplicates and sort
-        breakpoints = sorted(set(breakpoints))
+        self.edges = edges.unique().sort_values()
 
         # Validate we have enough breakpoints for at least one segment
-        if len(breakpoints) < 2:
+        if len(self.edges) < 2:
             raise ValueError(
                 "Insufficient breakpoints to establish correction segments. "
                 "Need at least two breakpoints (start and end)"
             )
 
         # Store the calculated breakpoints
-        self.breakpoints = breakpoints
+        self.breakpoints = list(valid_manual.index[in_window].unique())
 
         # Log summary of breakpoints if logger is configured
         if hasattr(self, 'logger'):
-            self.logger.info(f"Calculated {len(breakpoints)} breakpoints")
-            self.logger.debug(f"Breakpoint dates: {breakpoints}")
+            self.logger.info(f"Calculated {len(self.breakpoints)} breakpoints")
+            self.logger.debug(f"Breakpoint dates: {self.breakpoints}")
 
         # Store metadata about breakpoints for later analysis
         self._breakpoint_metadata = {
-            'total_segments': len(breakpoints) - 1,
-            'start_date': breakpoints[0],
-            'end_date': breakpoints[-1],
-            'avg_segment_length': (breakpoints[-1] - breakpoints[0]) / (len(breakpoints) - 1)
+            'total_segments': len(self.edges) - 1,
+            'start_date': self.edges[0],
+            'end_date': self.edges[-1],
+            'avg_segment_length': (self.edges[-1] - self.edges[0]) / (len(self.edges) - 1)
         }
 
+        self._calculate_segment_params()
+        self._allocate_results()
+
+    def _calculate_segment_params(self) -> None:
+        """Calculate the drift parameters of every segment at once into self.segments.
+
+        Each segment runs from one edge up to the next. Its first and last readings, and the
+        manual measurements closest to its edges, are found by binary search. Manual measurements
+        more than daybuffer days from the readings are left out, as in `loader.Drifting`.
+        """
+        field = self.config['drifting_field']
+        times = self._valid_transducer.index
+        values = self._valid_transducer[field].to_numpy(dtype=np.float64)
+        bounds = times.searchsorted(self.edges, side='left')
+
+        segments = np.zeros(len(self.edges) - 1, dtype=SEGMENT_DTYPE)
+        segments['start'], segments['stop'] = bounds[:-1], bounds[1:]
+        has_data = segments['stop'] > segments['start']
+        first = np.minimum(segments['start'], len(values) - 1)
+        last = np.maximum(segments['stop'] - 1, 0)
+
+        first_trans, last_trans = values[first], values[last]
+        first_trans_date, last_trans_date = times.asi8[first], times.asi8[last]
+        julian = self._valid_transducer['julian'].to_numpy()
+        first_trans_julian, last_trans_julian = julian[first], julian[last]
+
+        manual_times = self._valid_manual.index.asi8
+        near = _nearest_positions(manual_times, self.edges.asi8)
+        man_values = self._valid_manual[self.config['man_field']].to_numpy(dtype=np.float64)
+        man_julian = self._valid_manual['julian'].to_numpy()
+        first_man, last_man = man_values[near[:-1]], man_values[near[1:]]
+        first_man_date, last_man_date = manual_times[near[:-1]], manual_times[near[1:]]
+        first_man_julian, last_man_julian = man_julian[near[:-1]], man_julian[near[1:]]
+
+        # manual measurements too far from the readings are missing
+        buffer = pd.Timedelta(f"{self.config['daybuffer']:.0f}D").value
+        no_first = np.abs(first_man_date - first_trans_date) > buffer
+        no_last = np.abs(last_trans_date - last_man_date) > buffer
+        both = ~no_first & ~no_last
+
+        first_offset = np.where(no_first, 0.0, first_trans - first_man)
+        last_offset = np.where(no_last, 0.0, last_trans - last_man)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope_man = np.where(both, (first_man - last_man) / (first_man_julian - last_man_julian), 0.0)
+            slope_trans = np.where(both, (first_trans - last_trans) / (first_trans_julian - last_trans_julian), 0.0)
+        slope = slope_trans - slope_man
+        intercept = np.where(first_offset == 0, last_offset, first_offset)
+
+        nat = np.datetime64('NaT', 'ns')
+        segments['julian_beg'], segments['julian_end'] = first_trans_julian, last_trans_julian
+        segments['t_beg'] = np.where(has_data, first_trans_date.view('M8[ns]'), nat)
+        segments['t_end'] = np.where(has_data, last_trans_date.view('M8[ns]'), nat)
+        segments['man_beg'] = np.where(no_first, nat, first_man_date.view('M8[ns]'))
+        segments['man_end'] = np.where(no_last, nat, last_man_date.view('M8[ns]'))
+        segments['slope_man'] = slope_man
+        segments['slope_trans'] = slope_trans
+        segments['intercept'] = intercept
+        segments['slope'] = slope
+        # segments without a manual measurement at one end are anchored on their readings
+        segments['first_meas'] = np.where(no_first, first_trans, first_man)
+        segments['last_meas'] = np.where(no_last, np.where(no_first, np.nan, last_trans), last_man)
+        segments['first_trans'] = first_trans
+        segments['last_trans'] = last_trans
+        segments['drift'] = slope * (last_trans_julian - first_trans_julian)
+        self.segments = segments
+
     def get_breakpoint_statistics(self) -> dict:
         """Return statistics about the calculated breakpoints.
 
@@ -272,36 +387,78 @@ class Drifting:
         stats['breakpoints'] = self.breakpoints
         return stats
 
-    def _calculate_drift_correction(self, segment_idx: int, segment: pd.DataFrame) -> None:
-        """Calculate and apply drift correction to a segment."""
-        slope, intercept = self._calculate_correction_params(segment_idx, segment)
+    def _calculate_correction_params(self, segment_idx: int) -> Tuple[float, float]:
+        """Slope and intercept of the drift correction of a segment."""
+        params = self.segments[segment_idx]
+        return float(params['slope']), float(params['intercept'])
 
-        date_change = segment['julian'] - segment['julian'].iloc[0]
-        segment['driftcorrection'] = date_change * slope
-        segment['driftcorrwoffset'] = segment['driftcorrection'] + intercept
-        segment[self.config['output_field']] = (
-                segment[self.config['drifting_field']] - segment['driftcorrwoffset']
-        )
+    def _trim_segment(self, segment_idx: int) -> None:
+        """Narrow the rows of a segment, removing jumps from its ends that exceed the threshold."""
+        start, stop = self.segments['start'][segment_idx], self.segments['stop'][segment_idx]
+        rows = slice(start, stop)
+        lo, hi = _trim_bounds(self._valid_transducer.index.asi8[rows], self._results['drifting'][rows])
+        self.segments['start'][segment_idx], self.segments['stop'][segment_idx] = start + lo, start + hi
 
-    def _clean_segment_ends(self, segment: pd.DataFrame) -> pd.DataFrame:
-        """Remove jumps from segment endpoints exceeding threshold."""
-        # Implementation of dataendclean function would go here
-        return segment
+    def _allocate_results(self) -> None:
+        """Allocate the arrays that `_process_segment` writes the corrected readings into.
 
-    def _finalize_results(self) -> None:
-        """Combine all processed segments and calculate final statistics."""
-        if self.bracketedwls:
-            self.wellbarofixed = pd.concat(self.bracketedwls.values(), sort=True)
-            self.wellbarofixed = self.wellbarofixed.sort_index()
+        There is one row per transducer reading with data; rows left out of every segment are
+        dropped by `_collect_results`.
+        """
+        n = len(self._valid_transducer)
+        self._results = {
+            'level_0': np.full(n, -1, dtype=np.int64),
+            'driftcorrection': np.full(n, np.nan),
+            'driftcorrwoffset': np.full(n, np.nan),
+            self.config['output_field']: np.full(n, np.nan),
+            'julian': self._valid_transducer['julian'].to_numpy(),
+            'drifting': self._valid_transducer[self.config['drifting_field']].to_numpy(dtype=np.float64),
+        }
 
-            self.drift_sum_table = pd.DataFrame.from_dict(
-                self.drift_features, orient='index'
-            )
-            self.max_drift = self.drift_sum_table['drift'].abs().max()
+    def _results_frame(self, rows) -> pd.DataFrame:
+        """Frame of the result rows, with the segment of each reading in the level_0 column.
+
+        The other columns are in alphabetical order, as in the results of `loader.Drifting`.
+        """
+        readings = self._valid_transducer.iloc[rows]
+        columns = {name: readings[name].array for name in readings.columns}
+        for name in ('driftcorrection', 'driftcorrwoffset', self.config['output_field']):
+            columns[name] = self._results[name][rows]
+        order = ['level_0'] + sorted(columns, key=str)
+        columns['level_0'] = self._results['level_0'][rows]
+        return pd.DataFrame(
+            {name: columns[name] for name in order},
+            index=pd.DatetimeIndex(readings.index, freq=None),
+            copy=False,
+        )
+
+    def _collect_results(self) -> None:
+        """Collect the processed segments into the results.
+
+        The readings keep the sorted order of the transducer data, so no concatenation is needed.
+        """
+        rows = np.flatnonzero(self._results['level_0'] >= 0)
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            rows = slice(rows[0], rows[-1] + 1)
+        self.wellbarofixed = self._results_frame(rows)
+
+    def _finalize_results(self, has_data: np.ndarray) -> None:
+        """Summarize the drift of every segment with readings and find the maximum drift."""
+        segment_ids = np.flatnonzero(has_data)
+        records = self.segments[segment_ids]
+        self.drift_features = {int(i): DriftFeatures.from_record(record) for i, record in zip(segment_ids, records)}
+
+        table = pd.DataFrame({name: records[name] for name in FEATURES}, index=segment_ids)
+        table['quality'] = (table['drift'] / 2).abs().round(3)
+        missing = table['man_beg'].isna() | table['man_end'].isna() | table['t_beg'].isna() | table['t_end'].isna()
+        table.loc[missing, 'quality'] = 0.3
+        table.loc[missing, 'drift'] = np.nan
+        self.drift_sum_table = table
+        self.max_drift = table['drift'].abs().max()
 
     @staticmethod
     def format_value(value: Optional[float], format_spec: str) -> str:
         """Format numeric values with consistent handling of None/NA."""
         if pd.isna(value):
             return 'No Data'
-        return f"{value:{format_spec}}"
\ No newline at end of file
+        return f"{value:{format_spec}}"
@@ -1167,64 +1167,43 @@ class Feedback:
         tk.Label(popup, text="Fixing Drift...").pack()
         pg = ttk.Progressbar(popup, orient=tk.HORIZONTAL, mode='determinate', length=200)
         pg.pack()
-        bulkdrift = {}
-        drift_info = {}
         info = self.data['well-info-table']
         try:
-            pg.config(maximum=len(self.data['bulk-well-baro'].index.get_level_values(0).unique()))
+            wellbaro = self.data['bulk-well-baro']
         except KeyError:
             tk.messagebox.showinfo(title='Yo!', message='Align the data first!')
+            popup.destroy()
+            return
+        pg.config(maximum=1)
         sv = tk.StringVar(popup, value='')
         ttk.Label(popup, textvariable=sv).pack()
+        popup.update()
+
+        # all wells are corrected together; same results as a Drifting object per well
+        wellbaro = wellbaro[wellbaro.index.get_level_values(0).notnull()]
+        df, dfrinf, max_drift = fix_drift_batch(wellbaro,
+                                                self.data['bulk-manual'],
+                                                drifting_field='corrwl',
+                                                man_field='dtwbelowcasing',
+                                                output_field='DTW_WL')
+        pg.step()
 
-        # Check effect of this comment;
-        #  Uncommented on 5/26/2021 in attempt to make consistent with single-well
-        #  Recommened as caused high drift
-
-        for i in self.data['bulk-well-baro'].index.get_level_values(0).unique():
-
-            popup.update()
-            if pd.notnull(i):
-
-                if int(i) in self.data['bulk-manual'].index:
-                    mandf = self.data['bulk-manual'].loc[int(i)]
-
-                    wellbaro = self.data['bulk-well-baro'].loc[int(i)]
-
-                    try:
-                        df, dfrinf, max_drift = Drifting(mandf,
-                                                         wellbaro,
-                                                         drifting_field='corrwl',
-                                                         man_field='dtwbelowcasing',
-                                                         output_field='DTW_WL').process_drift()
-
-                        mstickup = info.loc[i, 'stickup']
-                        melev = info.loc[i, 'verticalmeasure']
-                        name = info.loc[i, 'locationname']
-                        dfrinf['name'] = name
-                        drift_info[i] = dfrinf  # .reset_index()
-                        if max_drift > self.max_allowed_drift.get():
-                            ttk.Label(popup, text=f'{name} drift too high at {max_drift}!').pack()
-                            pass
-
-                        else:
-                            df['waterelevation'] = df['DTW_WL'] + mstickup + melev
-                            df['name'] = name
-                            df['locationid'] = i
-                            bulkdrift[i] = df.reset_index()
-
-                        sv.set(f"{name} has a max drift of {max_drift}")
-                    except KeyError as err:
-                        sv.set("Need More Recent Manual Data")
-                        print(err)
-                        # sv.set(f"{err}")
-                        pass
-            pg.step()
+        names = info['locationname']
+        for i, drift in max_drift[max_drift > self.max_allowed_drift.get()].items():
+            ttk.Label(popup, text=f'{names.get(i)} drift too high at {drift}!').pack()
+        missing = len(set(wellbaro.index.get_level_values(0).unique()) - set(max_drift.index))
+        sv.set(f"{len(max_drift)} wells corrected; {missing} need more recent manual data")
 
-        self.data['bulk-fix-drift'] = pd.concat(bulkdrift).set_index(['locationid', 'DateTime'])
-        # self.data['bulk-fix-drift'] = self.data['bulk-fix-drift']
+        df = df[df.index.get_level_values(0).isin(max_drift[~(max_drift > self.max_allowed_drift.get())].index)]
+        df = df.reset_index()
+        df['waterelevation'] = df['DTW_WL'] + df['locationid'].map(info['stickup']) + \
+                               df['locationid'].map(info['verticalmeasure'])
+        df['name'] = df['locationid'].map(names)
+        self.data['bulk-fix-drift'] = df.set_index(['locationid', 'DateTime'])
+        dfrinf = dfrinf.reset_index()
+        dfrinf['name'] = dfrinf['locationid'].map(names)
         key = 'drift-info'
-        self.data[key] = pd.concat(drift_info, sort=True, ignore_index=True).set_index('name')
+        self.data[key] = dfrinf.drop(columns=['locationid', 'segment']).set_index('name')
         self.graphframe[key], self.tableframe[key] = self.note_tab_add(key)
 
         self.datatable[key] = Sheet(self.tableframe[key], data=self.data[key].reset_index().values.tolist(),
@@ -1898,10 +1877,11 @@ class Feedback:
             old_df = None
 
             fixd_jump = {}
+            near = NearestTime(self.data[key].index)
 
             for ind in split_data.index:
-                beg = fcl(self.data[key], split_data.loc[ind, 'beginning']).name
-                end = fcl(self.data[key], split_data.loc[ind, 'end']).name
+                beg = near.take(self.data[key], split_data.loc[ind, 'beginning']).name
+                end = near.take(self.data[key], split_data.loc[ind, 'end']).name
                 print(beg, end)
                 if old_df is None:
                     old_df = self.data[key].loc[beg:end]
@@ -2110,6 +2090,8 @@ class Feedback:
             #print(info.index)
             wellids = self.data['bulk-well'].index.get_level_values(0).unique()
             mergedf = {}
+            # each barometer is resampled once and shared by its wells
+            baros = BaroStore(self.data['bulk-well'])
             popup = tk.Toplevel()
             popup.geometry("400x100+200+200")
             ttk.Label(popup, text="Aligning datasets...").pack()
@@ -2146,8 +2128,8 @@ class Feedback:
                             try:
 
                                 dat = well_baro_merge(self.data['bulk-well'].loc[int(wellid)],
-                                                      self.data['bulk-well'].loc[int(baroid)],
-                                                      vented=sol)
+                                                      baros.get(int(baroid)),
+                                                      vented=sol, baro_resampled=True)
                                 dat.index.name = 'DateTime'
                             except IndexError:
                                 print(f"No match for wellid {wellid}, {baroid}")
@@ -2542,6 +2524,19 @@ class Feedback:
             os.makedirs(self.pluginpath)
         return
 
+    def toggle_cache(self):
+        """Turn the on-disk cache of parsed transducer files on, with a size budget, or off"""
+        if NewTransImp.cache is not None:
+            NewTransImp.cache = None
+            messagebox.showinfo(title='Cache Parsed Files', message='Parsed files are no longer cached.')
+            return
+        size = simpledialog.askfloat('Cache Parsed Files',
+                                     'Reuse parsed transducer files between imports.\nCache size budget (GB):',
+                                     initialvalue=2.0, minvalue=0.1, parent=self.root)
+        if size is None:
+            return
+        NewTransImp.cache = TransCache(os.path.join(self.configpath, 'cache'), max_bytes=int(size * 1024 ** 3))
+
     def darktheme(self):
 
         self.style.theme_use("forest-dark")
@@ -2621,7 +2616,7 @@ class Feedback:
         export_menu = tk.Menu(self.menu, tearoff=0)
         # add recent first
 
-        filemenuitems = {'01Quit': {'cmd': self.quit}}
+        filemenuitems = {'01Cache Parsed Files...': {'cmd': self.toggle_cache}, '02Quit': {'cmd': self.quit}}
         self.file_menu = self.create_pulldown(self.menu, filemenuitems, var=file_menu)
         self.menu.add_cascade(label='File', menu=self.file_menu['var'])
 
@@ -1,9 +1,20 @@
 import datetime
+import gc
 import glob
+import hashlib
 import io
 import os
+import pickle
 import re
+import sqlite3
+import time
 import xml.etree.ElementTree as eletree
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, redirect_stdout
+from multiprocessing import shared_memory
+from multiprocessing.util import Finalize
+from html.parser import HTMLParser
+from itertools import islice
 from pathlib import Path
 from shutil import copyfile
 from typing import Union, Tuple
@@ -12,7 +23,11 @@ from xml.etree.ElementTree import ParseError
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
 
 
 ###################################################################################################################
@@ -76,6 +91,10 @@ class Drifting(object):
         trim_end=False,
         well_id=None,
         engine=None,
+        compact=False,
+        method="segment",
+        fit_window="6h",
+        manual_from=None,
     ):
         """Remove transducer drift from nonvented transducer data. Faster and should produce same output as fix_drift_stepwise
 
@@ -90,6 +109,14 @@ class Drifting(object):
             well_table (str): name of table in database that contains well information; Defaults to None
             search_tol (int): Amount of time, in days to search for readings in the database; Defaults to 3
             trim_end (bool): Removes jumps from ends of data breakpoints that exceed a threshold; Defaults to True
+            compact (bool): transducer_df is in the form of `compact_frame`; no julian column is added; Defaults to False
+            method (str): 'segment' fits each segment from its end readings (`slope_intercept`); 'lstsq' fits one
+                continuous drift curve to all manual measurements (`fit_drift_curve`); Defaults to 'segment'
+            fit_window (str): readings within this time of a manual measurement are compared with it when
+                method is 'lstsq'; Defaults to '6h'
+            manual_from (datetime): manual measurements from this time on are kept even if they precede the readings
+                by more than daybuffer days; `fix_drift_update` passes the one that opens the last segment of the
+                previous run; Defaults to None
 
         Returns:
             (tuple): tuple containing:
@@ -151,12 +178,20 @@ class Drifting(object):
         self.wellbarofixed = pd.DataFrame()
         self.drift_sum_table = pd.DataFrame()
         self.trim_end = trim_end
+        self.method = method
+        self.fit_window = fit_window
+        self.manual_from = manual_from
+        self.residuals = pd.Series(dtype=float)
+        self.resid_beg = {}
+        self.resid_end = {}
 
         self.manual_df = self.datesort(manual_df)
         self.manual_df["julian"] = self.manual_df.index.to_julian_date()
 
         self.transducer_df = self.datesort(transducer_df)
-        self.transducer_df["julian"] = self.transducer_df.index.to_julian_date()
+        # compact frames (see `compact_frame`) keep julian dates derived from the index only
+        if not compact:
+            self.transducer_df["julian"] = self.transducer_df.index.to_julian_date()
 
         self.drifting_field = drifting_field
         self.man_field = man_field
@@ -164,17 +199,21 @@ class Drifting(object):
 
     def process_drift(self):
         self.breakpoints_calc()
+        self.segment_bounds()
+        if self.method == "lstsq":
+            self.fit_drift_curve()
         for i in range(len(self.breakpoints) - 1):
             # self.bracketed_wls(i)
             self.beginning_end(i)
             if len(self.bracketedwls[i]) > 0:
                 if self.trim_end:
-                    self.bracketedwls[i] = dataendclean(
-                        self.bracketedwls[i], self.drifting_field, jumptol=0.5
-                    )
+                    self.trim_segment(i)
                 # self.endpoint_import(i)
                 self.endpoint_status(i)
-                self.slope_intercept(i)
+                if self.method == "lstsq":
+                    self.curve_slope_intercept(i)
+                else:
+                    self.slope_intercept(i)
                 self.drift_add(i)
                 self.drift_data(i)
                 self.drift_print(i)
@@ -182,41 +221,65 @@ class Drifting(object):
         self.drift_summary()
         return self.wellbarofixed, self.drift_sum_table, self.max_drift
 
+    def segment_bounds(self):
+        """Positions of the breakpoints in the transducer readings that have data.
+
+        The readings are filtered once and each segment between breakpoints i and i + 1
+        is then the positional slice ``bounds[i]:bounds[i + 1]``. The manual measurement
+        times are indexed here as well for the nearest-time lookups in `beginning_end`,
+        and the drift columns are allocated once for `drift_add` to fill segment by segment.
+
+        Returns:
+            numpy array of positions, one per breakpoint
+        """
+        valid = (
+            self.transducer_df[self.drifting_field].notna().to_numpy()
+            & self.transducer_df.index.notna()
+        )
+        if valid.all():
+            self._valid_transducer = self.transducer_df
+        else:
+            self._valid_transducer = self.transducer_df[valid]
+        self._segment_bounds = self._valid_transducer.index.searchsorted(
+            pd.to_datetime(self.breakpoints), side="left"
+        )
+        self._manual_times = NearestTime(self.manual_df.index)
+
+        n = len(self._valid_transducer)
+        self._segment_rows = {}
+        self._segment = np.full(n, -1, dtype=np.int64)
+        self._driftcorrection = np.full(n, np.nan)
+        self._driftcorrwoffset = np.full(n, np.nan)
+        self._corrected = np.full(n, np.nan)
+        return self._segment_bounds
+
     def beginning_end(self, i):
-        df = self.transducer_df[
-            (self.transducer_df.index >= self.breakpoints[i])
-            & (self.transducer_df.index < self.breakpoints[i + 1])
-        ]
-        df = df.dropna(subset=[self.drifting_field])
-        df = df.sort_index()
-        # print(i)
-        # print(df)
+        if getattr(self, "_segment_bounds", None) is None:
+            self.segment_bounds()
+        start, stop = self._segment_bounds[i], self._segment_bounds[i + 1]
+        df = self._valid_transducer.iloc[start:stop]
+        self._segment_rows[i] = (start, stop)
         if len(df) > 0:
             self.manual_df["datetime"] = self.manual_df.index
-
-            self.first_man_julian_date[i] = self.fcl(
-                self.manual_df["julian"], self.breakpoints[i]
-            )
-            self.last_man_julian_date[i] = self.fcl(
-                self.manual_df["julian"], self.breakpoints[i + 1]
-            )
-            self.first_man_date[i] = self.fcl(
-                self.manual_df["datetime"], self.breakpoints[i]
-            )
-            self.last_man_date[i] = self.fcl(
-                self.manual_df["datetime"], self.breakpoints[i + 1]
-            )
-            self.first_man[i] = self.fcl(
-                self.manual_df[self.man_field], self.breakpoints[i]
-            )  # first manual measurement
-            self.last_man[i] = self.fcl(
-                self.manual_df[self.man_field], self.breakpoints[i + 1]
-            )  # last manual measurement
-
-            self.first_trans[i] = df.loc[df.first_valid_index(), self.drifting_field]
-            self.last_trans[i] = df.loc[df.last_valid_index(), self.drifting_field]
-            self.first_trans_julian_date[i] = df.loc[df.first_valid_index(), "julian"]
-            self.last_trans_julian_date[i] = df.loc[df.last_valid_index(), "julian"]
+            if getattr(self, "_manual_times", None) is None:
+                self._manual_times = NearestTime(self.manual_df.index)
+            first, last = self._manual_times.get_loc(self.breakpoints[i : i + 2])
+
+            self.first_man_julian_date[i] = self.manual_df["julian"].iloc[first]
+            self.last_man_julian_date[i] = self.manual_df["julian"].iloc[last]
+            self.first_man_date[i] = self.manual_df["datetime"].iloc[first]
+            self.last_man_date[i] = self.manual_df["datetime"].iloc[last]
+            self.first_man[i] = self.manual_df[self.man_field].iloc[
+                first
+            ]  # first manual measurement
+            self.last_man[i] = self.manual_df[self.man_field].iloc[
+                last
+            ]  # last manual measurement
+
+            self.first_trans[i] = df[self.drifting_field].iloc[0]
+            self.last_trans[i] = df[self.drifting_field].iloc[-1]
+            self.first_trans_julian_date[i] = df.first_valid_index().to_julian_date()
+            self.last_trans_julian_date[i] = df.last_valid_index().to_julian_date()
             self.first_trans_date[i] = df.first_valid_index()
             self.last_trans_date[i] = df.last_valid_index()
             self.bracketedwls[i] = df
@@ -224,6 +287,17 @@ class Drifting(object):
             self.bracketedwls[i] = df
             pass
 
+    def trim_segment(self, i):
+        """Trims jumps from the ends of segment i with `dataendclean`; the trimmed rows are left out of the results"""
+        df = self.bracketedwls[i]
+        trimmed = dataendclean(df, self.drifting_field, inplace=True, jumptol=0.5)
+        start = self._segment_rows[i][0]
+        if len(trimmed) > 0:
+            # dataendclean only drops rows from the ends, so the trimmed segment is still contiguous
+            start += df.index.searchsorted(trimmed.index[0], side="left")
+        self._segment_rows[i] = (start, start + len(trimmed))
+        self.bracketedwls[i] = trimmed
+
     @staticmethod
     def fcl(df, dtobj):
         """
@@ -237,9 +311,7 @@ class Drifting(object):
 
         taken from: http://stackoverflow.com/questions/15115547/find-closest-row-of-dataframe-to-given-time-in-pandas
         """
-        return df.iloc[
-            np.argmin(np.abs(pd.to_datetime(df.index) - dtobj))
-        ]  # remove to_pydatetime()
+        return fcl(df, dtobj)
 
     @staticmethod
     def datesort(df):
@@ -267,26 +339,29 @@ class Drifting(object):
             numpy.datetime64('1999-02-01T00:00:00.000000000')
         """
 
-        wellnona = self.transducer_df.dropna(subset=[self.drifting_field]).sort_index()
-        wellnona = wellnona[wellnona.index.notnull()]
+        # first and last times with data; transducer_df is sorted, so no filtered copy is needed
+        hasdata = (
+            self.transducer_df[self.drifting_field].notna().to_numpy()
+            & self.transducer_df.index.notna()
+        )
+        datatimes = self.transducer_df.index[np.flatnonzero(hasdata)[[0, -1]]]
+        first_valid, last_valid = datatimes[0], datatimes[1]
         self.manual_df = (
             self.manual_df[self.manual_df.index.notnull()]
             .dropna(subset=[self.man_field])
             .sort_index()
         )
 
-        self.manual_df = self.manual_df[
-            (
-                self.manual_df.index
-                >= wellnona.first_valid_index() - pd.Timedelta(f"{self.daybuffer:.0f}D")
-            )
-        ]
+        cutoff = first_valid - pd.Timedelta(f"{self.daybuffer:.0f}D")
+        if self.manual_from is not None:
+            cutoff = min(cutoff, pd.Timestamp(self.manual_from))
+        self.manual_df = self.manual_df[self.manual_df.index >= cutoff]
 
         if len(self.manual_df) > 0:
 
             # add first transducer time if it preceeds first manual measurement
-            if self.manual_df.first_valid_index() > wellnona.first_valid_index():
-                self.breakpoints.append(wellnona.first_valid_index())
+            if self.manual_df.first_valid_index() > first_valid:
+                self.breakpoints.append(first_valid)
 
             # add all manual measurements
             for ind in self.manual_df.index:
@@ -294,8 +369,8 @@ class Drifting(object):
                 self.breakpoints.append(ind)
 
             # add last transducer time if it is after last manual measurement
-            if self.manual_df.last_valid_index() < wellnona.last_valid_index():
-                self.breakpoints.append(wellnona.last_valid_index())
+            if self.manual_df.last_valid_index() < last_valid:
+                self.breakpoints.append(last_valid)
 
             # convert to datetime
             self.breakpoints = pd.Series(self.breakpoints)
@@ -395,6 +470,100 @@ class Drifting(object):
 
         return self.slope[i], self.intercept[i], self.slope_man[i], self.slope_trans[i]
 
+    def fit_drift_curve(self):
+        """Fits one continuous piecewise-linear drift curve to the offsets at all manual measurements.
+
+        Every reading within `fit_window` of a manual measurement (or, if there are none, the nearest reading
+        within `daybuffer` days) gives the offset between the transducer and that measurement, and each
+        measurement carries the same weight however many readings it has. The curve has a node at each
+        measurement with readings and is flat before the first and after the last of them, as the segment fits
+        are when a manual measurement is missing. Each offset involves only the two nodes around it, so the
+        least-squares normal equations are tridiagonal and are solved in time linear in the number of nodes.
+
+        Returns:
+            offsets of the drift curve at the breakpoints (numpy array)
+        """
+        knots = pd.DatetimeIndex(self.breakpoints).to_julian_date().to_numpy()
+        self._curve = np.zeros(len(knots))
+        self.residuals = pd.Series(np.nan, index=self.manual_df.index, dtype=float)
+        if len(knots) < 2:
+            return self._curve
+
+        times = self._valid_transducer.index
+        man_times = self.manual_df.index
+        window = pd.Timedelta(self.fit_window)
+        lo = times.searchsorted(man_times - window, side="left")
+        hi = times.searchsorted(man_times + window, side="right")
+        empty = np.flatnonzero(hi <= lo)
+        if len(empty) > 0:
+            nearest = NearestTime(times).get_loc(man_times[empty])
+            close = np.abs(times[nearest] - man_times[empty]) <= pd.Timedelta(f"{self.daybuffer:.0f}D")
+            lo[empty] = np.where(close, nearest, 0)
+            hi[empty] = np.where(close, nearest + 1, 0)
+
+        counts = hi - lo
+        meas = np.repeat(np.arange(len(man_times)), counts)
+        rows = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        if len(rows) == 0:
+            print("No transducer readings near the manual measurements; the drift curve is flat")
+            return self._curve
+        x = times[rows].to_julian_date().to_numpy()
+        y = (
+            self._valid_transducer[self.drifting_field].to_numpy()[rows]
+            - self.manual_df[self.man_field].to_numpy(dtype=float)[meas]
+        )
+        weight = 1.0 / counts[meas]
+
+        # hat functions of the two nodes around each reading
+        nodes = np.unique(man_times[counts > 0].to_julian_date().to_numpy())
+        n = len(nodes)
+        if n == 1:
+            offsets = np.array([np.sum(weight * y) / np.sum(weight)])
+            fitted = np.full(len(y), offsets[0])
+        else:
+            x = np.clip(x, nodes[0], nodes[-1])
+            seg = np.clip(np.searchsorted(nodes, x, side="right") - 1, 0, n - 2)
+            right = (x - nodes[seg]) / (nodes[seg + 1] - nodes[seg])
+            left = 1.0 - right
+
+            diag = np.bincount(seg, weight * left * left, n) + np.bincount(seg + 1, weight * right * right, n)
+            off = np.bincount(seg, weight * left * right, n - 1)
+            rhs = np.bincount(seg, weight * left * y, n) + np.bincount(seg + 1, weight * right * y, n)
+            offsets = _solve_tridiagonal(off, diag, off, rhs)
+            fitted = left * offsets[seg] + right * offsets[seg + 1]
+        self._curve = np.interp(knots, nodes, offsets)
+
+        # residual = corrected reading minus manual measurement, averaged over the readings of each measurement
+        resid = np.bincount(meas, weight * (y - fitted), len(man_times))
+        self.residuals[:] = np.where(counts > 0, resid, np.nan)
+        return self._curve
+
+    def curve_slope_intercept(self, i):
+        """Slope and offset of segment i from the drift curve of `fit_drift_curve`.
+
+        Used in place of `slope_intercept` when method is 'lstsq'. The intercept is the offset of the curve at
+        the first reading of the segment, so `drift_add` applies the curve as it applies the segment fits.
+        The manual slope is the part of the transducer slope the curve leaves in place.
+
+        Returns:
+            slope, intercept, manual slope, transducer slope
+        """
+        knots = pd.DatetimeIndex(self.breakpoints[i : i + 2]).to_julian_date()
+        self.slope[i] = (self._curve[i + 1] - self._curve[i]) / (knots[1] - knots[0])
+        self.intercept[i] = self._curve[i] + self.slope[i] * (self.first_trans_julian_date[i] - knots[0])
+        if self.last_trans_julian_date[i] > self.first_trans_julian_date[i]:
+            self.slope_trans[i] = (self.last_trans[i] - self.first_trans[i]) / (
+                self.last_trans_julian_date[i] - self.first_trans_julian_date[i]
+            )
+        else:
+            self.slope_trans[i] = 0
+        self.slope_man[i] = self.slope_trans[i] - self.slope[i]
+
+        first, last = self._manual_times.get_loc(self.breakpoints[i : i + 2])
+        self.resid_beg[i] = None if self.first_man[i] is None else self.residuals.iloc[first]
+        self.resid_end[i] = None if self.last_man[i] is None else self.residuals.iloc[last]
+        return self.slope[i], self.intercept[i], self.slope_man[i], self.slope_trans[i]
+
     def drift_add(self, i):
         """
         Uses slope and offset from `slope_intercept` to correct for transducer drift
@@ -407,7 +576,10 @@ class Drifting(object):
             b (float): intercept of drift (from calc_slope_and_intercept)
 
         Returns:
-            pandas dataframe: drift columns and data column corrected for drift (outcolname)
+            drift correction of the segment (numpy array) and the drift of the segment
+
+        The correction is written into the drift columns allocated by `segment_bounds`; `combine_brackets`
+        attaches them to the readings once all segments are done.
 
         Examples:
 
@@ -418,22 +590,28 @@ class Drifting(object):
             >>> print(calc_drift(df,'data','gooddata',0.05,1)['gooddata'][-1])
             6.0
         """
-        # datechange = amount of time between manual measurements
-        df = self.bracketedwls[i]
+        start, stop = self._segment_rows[i]
+        rows = slice(start, stop)
 
         total_date_change = (
             self.last_trans_julian_date[i] - self.first_trans_julian_date[i]
         )
         self.drift[i] = self.slope[i] * total_date_change
-        df["datechange"] = df["julian"] - self.first_trans_julian_date[i]
+        # datechange = amount of time since the first reading of the segment
+        datechange = (
+            self._valid_transducer.index[rows].to_julian_date().to_numpy()
+            - self.first_trans_julian_date[i]
+        )
 
-        df["driftcorrection"] = df["datechange"].apply(lambda x: x * self.slope[i], 1)
-        df["driftcorrwoffset"] = df["driftcorrection"] + self.intercept[i]
-        df[self.output_field] = df[self.drifting_field] - df["driftcorrwoffset"]
-        df = df.drop(["datechange"], axis=1)
-        self.bracketedwls[i] = df
+        self._driftcorrection[rows] = datechange * self.slope[i]
+        self._driftcorrwoffset[rows] = self._driftcorrection[rows] + self.intercept[i]
+        self._corrected[rows] = (
+            self._valid_transducer[self.drifting_field].to_numpy()[rows]
+            - self._driftcorrwoffset[rows]
+        )
+        self._segment[rows] = i
 
-        return df, self.drift[i]
+        return self._driftcorrection[rows], self.drift[i]
 
     def drift_data(self, i):
         """Packages all drift calculations into a dictionary. Used by `fix_drift` function.
@@ -472,6 +650,9 @@ class Drifting(object):
             "last_trans": self.last_trans[i],
             "drift": self.drift[i],
         }
+        if self.method == "lstsq":
+            self.drift_features[i]["resid_beg"] = self.resid_beg[i]
+            self.drift_features[i]["resid_end"] = self.resid_end[i]
 
     @staticmethod
     def ine(x, dtype):
@@ -574,12 +755,460 @@ class Drifting(object):
             )
 
     def combine_brackets(self):
-        dtnm = self.bracketedwls[0].index.name
-        # print(dtnm)
-        df = pd.concat(self.bracketedwls, sort=True)
-        df = df.reset_index()
-        df = df.set_index(dtnm)
-        self.wellbarofixed = df.sort_index()
+        """Attaches the drift columns to the corrected readings.
+
+        The readings stay in the sorted order of the transducer data, so no concatenation is needed. When every
+        reading between the first and last corrected one was corrected, the result shares the reading columns
+        with `transducer_df` instead of copying them. The segment of each reading is in the level_0 column, and
+        the other columns are in alphabetical order, as concatenating the segments gave them.
+        """
+        if not self.bracketedwls:
+            raise KeyError(
+                "No Breakpoints can be established as manual data do not align with imported data"
+            )
+        done = np.flatnonzero(self._segment >= 0)
+        if len(done) == 0:
+            self.wellbarofixed = self._valid_transducer.iloc[0:0].copy()
+            return
+        lo, hi = done[0], done[-1] + 1
+        rows = slice(lo, hi) if len(done) == hi - lo else done
+        readings = self._valid_transducer.iloc[rows]
+
+        columns = {name: readings[name].array for name in readings.columns}
+        columns["driftcorrection"] = self._driftcorrection[rows]
+        columns["driftcorrwoffset"] = self._driftcorrwoffset[rows]
+        columns[self.output_field] = self._corrected[rows]
+        order = ["level_0"] + sorted(columns, key=str)
+        columns["level_0"] = self._segment[rows]
+        df = pd.DataFrame(
+            {name: columns[name] for name in order},
+            index=pd.DatetimeIndex(readings.index, freq=None),
+            copy=False,
+        )
+        self.wellbarofixed = df
+
+        # segments as views of the results
+        position = np.cumsum(self._segment >= 0) - 1
+        for i, (start, stop) in self._segment_rows.items():
+            if i in self.drift_features and stop > start:
+                self.bracketedwls[i] = df.iloc[position[start] : position[stop - 1] + 1]
+
+
+def _solve_tridiagonal(lower, diag, upper, rhs):
+    """Solves a tridiagonal system of equations with the Thomas algorithm.
+
+    Args:
+        lower (numpy.ndarray): subdiagonal, one shorter than diag
+        diag (numpy.ndarray): main diagonal
+        upper (numpy.ndarray): superdiagonal, one shorter than diag
+        rhs (numpy.ndarray): right-hand side
+
+    Returns:
+        solution (numpy array)
+    """
+    n = len(diag)
+    factor = np.zeros(n)
+    result = np.zeros(n)
+    result[0] = rhs[0] / diag[0]
+    if n > 1:
+        factor[0] = upper[0] / diag[0]
+    for i in range(1, n):
+        pivot = diag[i] - lower[i - 1] * factor[i - 1]
+        if i < n - 1:
+            factor[i] = upper[i] / pivot
+        result[i] = (rhs[i] - lower[i - 1] * result[i - 1]) / pivot
+    for i in range(n - 2, -1, -1):
+        result[i] -= factor[i] * result[i + 1]
+    return result
+
+
+def _grouped_searchsorted(group, times, qgroup, qtimes, side="left"):
+    """`np.searchsorted` of (qgroup, qtimes) pairs into (group, times) pairs sorted by group, then time
+
+    Args:
+        group (np.ndarray): integer group codes of the sorted pairs
+        times (np.ndarray): int64 times of the sorted pairs
+        qgroup (np.ndarray): integer group codes of the queries
+        qtimes (np.ndarray): int64 times of the queries
+        side (str): 'left' or 'right', as in `np.searchsorted`
+
+    Returns:
+        numpy array of insertion positions, one per query
+    """
+    n = len(group)
+    # on equal pairs, queries sort before the sorted pairs for side='left' and after them for side='right'
+    kind = np.concatenate([np.ones(n, dtype=np.int8),
+                           np.full(len(qgroup), 0 if side == "left" else 2, dtype=np.int8)])
+    order = np.lexsort((kind, np.concatenate([times, qtimes]), np.concatenate([group, qgroup])))
+    is_query = order >= n
+    before = np.cumsum(~is_query)
+    positions = np.empty(len(qgroup), dtype=np.int64)
+    positions[order[is_query] - n] = before[is_query]
+    return positions
+
+
+def fix_drift_batch(readings, manual, drifting_field="corrwl", man_field="measureddtw",
+                    output_field="waterelevation", daybuffer=3):
+    """Drift correction of many wells at once; gives the same results as running `Drifting` on each well
+
+    Breakpoints, the readings and manual measurements at the ends of each segment, slopes, intercepts and the
+    corrected readings are found for all wells together with sorted array operations instead of a `Drifting`
+    object per well.
+
+    Args:
+        readings (pd.DataFrame): transducer readings indexed by (location id, datetime), like `bulk-well-baro`
+        manual (pd.DataFrame): manual measurements indexed by (location id, datetime), like `bulk-manual`
+        drifting_field (str): column in readings to correct; Defaults to 'corrwl'
+        man_field (str): column in manual with the manual measurements; Defaults to 'measureddtw'
+        output_field (str): name of the corrected column; Defaults to 'waterelevation'
+        daybuffer (int): days a manual measurement may be from the end of a segment; Defaults to 3
+
+    Returns:
+        (tuple): tuple containing:
+
+            - corrected (pandas.core.frame.DataFrame):
+                readings with data, indexed like `readings`, with driftcorrection, driftcorrwoffset and output_field
+            - driftinfo (pandas.core.frame.DataFrame):
+                drift correction parameters indexed by location id and segment, as in `Drifting.drift_sum_table`
+            - max_drift (pandas.core.series.Series):
+                maximum drift of each well
+
+        Wells without manual measurements in the time of their readings are left out.
+    """
+    locname, dtname = readings.index.names[:2]
+    rloc = readings.index.get_level_values(0)
+    rtime = pd.to_datetime(readings.index.get_level_values(1))
+    mloc = manual.index.get_level_values(0)
+    mtime = pd.to_datetime(manual.index.get_level_values(1))
+    codes, locations = pd.factorize(np.concatenate([np.asarray(rloc), np.asarray(mloc)]), sort=True)
+    rcode, mcode = codes[: len(rloc)], codes[len(rloc):]
+
+    # readings with data, sorted by well and time
+    rvalue = readings[drifting_field].to_numpy(dtype=np.float64)
+    rows = np.flatnonzero(np.isfinite(rvalue) & rtime.notna() & (rcode >= 0))
+    rows = rows[np.lexsort((rtime.asi8[rows], rcode[rows]))]
+    rl, rt, rv = rcode[rows], rtime.asi8[rows], rvalue[rows]
+    starts = np.flatnonzero(np.r_[True, rl[1:] != rl[:-1]]) if len(rl) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(rl)] - 1
+    first_t = np.full(len(locations), np.iinfo(np.int64).max)
+    last_t = np.full(len(locations), np.iinfo(np.int64).min)
+    first_t[rl[starts]], last_t[rl[starts]] = rt[starts], rt[ends]
+
+    # manual measurements from the daybuffer before the first reading on, sorted by well and time
+    buffer = pd.Timedelta(f"{daybuffer:.0f}D").value
+    mvalue = pd.to_numeric(manual[man_field], errors="coerce").to_numpy(dtype=np.float64)
+    keep = ~np.isnan(mvalue) & mtime.notna() & (mcode >= 0)
+    keep[keep] = mtime.asi8[keep] >= first_t[mcode[keep]] - buffer
+    mrows = np.flatnonzero(keep)
+    mrows = mrows[np.lexsort((mtime.asi8[mrows], mcode[mrows]))]
+    ml, mt, mv = mcode[mrows], mtime.asi8[mrows], mvalue[mrows]
+    mstarts = np.flatnonzero(np.r_[True, ml[1:] != ml[:-1]]) if len(ml) else np.array([], dtype=np.int64)
+    mends = np.r_[mstarts[1:], len(ml)] - 1
+    wells = ml[mstarts]
+
+    # breakpoints: manual measurement times plus the ends of the readings beyond them
+    head = wells[mt[mstarts] > first_t[wells]]
+    tail = wells[mt[mends] < last_t[wells]]
+    bl = np.concatenate([head, ml, tail])
+    bt = np.concatenate([first_t[head], mt, last_t[tail]])
+    order = np.lexsort((bt, bl))
+    bl, bt = bl[order], bt[order]
+    unique = np.r_[True, (bl[1:] != bl[:-1]) | (bt[1:] != bt[:-1])]
+    bl, bt = bl[unique], bt[unique]
+    bfirst = np.flatnonzero(np.r_[True, bl[1:] != bl[:-1]]) if len(bl) else np.array([], dtype=np.int64)
+
+    # each reading belongs to the segment starting at the last breakpoint at or before it
+    seg = _grouped_searchsorted(bl, bt, rl, rt, side="right") - 1
+    if len(bl) > 1:
+        nxt = np.minimum(seg + 1, len(bl) - 1)
+        inseg = (seg >= 0) & (bl[np.maximum(seg, 0)] == rl) & (seg + 1 < len(bl)) & (bl[nxt] == rl)
+    else:
+        inseg = np.zeros(len(seg), dtype=bool)
+    rows, rl, rt, rv, seg = rows[inseg], rl[inseg], rt[inseg], rv[inseg], seg[inseg]
+    segs, first, count = np.unique(seg, return_index=True, return_counts=True)
+    last = first + count - 1
+
+    # manual measurements closest to the breakpoints at both ends of each segment
+    def nearest_manual(b):
+        pos = _grouped_searchsorted(ml, mt, bl[b], bt[b], side="left")
+        before, after = np.maximum(pos - 1, 0), np.minimum(pos, len(ml) - 1)
+        has_before = (pos > 0) & (ml[before] == bl[b])
+        has_after = (pos < len(ml)) & (ml[after] == bl[b])
+        pick = np.where(has_before & (~has_after | (bt[b] - mt[before] <= mt[after] - bt[b])), before, after)
+        # first of duplicated times
+        return _grouped_searchsorted(ml, mt, ml[pick], mt[pick], side="left")
+
+    mfirst, mlast = nearest_manual(segs), nearest_manual(segs + 1)
+
+    def julian(t):
+        return pd.DatetimeIndex(t).to_julian_date().to_numpy()
+
+    first_trans, last_trans = rv[first], rv[last]
+    first_trans_date, last_trans_date = rt[first], rt[last]
+    first_trans_julian, last_trans_julian = julian(first_trans_date), julian(last_trans_date)
+    first_man, last_man = mv[mfirst], mv[mlast]
+    first_man_date, last_man_date = mt[mfirst], mt[mlast]
+    first_man_julian, last_man_julian = julian(first_man_date), julian(last_man_date)
+
+    # see Drifting.endpoint_status and Drifting.slope_intercept
+    no_first = np.abs(first_man_date - first_trans_date) > buffer
+    no_last = np.abs(last_trans_date - last_man_date) > buffer
+    both = ~no_first & ~no_last
+    first_offset = np.where(no_first, 0.0, first_trans - first_man)
+    last_offset = np.where(no_last, 0.0, last_trans - last_man)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope_man = np.where(both, (first_man - last_man) / (first_man_julian - last_man_julian), 0.0)
+        slope_trans = np.where(both, (first_trans - last_trans) / (first_trans_julian - last_trans_julian), 0.0)
+    slope = slope_trans - slope_man
+    intercept = np.where(first_offset == 0, last_offset, first_offset)
+    drift = slope * (last_trans_julian - first_trans_julian)
+
+    segment = segs - bfirst[np.searchsorted(bfirst, segs, side="right") - 1]
+    loc_values = locations[bl[segs]]
+    driftinfo = pd.DataFrame({
+        "t_beg": pd.DatetimeIndex(first_trans_date),
+        "man_beg": pd.DatetimeIndex(np.where(no_first, np.iinfo(np.int64).min, first_man_date)),
+        "t_end": pd.DatetimeIndex(last_trans_date),
+        "man_end": pd.DatetimeIndex(np.where(no_last, np.iinfo(np.int64).min, last_man_date)),
+        "slope_man": slope_man,
+        "slope_trans": slope_trans,
+        "intercept": intercept,
+        "slope": slope,
+        "first_meas": np.where(no_first, first_trans, first_man),
+        "last_meas": np.where(no_last, np.where(no_first, np.nan, last_trans), last_man),
+        "first_trans": first_trans,
+        "last_trans": last_trans,
+        "drift": drift,
+    }, index=pd.MultiIndex.from_arrays([loc_values, segment], names=[locname, "segment"]))
+    driftinfo["quality"] = (driftinfo["drift"] / 2).abs().round(3)
+    missing = no_first | no_last
+    driftinfo.loc[missing, "quality"] = 0.3
+    driftinfo.loc[missing, "drift"] = np.nan
+    max_drift = driftinfo["drift"].abs().groupby(level=0).max()
+
+    # corrected readings
+    rseg = np.searchsorted(segs, seg)
+    corrected = readings.iloc[rows].copy()
+    corrected.index = pd.MultiIndex.from_arrays([locations[rl], pd.DatetimeIndex(rt)], names=[locname, dtname])
+    datechange = julian(rt) - first_trans_julian[rseg]
+    corrected["driftcorrection"] = datechange * slope[rseg]
+    corrected["driftcorrwoffset"] = corrected["driftcorrection"] + intercept[rseg]
+    corrected[output_field] = corrected[drifting_field] - corrected["driftcorrwoffset"]
+    return corrected, driftinfo, max_drift
+
+
+def _drift_digest(readings, manual, options):
+    """Hex digest of one well's inputs to `fix_drift_bulk`; a checkpoint is reused only while it matches"""
+    digest = hashlib.blake2b(digest_size=16)
+    for frame in (readings, manual):
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        digest.update(repr(list(frame.columns)).encode())
+    digest.update(repr(options).encode())
+    return digest.hexdigest()
+
+
+def _drift_well(wellid, readings, manual, drifting_field, man_field, output_field, daybuffer):
+    """Drift corrects one well for `fix_drift_bulk`, in the layout returned by `fix_drift_batch`"""
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(io.StringIO()):
+            df, info, max_drift = Drifting(manual, readings, drifting_field=drifting_field, man_field=man_field,
+                                           output_field=output_field, daybuffer=daybuffer).process_drift()
+        columns = list(dict.fromkeys(list(readings.columns) + ["driftcorrection", "driftcorrwoffset", output_field]))
+        df = df[columns]
+        info = info.infer_objects()
+        for column in ["t_beg", "man_beg", "t_end", "man_end"]:
+            info[column] = pd.to_datetime(info[column])
+        info.index.name = "segment"
+        error = None
+    except Exception as e:
+        df, info, max_drift, error = None, None, None, repr(e)
+    return wellid, df, info, max_drift, time.perf_counter() - start, error
+
+
+def fix_drift_bulk(readings, manual, checkpoint_dir, drifting_field="corrwl", man_field="measureddtw",
+                   output_field="waterelevation", daybuffer=3, workers=None):
+    """Drift corrects every well of a bulk import without the GUI, keeping each finished well on disk.
+
+    Each well is corrected by its own `Drifting` run. With `workers`, wells run in a process pool. As each well
+    finishes, its corrected readings and drift table are written to `checkpoint_dir`, so an interrupted run picks
+    up where it stopped when called again. Checkpoints are keyed by a digest of the well's readings, manual
+    measurements and options, so wells whose data changed are corrected again. A well that fails is reported and
+    retried on the next run; it does not stop the others.
+
+    Args:
+        readings (pd.DataFrame):
+            transducer readings indexed by (location id, datetime), like `bulk-well-baro`
+        manual (pd.DataFrame):
+            manual measurements indexed by (location id, datetime), like `bulk-manual`
+        checkpoint_dir (str):
+            directory for the per-well checkpoints; created if it does not exist
+        drifting_field (str):
+            column in readings to correct; Defaults to 'corrwl'
+        man_field (str):
+            column in manual with the manual measurements; Defaults to 'measureddtw'
+        output_field (str):
+            name of the corrected column; Defaults to 'waterelevation'
+        daybuffer (int):
+            days a manual measurement may be from the end of a segment; Defaults to 3
+        workers (int):
+            number of worker processes; defaults to None (correct serially in this process)
+
+    Returns:
+        corrected readings, drift table and max drift in the layout of `fix_drift_batch`, and a DataFrame report of
+        locationid, rows, max_drift, seconds, resumed and error for every well
+
+    Examples:
+        >>> corrected, driftinfo, max_drift, report = fix_drift_bulk(wellbaro, manual, 'O:/drift_checkpoints',
+        ...                                                          man_field='dtwbelowcasing', workers=8)
+    """
+    checkpoint_dir = Path(checkpoint_dir).expanduser()
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    options = (drifting_field, man_field, output_field, daybuffer)
+    manual_wells = set(manual.index.get_level_values(0))
+    wellids = [wellid for wellid in readings.index.get_level_values(0).unique()
+               if pd.notnull(wellid) and wellid in manual_wells]
+
+    results = {}
+    jobs = {}
+    for wellid in wellids:
+        well, man = readings.loc[wellid], manual.loc[wellid]
+        digest = _drift_digest(well, man, options)
+        checkpoint = checkpoint_dir / f"{wellid}.pkl"
+        try:
+            saved = pd.read_pickle(checkpoint)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            saved = None
+        if saved is not None and saved["digest"] == digest:
+            results[wellid] = (saved["corrected"], saved["driftinfo"], saved["max_drift"], 0.0, True, None)
+        else:
+            jobs[wellid] = (well, man, digest)
+
+    def finish(wellid, df, info, max_drift, seconds, error):
+        if error is None:
+            checkpoint = checkpoint_dir / f"{wellid}.pkl"
+            tmp_file = checkpoint.with_suffix(f".{os.getpid()}.tmp")
+            pd.to_pickle({"digest": jobs[wellid][2], "corrected": df, "driftinfo": info, "max_drift": max_drift},
+                         tmp_file)
+            os.replace(tmp_file, checkpoint)
+        results[wellid] = (df, info, max_drift, seconds, False, error)
+
+    if workers is not None and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_drift_well, wellid, well, man, drifting_field, man_field, output_field, daybuffer)
+                for wellid, (well, man, digest) in jobs.items()
+            ]
+            for future in as_completed(futures):
+                finish(*future.result())
+    else:
+        for wellid, (well, man, digest) in jobs.items():
+            finish(*_drift_well(wellid, well.copy(), man.copy(), drifting_field, man_field, output_field,
+                                daybuffer))
+
+    corrected, driftinfo, drifts, report = {}, {}, {}, []
+    for wellid in wellids:
+        df, info, max_drift, seconds, resumed, error = results[wellid]
+        report.append({"locationid": wellid, "rows": 0 if df is None else len(df), "max_drift": max_drift,
+                       "seconds": seconds, "resumed": resumed, "error": error})
+        if error is None:
+            corrected[wellid], driftinfo[wellid], drifts[wellid] = df, info, max_drift
+    report = pd.DataFrame(report, columns=["locationid", "rows", "max_drift", "seconds", "resumed", "error"])
+
+    locname, dtname = readings.index.names[:2]
+    if not corrected:
+        index = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=[locname, dtname])
+        return pd.DataFrame(index=index), pd.DataFrame(), pd.Series(dtype=float), report
+    corrected = pd.concat(corrected, names=[locname, dtname])
+    driftinfo = pd.concat(driftinfo, names=[locname, "segment"])
+    max_drift = pd.Series(drifts, dtype=float).rename_axis(locname).rename("drift")
+    return corrected, driftinfo, max_drift, report
+
+
+def fix_drift_update(readings, manual, drift_info, last_corrected, drifting_field="corrwl",
+                     man_field="measureddtw", output_field="waterelevation", daybuffer=3):
+    """Drift corrects a new transducer download from where the previous correction of the well left off.
+
+    Only the last segment of the previous run and the segments after it can change when readings are appended, so
+    only they are processed. The first reading of the last segment is taken from `drift_info` (its t_beg and
+    first_trans), and the readings of the previous download are not needed. The new rows and their segments are the
+    same as correcting the whole record again and keeping the new rows with `subset_final_processed_data`.
+
+    Args:
+        readings (pd.DataFrame):
+            new transducer readings; readings at or before `last_corrected` are ignored
+        manual (pd.DataFrame):
+            manual measurements of the well; ones before the last segment are ignored
+        drift_info (pd.DataFrame):
+            drift table of the previous `Drifting` run or `fix_drift_update` of the well
+        last_corrected (pd.Series):
+            last row of the previous corrected readings; its name is the time of the row. A Timestamp also works
+        drifting_field (str):
+            column in readings to correct; Defaults to 'corrwl'
+        man_field (str):
+            column in manual with the manual measurements; Defaults to 'measureddtw'
+        output_field (str):
+            name of the corrected column; Defaults to 'waterelevation'
+        daybuffer (int):
+            days a manual measurement may be from the end of a segment; Defaults to 3
+
+    Returns:
+        (tuple): tuple containing:
+
+            - corrected readings after `last_corrected`, with segments numbered on from `drift_info`
+            - drift table of the segments with new readings
+            - maximum drift of those segments
+
+        The frames are empty and the maximum drift is NaN when there are no readings after `last_corrected`.
+
+    Examples:
+        >>> wellbarofixed, driftinfo, max_drift = Drifting(manual, wellbaro).process_drift()
+        >>> new_rows, new_drift, max_drift = fix_drift_update(new_wellbaro, manual, driftinfo, wellbarofixed.iloc[-1])
+    """
+    last_time = pd.Timestamp(getattr(last_corrected, "name", last_corrected))
+    readings = readings.copy()
+    readings.index = pd.to_datetime(readings.index)
+    readings = readings[readings.index > last_time].sort_index()
+    if len(readings) == 0:
+        print(f"No readings after {last_time}")
+        empty = pd.DataFrame(columns=drift_info.columns if drift_info is not None else None)
+        return readings, empty, np.nan
+    manual = manual.copy()
+    manual.index = pd.to_datetime(manual.index)
+
+    if drift_info is None or len(drift_info) == 0:
+        wellbarofixed, driftinfo, max_drift = Drifting(manual, readings, drifting_field, man_field, daybuffer,
+                                                       output_field).process_drift()
+        return wellbarofixed, driftinfo, max_drift
+
+    # the last segment of the previous run opens at the last manual measurement before its first reading, even one
+    # more than daybuffer days earlier; only the first segment of a record can open at its first reading instead
+    last = drift_info.iloc[-1]
+    t_beg = pd.Timestamp(last["t_beg"])
+    manual = manual[manual.index.notnull()].dropna(subset=[man_field]).sort_index()
+    opening = manual.index[manual.index <= t_beg]
+    if drift_info.index[-1] != 0 and len(opening) > 0:
+        start = manual_from = opening[-1]
+    else:
+        start = t_beg if pd.isna(last["man_beg"]) else min(t_beg, pd.Timestamp(last["man_beg"]))
+        manual_from = None
+    manual = manual[manual.index >= start]
+    first = readings.iloc[:1].copy()
+    first.index = pd.DatetimeIndex([t_beg], name=readings.index.name)
+    first[drifting_field] = last["first_trans"]
+
+    drift = Drifting(manual, pd.concat([first, readings]), drifting_field, man_field, daybuffer, output_field,
+                     manual_from=manual_from)
+    wellbarofixed, driftinfo, max_drift = drift.process_drift()
+
+    # keep the segments with new readings; the first one continues the numbering of the previous table
+    wellbarofixed = wellbarofixed[wellbarofixed.index > last_time].copy()
+    offset = drift_info.index[-1]
+    wellbarofixed["level_0"] += offset
+    driftinfo = driftinfo.loc[driftinfo.index.isin(wellbarofixed["level_0"].unique() - offset)]
+    driftinfo.index = driftinfo.index + offset
+    max_drift = driftinfo["drift"].abs().max()
+    return wellbarofixed, driftinfo, max_drift
 
 
 def get_stickup(stdata, site_number, stable_elev=True, man=None):
@@ -675,34 +1304,125 @@ def first_last_indices(df, tmzone=None):
     return first_index, last_index
 
 
-def barodistance(wellinfo):
-    """Determines Closest Barometer to Each Well using wellinfo DataFrame"""
-    barometers = {
-        "barom": ["pw03", "pw10", "pw19"],
-        "X": [240327.49, 271127.67, 305088.9],
-        "Y": [4314993.95, 4356071.98, 4389630.71],
-        "Z": [1623.079737, 1605.187759, 1412.673738],
-    }
-    barolocal = pd.DataFrame(barometers)
-    barolocal = barolocal.reset_index()
-    barolocal.set_index("barom", inplace=True)
-
-    wellinfo["pw03"] = np.sqrt(
-        (barolocal.loc["pw03", "X"] - wellinfo["UTMEasting"]) ** 2
-        + (barolocal.loc["pw03", "Y"] - wellinfo["UTMNorthing"]) ** 2
-        + (barolocal.loc["pw03", "Z"] - wellinfo["G_Elev_m"]) ** 2
-    )
-    wellinfo["pw10"] = np.sqrt(
-        (barolocal.loc["pw10", "X"] - wellinfo["UTMEasting"]) ** 2
-        + (barolocal.loc["pw10", "Y"] - wellinfo["UTMNorthing"]) ** 2
-        + (barolocal.loc["pw10", "Z"] - wellinfo["G_Elev_m"]) ** 2
-    )
-    wellinfo["pw19"] = np.sqrt(
-        (barolocal.loc["pw19", "X"] - wellinfo["UTMEasting"]) ** 2
-        + (barolocal.loc["pw19", "Y"] - wellinfo["UTMNorthing"]) ** 2
-        + (barolocal.loc["pw19", "Z"] - wellinfo["G_Elev_m"]) ** 2
-    )
-    wellinfo["closest_baro"] = wellinfo[["pw03", "pw10", "pw19"]].T.idxmin()
+class BaroIndex(object):
+    """Spatial index of barometers for assigning each well the closest barometer that covers its record.
+
+    Barometers are indexed on their coordinates (and elevation) with a KD-tree when scipy is available, otherwise
+    distances are computed with NumPy broadcasting. A query looks up the few nearest barometers of every well in one
+    call and picks the nearest one whose active date range covers the well's time window; only wells that none of
+    them covers are looked up again with more barometers.
+
+    Args:
+        barometers (pd.DataFrame): one row per barometer indexed by its id (e.g. locationid) with coordinates,
+            elevation and, optionally, the beginning and end of its record
+        x (str): easting column; defaults to 'UTMEasting'
+        y (str): northing column; defaults to 'UTMNorthing'
+        z (str): elevation column, or None to compare horizontal distance only; defaults to 'G_Elev_m'
+        begin (str): column of the first date a barometer has data; missing or NaT means no limit
+        end (str): column of the last date a barometer has data; missing or NaT means no limit
+
+    Examples:
+        >>> baros = BaroIndex(well_table[well_table['locationtype'] == 'Barometer'])
+        >>> well_table['barologgertype'] = baros.query(well_table)
+    """
+
+    def __init__(self, barometers, x="UTMEasting", y="UTMNorthing", z="G_Elev_m", begin="beginning", end="end"):
+        self.ids = barometers.index.to_numpy()
+        self.x, self.y, self.z = x, y, z
+        self.points = self._points(barometers)
+        self.begin = self._dates(barometers, begin, np.iinfo(np.int64).min)
+        self.end = self._dates(barometers, end, np.iinfo(np.int64).max)
+        self.tree = cKDTree(self.points) if cKDTree is not None and len(self.points) > 0 else None
+
+    def _points(self, df):
+        cols = [self.x, self.y] if self.z is None else [self.x, self.y, self.z]
+        return df[cols].to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def _dates(df, col, fill):
+        if col is None or col not in df.columns:
+            return np.full(len(df), fill, dtype=np.int64)
+        dates = pd.to_datetime(df[col]).to_numpy(dtype="datetime64[ns]").view(np.int64).copy()
+        dates[dates == np.iinfo(np.int64).min] = fill  # NaT
+        return dates
+
+    def ranked(self, wells, k=None):
+        """Returns the positions and distances of the `k` nearest barometers of every well, nearest first, as two
+        (wells, k) arrays; `k` defaults to all barometers"""
+        points = self._points(wells)
+        k = len(self.ids) if k is None else min(k, len(self.ids))
+        if self.tree is not None:
+            dist, pos = self.tree.query(points, k=k)
+            return pos.reshape(len(points), k), dist.reshape(len(points), k)
+        dist = np.sqrt(((points[:, None, :] - self.points[None, :, :]) ** 2).sum(axis=2))
+        pos = np.argsort(dist, axis=1, kind="stable")[:, :k]
+        return pos, np.take_along_axis(dist, pos, axis=1)
+
+    def query(self, wells, start="beginning", end="end", name="barologgertype", k=4):
+        """Finds the closest barometer with data over each well's time window.
+
+        Args:
+            wells (pd.DataFrame): wells or well records (e.g. one row per file) with the same coordinate columns
+            start (str): column with the start of each time window; missing or NaT means no limit
+            end (str): column with the end of each time window; missing or NaT means no limit
+            name (str): name of the returned Series; defaults to 'barologgertype'
+            k (int): number of nearest barometers checked first; wells that none of them covers are checked against
+                four times as many, and so on; defaults to 4
+
+        Returns:
+            pd.Series of barometer ids aligned with `wells`; NaN where no barometer covers the window or the well
+            has no coordinates
+        """
+        out = pd.Series(np.nan, index=wells.index, name=name, dtype=object)
+        if len(self.ids) == 0 or len(wells) == 0:
+            return out
+        located = ~np.isnan(self._points(wells)).any(axis=1)
+        if not located.any():
+            return out
+        located_wells = wells[located]
+        w_start = self._dates(located_wells, start, np.iinfo(np.int64).max)[:, None]
+        w_end = self._dates(located_wells, end, np.iinfo(np.int64).min)[:, None]
+
+        choice = np.full(len(located_wells), -1)
+        todo = np.arange(len(located_wells))
+        k = min(max(int(k), 1), len(self.ids))
+        while len(todo) > 0:
+            pos, dist = self.ranked(located_wells.iloc[todo], k)
+            covers = (self.begin[pos] <= w_start[todo]) & (self.end[pos] >= w_end[todo])
+            first = covers.argmax(axis=1)
+            found = covers[np.arange(len(pos)), first]
+            choice[todo[found]] = pos[found, first[found]]
+            if k == len(self.ids):
+                break
+            # widen the search only for the wells the nearest barometers do not cover
+            todo = todo[~found]
+            k = min(k * 4, len(self.ids))
+
+        found = choice >= 0
+        out.loc[located_wells.index[found]] = self.ids[choice[found]]
+        return out
+
+
+def barodistance(wellinfo, barometers=None):
+    """Determines Closest Barometer to Each Well using wellinfo DataFrame
+
+    Args:
+        wellinfo (pd.DataFrame): wells with UTMEasting, UTMNorthing and G_Elev_m
+        barometers (pd.DataFrame): barometers indexed by name with the same columns; defaults to pw03, pw10 and pw19
+
+    Returns:
+        wellinfo with the name of the closest barometer in 'closest_baro'
+    """
+    if barometers is None:
+        barometers = pd.DataFrame(
+            {
+                "UTMEasting": [240327.49, 271127.67, 305088.9],
+                "UTMNorthing": [4314993.95, 4356071.98, 4389630.71],
+                "G_Elev_m": [1623.079737, 1605.187759, 1412.673738],
+            },
+            index=pd.Index(["pw03", "pw10", "pw19"], name="barom"),
+        )
+    wellinfo["closest_baro"] = BaroIndex(barometers).query(wellinfo, start=None, end=None)
     return wellinfo
 
 
@@ -800,6 +1520,104 @@ def smoother(df, p, win=30, sd=3):
     return df
 
 
+class TrollHtmParser(HTMLParser):
+    """Streaming tokenizer for In-Situ Troll htm reports.
+
+    Collects the report sections (``sectionHeader``/``sectionMember`` rows) into `sections` and the
+    ``dataHeader``/``data`` rows into one list per column in `columns`, without building a document tree.
+
+    Args:
+        sections_only (bool): stop collecting once the data header is reached; defaults to False
+    """
+
+    def __init__(self, sections_only=False):
+        super().__init__(convert_charrefs=True)
+        self.sections_only = sections_only
+        self.done = False
+        self.sections = {}
+        self.colnames = []
+        self.columns = []
+        self._section = None
+        self._row_class = None
+        self._row = []
+        self._cell = None
+        self._cell_attrs = {}
+        self._row_attrs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._row_class = (dict(attrs).get("class") or "").split()
+            self._row = []
+            self._row_attrs = []
+        elif tag == "td" and self._row_class is not None:
+            self._cell = []
+            self._cell_attrs = dict(attrs)
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "td" and self._cell is not None:
+            self._row.append("".join(self._cell).strip())
+            self._row_attrs.append(self._cell_attrs)
+            self._cell = None
+        elif tag == "tr" and self._row_class is not None:
+            self._end_row()
+            self._row_class = None
+
+    def _end_row(self):
+        if "data" in self._row_class:
+            if self.sections_only:
+                return
+            for i, column in enumerate(self.columns):
+                column.append(self._row[i] if i < len(self._row) else None)
+        elif "dataHeader" in self._row_class:
+            self.colnames = list(self._row)
+            self.columns = [[] for _ in self.colnames]
+            if self.sections_only:
+                self.done = True
+        elif "sectionHeader" in self._row_class:
+            for text, attrs in zip(self._row, self._row_attrs):
+                if "isi-group" in attrs:
+                    self._section = text
+                    break
+        elif "sectionMember" in self._row_class and self._section:
+            for text, attrs in zip(self._row, self._row_attrs):
+                if "isi-property" in attrs:
+                    # Extract just the value after the '=' if present
+                    if "=" in text:
+                        text = text.split("=")[1].strip()
+                    self.sections[attrs["isi-property"]] = text
+                    break
+
+
+def parse_troll_htm(filepath, sections_only=False, chunksize=65536):
+    """Streams a Troll htm report through `TrollHtmParser`.
+
+    Args:
+        filepath (str):
+            path to data file
+        sections_only (bool):
+            stop reading once the data header is reached; defaults to False
+        chunksize (int):
+            number of characters fed to the tokenizer at a time; defaults to 65536
+
+    Return:
+        sections (dict) of report properties, DataFrame of the data table as strings
+    """
+    parser = TrollHtmParser(sections_only=sections_only)
+    with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+        while not parser.done:
+            chunk = f.read(chunksize)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+    df = pd.DataFrame(dict(zip(parser.colnames, parser.columns)), columns=parser.colnames)
+    return parser.sections, df
+
+
 def read_troll_htm(filepath):
     """given a path to the .htm (html) file, function will read in the data and produce pandas dataframe
     Args:
@@ -810,28 +1628,10 @@ def read_troll_htm(filepath):
         df:
             dataframe
     """
-    with open(filepath, "r") as f:
-        html_string = f.read()
-
-    # use BeautifulSoup to parse the HTML content of the page
-    soup = BeautifulSoup(html_string, "html.parser")
-    table_rows = soup.find_all('tr', {'class': 'data'})
-    header = soup.find_all('tr', {'class': 'dataHeader'})
-    heads = header[0].find_all('td')
-    colnames = [head.text.strip() for head in heads]
-    data = []
-    for row in table_rows:
-        cols = row.find_all("td")
-        cols = [col.text.strip() for col in cols]
-        data.append(cols)
-
-            # convert the list of data into a pandas dataframe
-    df = pd.DataFrame(data)
-    df.columns = colnames
+    sections, df = parse_troll_htm(filepath)
 
     for col in df.columns:
         if "Date" in col or "date" in col:
-            print(col)
             df[col] = pd.to_datetime(df[col])
             df = df.rename(columns={col: "DateTime"})  # Renaming the column to match name from xle files
             df = df.set_index("DateTime")
@@ -843,18 +1643,46 @@ def read_troll_htm(filepath):
                 df['Level'] = df[col] * 0.044603
             df = df.drop(columns=[col])
         elif 'Temp' in col:
-                df[col] = pd.to_numeric(df[col])
-                df = df.rename(columns={col: "Temperature"})
-                if 'F)' in col:
-                    df[col] = (df[col] - 32.0) * 5 / 9
-                    print(f"CH. 2 units in {chunit}, converting to deg C...")
+            df[col] = pd.to_numeric(df[col])
+            if 'F)' in col:
+                df[col] = (df[col] - 32.0) * 5 / 9
+                print(f"CH. 2 units in {col}, converting to deg C...")
+            df = df.rename(columns={col: "Temperature"})
         elif "Depth" in col or "Cond" in col or "Total" in col or "Salin" in col or "Dens" in col:
             df[col] = pd.to_numeric(df[col])
 
     return df
 
 
-def rollmeandiff(df1, p1, df2, p2, win):
+def _centered_rolling_mean(series, window, incremental=False):
+    """Centered rolling mean over a time window at the native interval of `series`.
+
+    Only times whose whole window lies within the record are returned. The window is (t - window/2, t + window/2],
+    like a centered time-based pandas rolling window.
+
+    Args:
+        series (pd.Series): values with a datetime index
+        window (pd.Timedelta): width of the window
+        incremental (bool): slide the window with running sums, where each step adds the readings entering the
+            window and removes the ones leaving it, instead of pandas rolling; defaults to False
+    """
+    series = series.dropna().sort_index()
+    if len(series) == 0:
+        return series
+    if incremental:
+        t = series.index.asi8
+        half = window.value // 2
+        sums = np.concatenate([[0.0], np.cumsum(series.to_numpy(dtype=np.float64))])
+        left = np.searchsorted(t, t - half, side="right")
+        right = np.searchsorted(t, t + half, side="right")
+        rm = pd.Series((sums[right] - sums[left]) / (right - left), index=series.index)
+    else:
+        rm = series.rolling(window, center=True).mean()
+    half = window / 2
+    return rm[(rm.index - half >= series.index[0]) & (rm.index + half <= series.index[-1])]
+
+
+def rollmeandiff(df1, p1, df2, p2, win, incremental=False):
     """Returns the rolling mean difference of two columns from two different dataframes
     Args:
         df1 (object):
@@ -867,24 +1695,29 @@ def rollmeandiff(df1, p1, df2, p2, win):
             column in df2
         win (int):
             window in days
+        incremental (bool):
+            compute the rolling means with running sums in one pass instead of pandas rolling; defaults to False
 
     Return:
         diff (float):
             difference
+
+    Rolling means are taken at the native interval of each record with a centered time window of `win` days;
+    the second record's means are interpolated onto the times of the first where they overlap.
     """
-    win = win * 60 * 24
-    df1 = df1.resample("1T").mean()
-    df1 = df1.interpolate(method="time")
-    df2 = df2.resample("1T").mean()
-    df2 = df2.interpolate(method="time")
-    df1["rm" + p1] = df1[p1].rolling(window=win, center=True).mean()
-    df2["rm" + p2] = df2[p2].rolling(window=win, center=True).mean()
-    df3 = pd.merge(df1, df2, left_index=True, right_index=True, how="outer")
-    df3 = df3[np.isfinite(df3["rm" + p1])]
-    df4 = df3[np.isfinite(df3["rm" + p2])]
-    df5 = df4["rm" + p1] - df4["rm" + p2]
-    diff = round(df5.mean(), 3)
-    del (df3, df4, df5)
+    window = pd.Timedelta(days=win)
+    rm1 = _centered_rolling_mean(df1[p1], window, incremental)
+    rm2 = _centered_rolling_mean(df2[p2], window, incremental)
+    if len(rm1) == 0 or len(rm2) == 0:
+        return np.nan
+
+    # align the second record's means to the times of the first; identical timestamps pass through unchanged
+    t1, t2 = rm1.index.asi8, rm2.index.asi8
+    overlap = (t1 >= t2[0]) & (t1 <= t2[-1])
+    if not overlap.any():
+        return np.nan
+    rm2_on_1 = np.interp(t1[overlap], t2, rm2.to_numpy(dtype=np.float64))
+    diff = round(float(np.mean(rm1.to_numpy(dtype=np.float64)[overlap] - rm2_on_1)), 3)
     return diff
 
 
@@ -1159,12 +1992,34 @@ def detect_mean_offset(data, window_size, threshold, plot=True):
 def correct_be(
     site_number, well_table, welldata, be=None, meas="corrwl", baro="barometer"
 ):
-    if be:
+    """Applies barometric efficiency to barometrically compensated water levels.
+
+    Args:
+        site_number: wellid of the well
+        well_table (pd.DataFrame): well table with 'wellid' and 'BaroEfficiency'; used when `be` is not given
+        welldata (pd.DataFrame): output of `well_baro_merge`
+        be (float or str): barometric efficiency; 'estimate' fits it from the dwl and dbp columns of welldata
+            with `estimate_be`, falling back to the well table when there are too few regular readings to fit;
+            defaults to the BaroEfficiency of the well table
+        meas (str): column of compensated water levels; defaults to 'corrwl'
+        baro (str): column of barometric pressure; defaults to 'barometer'
+
+    Returns:
+        welldata with 'baroefficiencylevel' and the barometric efficiency used
+    """
+    if isinstance(be, str) and be == "estimate":
+        be = estimate_be(welldata).loc[0, "BaroEfficiency"]
+        if pd.isna(be):
+            stdata = well_table[well_table["wellid"] == site_number] if well_table is not None else []
+            be = stdata["BaroEfficiency"].values[0] if len(stdata) > 0 else None
+            print("Too few regular readings to estimate the barometric efficiency of {:}; using {:}".format(
+                site_number, "0" if be is None or pd.isna(be) else "the well table value"))
+    elif be:
         be = float(be)
     else:
         stdata = well_table[well_table["wellid"] == site_number]
         be = stdata["BaroEfficiency"].values[0]
-    if be is None:
+    if be is None or pd.isna(be):
         be = 0
     else:
         be = float(be)
@@ -1172,14 +2027,154 @@ def correct_be(
     if be == 0:
         welldata["baroefficiencylevel"] = welldata[meas]
     else:
-        welldata["baroefficiencylevel"] = welldata[[meas, baro]].apply(
-            lambda x: x[0] + be * x[1], 1
-        )
+        welldata["baroefficiencylevel"] = welldata[meas] + be * welldata[baro]
 
     return welldata, be
 
 
-def hourly_resample(df, bse=0, minutes=60):
+def _fit_be(t, dwl, dbp, lags=0):
+    """Least-squares barometric efficiency of one well; used by `estimate_be`
+
+    Regresses the change in compensated level (dwl - dbp) on the barometric change and `lags` previous changes,
+    plus a constant for steady trends. Only changes over the usual time step are used, so differences across gaps
+    are left out. BE is the negative of the summed barometric coefficients.
+    """
+    fit = {"BaroEfficiency": np.nan, "stderr": np.nan, "r2": np.nan, "rmse": np.nan, "n": 0, "lags": lags}
+    n = len(t)
+    if n < 2:
+        return fit
+    # row i holds the changes from reading i-1 to reading i
+    step = np.diff(t)
+    ok = np.zeros(n, dtype=bool)
+    ok[1:] = step == np.median(step)
+    ok &= ~np.isnan(dwl) & ~np.isnan(dbp)
+
+    # lagged terms need every change in the window to be a regular step
+    window = ok.copy()
+    cols = [np.ones(n), dbp]
+    for k in range(1, lags + 1):
+        lagged = np.full(n, np.nan)
+        lagged[k:] = dbp[: n - k]
+        cols.append(lagged)
+        window[:k] = False
+        window[k:] &= ok[: n - k]
+    x = np.column_stack(cols)[window]
+    y = (dwl - dbp)[window]
+    fit["n"] = len(y)
+    if len(y) <= x.shape[1]:
+        return fit
+    coef, _, rank, _ = np.linalg.lstsq(x, y, rcond=None)
+    resid = y - x @ coef
+    dof = len(y) - x.shape[1]
+    sigma2 = resid @ resid / dof
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    fit["BaroEfficiency"] = -coef[1:].sum()
+    fit["rmse"] = np.sqrt(resid @ resid / len(y))
+    fit["r2"] = 1 - (resid @ resid) / ss_tot if ss_tot > 0 else np.nan
+    if rank == x.shape[1]:
+        cov = sigma2 * np.linalg.inv(x.T @ x)
+        fit["stderr"] = np.sqrt(cov[1:, 1:].sum())
+    return fit
+
+
+def estimate_be(wellbaro, lags=0, wl="dwl", bp="dbp"):
+    """Estimates barometric efficiency (BE) from aligned water level and barometric changes.
+
+    Each well is fit with one least-squares solve of the change in compensated level against the barometric
+    change (and, with `lags`, the previous barometric changes), so the response is measured as the total of the
+    lagged coefficients.
+
+    Args:
+        wellbaro (pd.DataFrame): output of `well_baro_merge` for one well, or a table indexed by
+            ['locationid', 'DateTime'] like 'bulk-well-baro' to estimate every well
+        lags (int): number of previous barometric changes in the fit; defaults to 0
+        wl (str): column of water level changes; defaults to 'dwl'
+        bp (str): column of barometric changes; defaults to 'dbp'
+
+    Returns:
+        pd.DataFrame indexed by locationid (0 for a single well) with BaroEfficiency, stderr, r2, rmse, n and lags
+    """
+    if isinstance(wellbaro.index, pd.MultiIndex):
+        groups = wellbaro.groupby(level=0, sort=False)
+    else:
+        groups = [(0, wellbaro)]
+
+    fits = {}
+    for key, df in groups:
+        times = df.index.get_level_values(-1)
+        order = np.argsort(times.asi8, kind="stable")
+        fits[key] = _fit_be(
+            times.asi8[order],
+            df[wl].to_numpy(dtype=np.float64, na_value=np.nan)[order],
+            df[bp].to_numpy(dtype=np.float64, na_value=np.nan)[order],
+            lags=lags,
+        )
+    table = pd.DataFrame.from_dict(fits, orient="index",
+                                   columns=["BaroEfficiency", "stderr", "r2", "rmse", "n", "lags"])
+    table.index.name = "locationid"
+    return table
+
+
+def correct_be_bulk(wellbaro, be, meas="corrwl", baro="barometer"):
+    """Applies barometric efficiency to every well of an aligned network table.
+
+    Args:
+        wellbaro (pd.DataFrame): table indexed by ['locationid', 'DateTime'] like 'bulk-well-baro'
+        be (pd.Series or float): barometric efficiency by locationid, e.g. the BaroEfficiency column of
+            `estimate_be`; wells without a value are left uncorrected
+        meas (str): column of compensated water levels; defaults to 'corrwl'
+        baro (str): column of barometric pressure; defaults to 'barometer'
+
+    Returns:
+        wellbaro with 'baroefficiencylevel'
+    """
+    if isinstance(be, pd.Series):
+        be = be.reindex(wellbaro.index.get_level_values(0)).fillna(0).to_numpy()
+    wellbaro["baroefficiencylevel"] = wellbaro[meas].to_numpy() + be * wellbaro[baro].to_numpy()
+    return wellbaro
+
+
+def _grid_interp(minutes, values, grid, last_minute, limit=90):
+    """Interpolates one channel straight onto `grid`, reproducing a 1-minute upsample and time interpolation
+
+    Args:
+        minutes (np.ndarray): int64 ns source times floored to the minute, sorted
+        values (np.ndarray): float64 channel values at `minutes`
+        grid (np.ndarray): int64 ns target times
+        last_minute (int): last minute of the upsampled series in ns; grid times past it have no value
+        limit (int): largest number of minutes filled after a valid minute
+
+    Returns:
+        float64 array of values at `grid`
+    """
+    valid = ~np.isnan(values)
+    minutes, values = minutes[valid], values[valid]
+    out = np.full(len(grid), np.nan)
+    if len(minutes) == 0:
+        return out
+
+    # mean of samples that fall within the same minute
+    uniq, start, counts = np.unique(minutes, return_index=True, return_counts=True)
+    means = np.add.reduceat(values, start) / counts
+
+    prev = np.searchsorted(uniq, grid, side="right") - 1
+    has_prev = prev >= 0
+    prev = np.clip(prev, 0, len(uniq) - 1)
+    nxt = np.clip(prev + 1, 0, len(uniq) - 1)
+    t0, v0 = uniq[prev], means[prev]
+    t1, v1 = uniq[nxt], means[nxt]
+
+    lag = grid - t0
+    within = has_prev & (lag <= limit * 60_000_000_000) & (grid <= last_minute)
+    interior = nxt > prev
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(interior, lag / np.where(interior, t1 - t0, 1), 0.0)
+    # past the last valid minute the value is carried forward, as pandas does for trailing gaps
+    out[within] = (v0 + (v1 - v0) * frac)[within]
+    return out
+
+
+def hourly_resample(df, bse=0, minutes=60, limit=90):
     """
     resamples data to hourly on the hour
     Args:
@@ -1189,30 +2184,146 @@ def hourly_resample(df, bse=0, minutes=60):
             base time to set in minutes; optional; default is zero (on the hour);
         minutes (int):
             sampling recurrence interval in minutes; optional; default is 60 (hourly samples)
+        limit (int):
+            largest gap after a reading, in minutes, that is filled by interpolation; optional; default is 90
     Returns:
         A Pandas DataFrame that has been resampled to every hour, at the minute defined by the base (bse)
     Description:
-        see http://pandas.pydata.org/pandas-docs/dev/generated/pandas.DataFrame.resample.html for more info
-        This function uses pandas powerful time-series manipulation to upsample to every minute, then downsample to
-        every hour, on the hour.
-        This function will need adjustment if you do not want it to return hourly samples, or iusgsGisf you are
-        sampling more frequently than once per minute.
+        Values are interpolated straight from the source timestamps onto the target grid. The result matches
+        upsampling to every minute (readings within a minute averaged), interpolating in time across up to `limit`
+        missing minutes and taking the values on a right-closed, right-labelled grid, without building the
+        per-minute series.
         see http://pandas.pydata.org/pandas-docs/stable/timeseries.html#offset-aliases
     """
-
-    df = (
-        df.resample("1min").mean(numeric_only=True).interpolate(method="time", limit=90)
-    )
-
     if minutes == 60:
         sampfrq = "1h"
     else:
         sampfrq = str(minutes) + "min"
 
-    df = df.resample(
-        sampfrq, closed="right", label="right", offset=f"{bse:0.0f}min"
-    ).asfreq()
-    return df
+    df = df[df.index.notnull()]
+    num = df.select_dtypes(include=["number", "bool"])
+    if len(num) == 0:
+        return num.resample(sampfrq, closed="right", label="right", offset=f"{bse:0.0f}min").asfreq()
+
+    order = np.argsort(num.index.asi8, kind="stable")
+    src_minutes = num.index.floor("min").asi8[order]
+
+    # grid depends only on the ends of the per-minute series, so resample the two end points to get it
+    ends = num.index[order[[0, -1]]].floor("min")
+    grid = (
+        pd.Series(0, index=ends)
+        .resample(sampfrq, closed="right", label="right", offset=f"{bse:0.0f}min")
+        .asfreq()
+        .index
+    )
+
+    out = {}
+    for col in num.columns:
+        values = num[col].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+        res = _grid_interp(src_minutes, values, grid.asi8, src_minutes[-1], limit=limit)
+        out[col] = res.astype(np.float32) if num[col].dtype == np.float32 else res
+
+    return pd.DataFrame(out, index=grid, columns=num.columns)
+
+
+def baro_compensate(level, barometer):
+    """Removes barometric pressure changes from a nonvented water level record.
+
+    The change in barometric pressure between consecutive readings is subtracted from the change in water level,
+    and the result is accumulated from the first water level, which is kept as is.
+
+    Args:
+        level (array-like):
+            water level readings without gaps or NaN
+        barometer (array-like):
+            barometric readings at the same times as `level`
+
+    Returns:
+        np.ndarray of compensated water levels; raises IndexError if `level` is empty
+    """
+    level = np.asarray(level, dtype=np.float64)
+    barometer = np.asarray(barometer, dtype=np.float64)
+    first_well = level[0]
+    out = np.empty_like(level)
+    out[0] = first_well
+    np.cumsum(np.diff(level) - np.diff(barometer), out=out[1:])
+    out[1:] += first_well
+    return out
+
+
+def _compensate_frame(well, baro, wellcolumn="Level", outcolumn="corrwl", vented=False):
+    """Joins resampled well and baro data and adds the compensated level column; used by `well_baro_merge`"""
+    if vented:
+        wellbaro = well
+        wellbaro[outcolumn] = wellbaro[wellcolumn]
+        return wellbaro
+
+    # combine baro and well data for easy calculations, graphing, and manipulation
+    wellbaro = pd.merge(well, baro, left_index=True, right_index=True, how="left")
+    wellbaro = wellbaro.dropna(subset=["barometer", wellcolumn], how="any")
+    wellbaro["dbp"] = wellbaro["barometer"].diff()
+    wellbaro["dwl"] = wellbaro[wellcolumn].diff()
+    # keep float32 channels of compact frames in float32
+    dtype = np.result_type(wellbaro[wellcolumn].dtype, wellbaro["barometer"].dtype)
+    wellbaro[outcolumn] = baro_compensate(wellbaro[wellcolumn], wellbaro["barometer"]).astype(dtype, copy=False)
+    return wellbaro
+
+
+def _prep_baro(barofile, barocolumn="Level", sampint=60, bse=0, resample=True):
+    """Resamples barometric data and labels the pressure column 'barometer'; used by `well_baro_merge`"""
+    if resample:
+        baro = hourly_resample(barofile, bse=bse, minutes=sampint)
+    else:
+        baro = barofile
+
+    # reassign `Level` to reduce ambiguity
+    baro = baro.rename(columns={barocolumn: "barometer"})
+
+    if "temp" in baro.columns:
+        baro = baro.drop("temp", axis=1)
+    elif "Temperature" in baro.columns:
+        baro = baro.drop("Temperature", axis=1)
+    elif "temperature" in baro.columns:
+        baro = baro.drop("temperature", axis=1)
+    return baro
+
+
+class BaroStore(object):
+    """Memoized store of resampled barometric records for aligning many wells.
+
+    Each barometer is resampled once per sampling interval and offset, the first time a well asks for it, and
+    the result is reused for every other well assigned to it. Pass the returned frame to `well_baro_merge` with
+    `baro_resampled=True`.
+
+    Args:
+        barometers (dict or pd.DataFrame): raw barometric data keyed by locationid, or a DataFrame indexed by
+            ['locationid', 'DateTime'] like the bulk import table
+        barocolumn (str): column holding the barometric pressure; defaults to 'Level'
+
+    Examples:
+        >>> baros = BaroStore(bulk)
+        >>> wellbaro = well_baro_merge(bulk.loc[1001], baros.get(9003), baro_resampled=True)
+    """
+
+    def __init__(self, barometers, barocolumn="Level"):
+        self.barometers = barometers
+        self.barocolumn = barocolumn
+        self.resampled = {}
+
+    def get(self, baroid, sampint=60, bse=0):
+        """Returns barometer `baroid` resampled to `sampint` minutes at offset `bse`, resampling it only once"""
+        key = (baroid, sampint, bse)
+        if key not in self.resampled:
+            if isinstance(self.barometers, pd.DataFrame):
+                barofile = self.barometers.loc[baroid]
+            else:
+                barofile = self.barometers[baroid]
+            self.resampled[key] = _prep_baro(barofile, self.barocolumn, sampint, bse)
+        return self.resampled[key]
+
+    def clear(self):
+        """Drops every resampled barometer"""
+        self.resampled.clear()
 
 
 def well_baro_merge(
@@ -1223,6 +2334,8 @@ def well_baro_merge(
     outcolumn="corrwl",
     vented=False,
     sampint=60,
+    baro_resampled=False,
+    bse=0,
 ):
     """Remove barometric pressure from nonvented transducers.
     Args:
@@ -1232,6 +2345,11 @@ def well_baro_merge(
             Pandas DataFrame barometric data labeled 'Level'; index must be datetime
         sampint (int):
             sampling interval in minutes; default 60
+        baro_resampled (bool):
+            True if barofile is already resampled to `sampint`, e.g. from `BaroStore`; default False
+        bse (int):
+            offset in minutes of the resampled times, for the well and the barometer alike; a barometer from
+            `BaroStore` must be taken at the same offset; default 0
 
     Returns:
         wellbaro (Pandas DataFrame):
@@ -1239,66 +2357,370 @@ def well_baro_merge(
     """
 
     # resample data to make sample interval consistent
-    baro = hourly_resample(barofile, bse=0, minutes=sampint)
-    well = hourly_resample(wellfile, bse=0, minutes=sampint)
-
-    # reassign `Level` to reduce ambiguity
-    baro = baro.rename(columns={barocolumn: "barometer"})
+    baro = _prep_baro(barofile, barocolumn, sampint, bse, resample=not baro_resampled)
+    well = hourly_resample(wellfile, bse=bse, minutes=sampint)
 
-    if "temp" in baro.columns:
-        baro = baro.drop("temp", axis=1)
-    elif "Temperature" in baro.columns:
-        baro = baro.drop("Temperature", axis=1)
-    elif "temperature" in baro.columns:
-        baro = baro.drop("temperature", axis=1)
+    return _compensate_frame(well, baro, wellcolumn, outcolumn, vented)
 
-    if vented:
-        wellbaro = well
-        wellbaro[outcolumn] = wellbaro[wellcolumn]
-    else:
-        # combine baro and well data for easy calculations, graphing, and manipulation
-        wellbaro = pd.merge(well, baro, left_index=True, right_index=True, how="left")
-        wellbaro = wellbaro.dropna(subset=["barometer", wellcolumn], how="any")
-        wellbaro["dbp"] = wellbaro["barometer"].diff()
-        wellbaro["dwl"] = wellbaro[wellcolumn].diff()
-        # print(wellbaro)
-        first_well = wellbaro.loc[wellbaro.index[0], wellcolumn]
-        wellbaro[outcolumn] = (
-            wellbaro[["dbp", "dwl"]].apply(lambda x: x[1] - x[0], 1).cumsum()
-            + first_well
-        )
-        wellbaro.loc[wellbaro.index[0], outcolumn] = first_well
-    return wellbaro
 
+def well_baro_merge_batch(
+    wells,
+    barofile,
+    barocolumn="Level",
+    wellcolumn="Level",
+    outcolumn="corrwl",
+    vented=False,
+    sampint=60,
+    baro_resampled=False,
+    bse=0,
+):
+    """Remove barometric pressure from many nonvented transducers that share one barometer.
 
-def fcl(df, dtobj):
-    """
-    Finds closest date index in a dataframe to a date object
+    The barometer is resampled once and every well is compensated against it, as `well_baro_merge` does for one.
 
     Args:
-        df (pd.DataFrame):
-            DataFrame
-        dtobj (datetime.datetime):
-            date object
+        wells (dict or pd.DataFrame):
+            dictionary of water level DataFrames keyed by locationid, or a DataFrame indexed by
+            ['locationid', 'DateTime'] like the bulk import table
+        barofile (pd.DataFrame):
+            Pandas DataFrame barometric data labeled 'Level'; index must be datetime
+        vented (bool or dict):
+            True for vented transducers; a dictionary keyed by locationid sets it per well; default False
+        sampint (int):
+            sampling interval in minutes; default 60
+        baro_resampled (bool):
+            True if barofile is already resampled to `sampint`, e.g. from `BaroStore`; default False
+        bse (int):
+            offset in minutes of the resampled times, for the well and the barometer alike; a barometer from
+            `BaroStore` must be taken at the same offset; default 0
 
-    taken from: http://stackoverflow.com/questions/15115547/find-closest-row-of-dataframe-to-given-time-in-pandas
+    Returns:
+        Pandas DataFrame indexed by ['locationid', 'DateTime'] of the corrected water levels; wells without
+        barometric data at their times are left out
     """
-    return df.iloc[
-        np.argmin(np.abs(pd.to_datetime(df.index) - dtobj))
-    ]  # remove to_pydatetime()
+    if isinstance(wells, pd.DataFrame):
+        wells = {key: df.droplevel(0) for key, df in wells.groupby(level=0, sort=False)}
 
+    baro = _prep_baro(barofile, barocolumn, sampint, bse, resample=not baro_resampled)
 
-def compilefiles(searchdir, copydir, filecontains, filetype=".xle"):
-    """
-    Copies files matching specified criteria from a source directory to a target directory.
+    merged = {}
+    for key, wellfile in wells.items():
+        well = hourly_resample(wellfile, bse=bse, minutes=sampint)
+        vent = vented.get(key, False) if isinstance(vented, dict) else vented
+        try:
+            wellbaro = _compensate_frame(well, baro, wellcolumn, outcolumn, vent)
+        except IndexError:
+            print(f"No barometric match for well {key}")
+            continue
+        wellbaro.index.name = "DateTime"
+        merged[key] = wellbaro
 
-    Parameters:
-    - searchdir (str or Path): The root directory to search for files.
-    - copydir (str or Path): The directory where matching files will be copied.
-    - filecontains (list): A list of substrings to match in file names.
-    - filetype (str, optional): A string of file extension to filter files (default: "xle").
+    if not merged:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=["locationid", "DateTime"]))
+    return pd.concat(merged, names=["locationid", "DateTime"])
 
-    Behavior:
+
+def bulk_baro_assignments(info, files, wellids):
+    """Matches wells to their barometers the way the bulk alignment tab does.
+
+    Args:
+        info (pd.DataFrame): well information table indexed by locationid with 'barologgertype'
+        files (pd.DataFrame): file information table with 'locationid' and 'trans type'
+        wellids (iterable): locationids of the imported wells
+
+    Returns:
+        dictionary of barometer locationid keyed by well locationid, and dictionary of vented flags keyed by well
+        locationid (True for Global Water transducers)
+    """
+    baro_map = {}
+    vented = {}
+    file_ids = files["locationid"].unique()
+    for wellid in wellids:
+        if wellid is None or pd.isna(wellid) or int(wellid) not in info.index:
+            continue
+        wellid = int(wellid)
+        if 9000 <= wellid < 10000:
+            continue
+        baroid = info.loc[wellid, "barologgertype"]
+        if baroid == "None" or baroid == "":
+            continue
+        baroid = pd.to_numeric(baroid, downcast="integer", errors="coerce")
+        if baroid not in file_ids:
+            continue
+        ttype = files[files["locationid"] == wellid]["trans type"].values
+        baro_map[wellid] = int(baroid)
+        vented[wellid] = len(ttype) > 0 and ttype[0] == "Global Water"
+    return baro_map, vented
+
+
+def _publish_baro(baro):
+    """Copies a resampled barometer into shared memory blocks; returns their description and the blocks"""
+    meta = {"index_name": baro.index.name, "arrays": []}
+    blocks = []
+    arrays = [("__index__", baro.index.asi8)] + [(col, baro[col].to_numpy()) for col in baro.columns]
+    for name, arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        meta["arrays"].append((name, shm.name, arr.dtype.str, len(arr)))
+    return meta, blocks
+
+
+# shared memory blocks attached in a worker process, by block name
+_attached_baros = {}
+
+
+def _attach_baro(meta):
+    """Rebuilds a barometer published by `_publish_baro` on top of its shared memory blocks"""
+    arrays = {}
+    for name, shm_name, dtype, n in meta["arrays"]:
+        if shm_name not in _attached_baros:
+            _attached_baros[shm_name] = shared_memory.SharedMemory(name=shm_name)
+        arrays[name] = np.ndarray((n,), dtype=dtype, buffer=_attached_baros[shm_name].buf)
+    index = pd.DatetimeIndex(arrays.pop("__index__").view("M8[ns]"), name=meta["index_name"])
+    return pd.DataFrame(arrays, index=index, copy=False)
+
+
+def _close_attached_baros():
+    """Closes the shared memory blocks attached by `_attach_baro` in this process"""
+    gc.collect()  # frames built on the blocks must be gone before they can be closed
+    while _attached_baros:
+        _attached_baros.popitem()[1].close()
+
+
+def _init_baro_worker():
+    """Process pool initializer closing the attached barometers when the worker exits.
+
+    Finalizers with an exit priority run when a pool worker shuts down, whether it was forked or spawned; atexit
+    hooks are skipped by forked workers.
+    """
+    Finalize(None, _close_attached_baros, exitpriority=10)
+
+
+def _align_well(wellid, well, baro, vented=False, sampint=60):
+    """Compensates one well for `well_baro_merge_bulk`; `baro` is a resampled frame or a shared memory description"""
+    start = time.perf_counter()
+    try:
+        if isinstance(baro, dict):
+            baro = _attach_baro(baro)
+        dat = well_baro_merge(well, baro, vented=vented, sampint=sampint, baro_resampled=True)
+        dat.index.name = "DateTime"
+        error = None
+    except IndexError:
+        dat, error = None, "no barometric data at the times of the well"
+    except Exception as e:
+        dat, error = None, repr(e)
+    return wellid, dat, time.perf_counter() - start, error
+
+
+def well_baro_merge_bulk(bulk, baro_map, vented=None, sampint=60, workers=None):
+    """Aligns and barometrically compensates every well of a bulk import without the GUI.
+
+    Each barometer is resampled once. With `workers`, wells are compensated in a process pool and the resampled
+    barometers are published once through shared memory instead of being sent with every well.
+
+    Args:
+        bulk (pd.DataFrame):
+            imported transducer data indexed by ['locationid', 'DateTime'], including the barometers
+        baro_map (dict):
+            barometer locationid keyed by well locationid; see `bulk_baro_assignments`
+        vented (dict):
+            True for vented transducers keyed by well locationid; defaults to None (all nonvented)
+        sampint (int):
+            sampling interval in minutes; default 60
+        workers (int):
+            number of worker processes; defaults to None (align serially in this process)
+
+    Returns:
+        Pandas DataFrame indexed by ['locationid', 'DateTime'] with Level, Temperature, barometer, dbp, dwl and
+        corrwl, as built by the bulk alignment tab, and a DataFrame report of locationid, baroid, rows, seconds
+        and error for every well
+    """
+    vented = vented or {}
+    baros = BaroStore(bulk)
+    wellids = [wellid for wellid in baro_map if wellid in bulk.index.get_level_values(0)]
+    results = []
+    blocks = []
+
+    if workers is not None and workers > 1:
+        try:
+            shared = {}
+            for baroid in set(baro_map[wellid] for wellid in wellids):
+                shared[baroid], published = _publish_baro(baros.get(baroid, sampint))
+                blocks.extend(published)
+            baros.clear()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_baro_worker) as pool:
+                futures = [
+                    pool.submit(_align_well, wellid, bulk.loc[wellid], shared[baro_map[wellid]],
+                                vented.get(wellid, False), sampint)
+                    for wellid in wellids
+                ]
+                for future in as_completed(futures):
+                    results.append(future.result())
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+        order = {wellid: i for i, wellid in enumerate(wellids)}
+        results.sort(key=lambda res: order[res[0]])
+    else:
+        for wellid in wellids:
+            results.append(_align_well(wellid, bulk.loc[wellid], baros.get(baro_map[wellid], sampint),
+                                       vented.get(wellid, False), sampint))
+
+    mergedf = {}
+    report = []
+    for wellid, dat, seconds, error in results:
+        rows = 0 if dat is None else len(dat)
+        report.append({"locationid": wellid, "baroid": baro_map[wellid], "rows": rows, "seconds": seconds,
+                       "error": error})
+        if dat is not None and len(dat) > 1:
+            mergedf[wellid] = dat
+    report = pd.DataFrame(report, columns=["locationid", "baroid", "rows", "seconds", "error"])
+
+    columns = ["Level", "Temperature", "barometer", "dbp", "dwl", "corrwl"]
+    if not mergedf:
+        index = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=["locationid", "DateTime"])
+        return pd.DataFrame(columns=columns, index=index), report
+    df = pd.concat(mergedf, names=["locationid"])
+    df = df.reset_index()
+    df["DateTime"] = pd.to_datetime(df["DateTime"], errors="coerce")
+    df = df.set_index(["locationid", "DateTime"])
+    df = df.reindex(columns=columns)
+    return df, report
+
+
+class NearestTime(object):
+    """Nearest-time lookups against a datetime index by binary search.
+
+    The index is converted, cleared of missing times and sorted once, so each query costs O(log n)
+    instead of a scan of the whole index. Positions returned refer to the index as it was given.
+
+    Args:
+        index (pd.Index): times to search; need not be sorted
+
+    Examples:
+
+        >>> near = NearestTime(pd.date_range('2020-01-01', periods=4, freq='h'))
+        >>> near.get_loc(pd.Timestamp('2020-01-01 01:20'))
+        1
+        >>> near.get_loc(['2020-01-01 01:40', '2020-01-01 05:00'], tolerance='30min')
+        array([ 2, -1])
+        >>> near.asof('2020-01-01 01:40')
+        1
+    """
+
+    def __init__(self, index):
+        index = pd.DatetimeIndex(pd.to_datetime(index))
+        positions = np.flatnonzero(index.notna())
+        times = index.asi8[positions]
+        if len(times) > 1 and (np.diff(times) < 0).any():
+            order = np.argsort(times, kind="stable")
+            times, positions = times[order], positions[order]
+        self.index = index
+        self._times = times
+        self._positions = positions
+
+    def __len__(self):
+        return len(self._times)
+
+    def get_loc(self, when, direction="nearest", tolerance=None):
+        """Positions of the times closest to `when`
+
+        Args:
+            when (datetime-like or list-like): time or times to look up
+            direction (str): 'nearest' for the closest time, the earlier one on ties; 'backward' for the
+                last time at or before `when`, like `asof`; 'forward' for the first time at or after `when`
+            tolerance (str or pd.Timedelta): largest allowed distance to a match; defaults to None (no limit)
+
+        Returns:
+            position (int) for a scalar `when`, otherwise a numpy array of positions; -1 where there is no match
+        """
+        scalar = np.ndim(when) == 0
+        when = pd.DatetimeIndex(pd.to_datetime([when] if scalar else when))
+        query = when.asi8
+        times = self._times
+        n = len(times)
+        found = np.full(len(query), -1, dtype=np.int64)
+        if n == 0:
+            return int(found[0]) if scalar else found
+
+        left = np.searchsorted(times, query, side="left")
+        if direction == "backward":
+            right = np.searchsorted(times, query, side="right")
+            pick = right - 1
+            ok = pick >= 0
+        elif direction == "forward":
+            pick = left
+            ok = pick < n
+        elif direction == "nearest":
+            before = np.clip(left - 1, 0, n - 1)
+            after = np.clip(left, 0, n - 1)
+            use_before = (left >= n) | ((left > 0) & (query - times[before] <= times[after] - query))
+            pick = np.where(use_before, before, after)
+            # first of any duplicated times, as np.argmin would return
+            pick = np.searchsorted(times, times[pick], side="left")
+            ok = np.ones(len(query), dtype=bool)
+        else:
+            raise ValueError(f"direction must be 'nearest', 'backward' or 'forward', not {direction!r}")
+
+        pick = np.clip(pick, 0, n - 1)
+        ok &= ~when.isna()
+        if tolerance is not None:
+            ok &= np.abs(times[pick] - query) <= pd.Timedelta(tolerance).value
+        found[ok] = self._positions[pick[ok]]
+        return int(found[0]) if scalar else found
+
+    def asof(self, when, tolerance=None):
+        """Positions of the last times at or before `when`; see `get_loc`"""
+        return self.get_loc(when, direction="backward", tolerance=tolerance)
+
+    def take(self, obj, when, direction="nearest", tolerance=None):
+        """Rows of `obj` at the times closest to `when`
+
+        Args:
+            obj (pd.Series or pd.DataFrame): data indexed like the index this was built from
+            when (datetime-like or list-like): time or times to look up
+            direction (str): see `get_loc`
+            tolerance (str or pd.Timedelta): see `get_loc`
+
+        Returns:
+            the row (or value) for a scalar `when`, None when it has no match; rows for list-like `when`,
+            dropping those without a match
+        """
+        loc = self.get_loc(when, direction=direction, tolerance=tolerance)
+        if np.ndim(loc) == 0:
+            return None if loc < 0 else obj.iloc[loc]
+        return obj.iloc[loc[loc >= 0]]
+
+
+def fcl(df, dtobj):
+    """
+    Finds closest date index in a dataframe to a date object
+
+    Args:
+        df (pd.DataFrame):
+            DataFrame
+        dtobj (datetime.datetime):
+            date object
+
+    For repeated lookups in the same frame, build a `NearestTime` once instead.
+    """
+    return NearestTime(df.index).take(df, dtobj)
+
+
+def compilefiles(searchdir, copydir, filecontains, filetype=".xle"):
+    """
+    Copies files matching specified criteria from a source directory to a target directory.
+
+    Parameters:
+    - searchdir (str or Path): The root directory to search for files.
+    - copydir (str or Path): The directory where matching files will be copied.
+    - filecontains (list): A list of substrings to match in file names.
+    - filetype (str, optional): A string of file extension to filter files (default: "xle").
+
+    Behavior:
     - Recursively searches for files in the `searchdir` that contain any of the substrings in `filecontains`.
     - Filters files by the specified extensions in `filetypes`.
     - Prepends the file's last modified date (in YYYY-MM-DD format) to its name before copying.
@@ -1344,52 +2766,218 @@ def compilefiles(searchdir, copydir, filecontains, filetype=".xle"):
     return
 
 
-def compilation(inputfile, trm=True, wildcard="*"):
+def _compile_file(infile, trm=True, cache=None, compact=None):
+    """Parses one transducer file for `compilation`; runs in worker processes when `workers` is set.
+
+    Workers may be spawned without this process's NewTransImp defaults, so `cache` and `compact` are passed to them.
+    """
+    return NewTransImp(infile, trim_end=trm, cache=cache, compact=compact).well
+
+
+TRANS_EXTENSIONS = [".csv", ".lev", ".xle", ".htm", ".html"]
+
+
+def _trans_filelist(inputfile, wildcard="*"):
+    """Lists the transducer files in directory `inputfile` that match `wildcard`"""
+    if not isinstance(inputfile, Path):
+        inputfile = Path(inputfile)
+
+    return [
+        infile
+        for infile in inputfile.glob(wildcard)
+        if os.path.splitext(infile)[1] in TRANS_EXTENSIONS
+    ]
+
+
+def _matches_filelist(infile, inputfile, wildcard="*"):
+    """True if `infile` would be listed by `_trans_filelist(inputfile, wildcard)` were it to exist"""
+    folder = Path(inputfile).expanduser().resolve()
+    infile = Path(infile)
+    if folder not in infile.parents or os.path.splitext(infile)[1] not in TRANS_EXTENSIONS:
+        return False
+    relative = infile.relative_to(folder)
+    pattern = Path(wildcard)
+    # PurePath.match anchors at the right only, so the depth has to match unless the pattern recurses
+    if "**" not in pattern.parts and len(pattern.parts) != len(relative.parts):
+        return False
+    return relative.match(wildcard)
+
+
+def _parse_files(filelist, trm=True, workers=None, return_errors=False):
+    """Parses `filelist` serially or in `workers` processes; returns a dictionary of DataFrames keyed by file
+    path in list order and a list of the files that failed to parse with their errors.
+
+    Both paths handle failures the same way: with `return_errors` a failing file is recorded and left out, and
+    otherwise its error is raised.
+    """
+    f = {}
+    errors = []
+
+    if workers is not None and workers > 1:
+        # results come back in completion order; slot them by position so the merge follows glob order
+        frames = [None] * len(filelist)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_compile_file, infile, trm, NewTransImp.cache, NewTransImp.compact): i
+                for i, infile in enumerate(filelist)
+            }
+            for future in as_completed(futures):
+                i = futures.pop(future)
+                try:
+                    frames[i] = future.result()
+                except Exception as e:
+                    if not return_errors:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    errors.append({"file": str(filelist[i]), "error": repr(e)})
+        for i, infile in enumerate(filelist):
+            if frames[i] is not None:
+                f[str(infile)] = frames[i]
+            frames[i] = None
+    else:
+        # iterate through list of relevant files
+        for infile in filelist:
+            try:
+                nti = _compile_file(infile, trm)
+            except Exception as e:
+                if not return_errors:
+                    raise
+                errors.append({"file": str(infile), "error": repr(e)})
+                continue
+            # keyed by full path so files with the same name in different folders are all kept
+            f[str(infile)] = nti
+
+    return f, errors
+
+
+def _merge_compiled(f):
+    """Concatenates the DataFrames in dictionary `f` on a DateTime index, keeping the first of duplicate times"""
+    # concatenate all of the DataFrames in dictionary f to one DataFrame: g
+    g = pd.concat(f)
+    f.clear()
+    # remove multiindex and replace with index=Datetime
+    g.index = pd.to_datetime(g.index.droplevel(0), errors="coerce") ### change to address deprecation!
+    g.index.name = "DateTime"
+    # remove duplicates based on index then sort by index
+    g = g[~g.index.duplicated(keep="first")]
+    g = g.sort_index()
+    return g
+
+
+def compilation(inputfile, trm=True, wildcard="*", workers=None, return_errors=False):
     """This function reads multiple xle transducer files in a directory and generates a compiled Pandas DataFrame.
     Args:
         inputfile (file):
             complete file path to input files; use * for wildcard in file name
         trm (bool):
             whether or not to trim the end
+        workers (int):
+            number of worker processes used to parse files; defaults to None (parse serially in this process)
+        return_errors (bool):
+            if True, files that fail to parse are left out and a tuple of the compiled data and a DataFrame of
+            those files and their errors is returned; otherwise the first error is raised
     Returns:
         outfile (object):
             Pandas DataFrame of compiled data
     Example::
         >>> compilation('O:/Snake Valley Water/Transducer Data/Raw_data_archive/all/LEV/*baro*')
         picks any file containing 'baro'
+        >>> compilation('O:/Snake Valley Water/Transducer Data/Raw_data_archive/all/LEV/', workers=8)
+        parses the directory in eight processes; output matches the serial result
     """
 
-    # create empty dictionary to hold DataFrames
-    f = {}
+    # generate list of relevant files
+    filelist = _trans_filelist(inputfile, wildcard)
 
-    if not isinstance(inputfile, Path):
-        inputfile = Path(inputfile)
+    # create dictionary of DataFrames
+    f, errors = _parse_files(filelist, trm, workers, return_errors)
 
-    # generate list of relevant files
-    filelist = inputfile.glob(wildcard)
+    g = _merge_compiled(f) if f else pd.DataFrame()
+    if return_errors:
+        return g, pd.DataFrame(errors, columns=["file", "error"])
+    return g
 
-    # iterate through list of relevant files
-    for infile in filelist:
-        # run computations using lev files
-        filename, file_extension = os.path.splitext(infile)
-        if file_extension in ['.csv', '.lev', '.xle', '.htm', '.html']:
-            print(infile)
-            nti = NewTransImp(infile, trim_end=trm).well
-            file_name = Path(infile).stem # change instead of function to avoid issue with strings!
-            f[file_name] = nti
-    # concatenate all of the DataFrames in dictionary f to one DataFrame: g
-    g = pd.concat(f)
-    # remove multiindex and replace with index=Datetime
-    g = g.reset_index()
-    g['DateTime'] = pd.to_datetime(g['DateTime'], errors='coerce') ### change to address deprecation!
-    g = g.set_index(['DateTime'])
-    # drop old indexes
-    g = g.drop(["level_0"], axis=1)
-    # remove duplicates based on index then sort by index
-    g["ind"] = g.index
-    g = g.drop_duplicates(subset="ind")
-    g = g.drop("ind", axis=1)
-    g = g.sort_index()
+
+def _file_rows(compiled, names, infile, dates=None):
+    """Returns a mask of the rows of `compiled` that came from `infile`.
+
+    Rows are matched on the file names the readers write to the filename column (`names`, the column as strings);
+    when none match, the rows in the date range recorded for the file (`dates`) are used if it is given.
+    """
+    mask = np.zeros(len(compiled), dtype=bool)
+    if names is not None:
+        path = Path(infile)
+        mask = names.isin([getfilename(path), path.stem, str(infile), str(path.resolve())]).to_numpy()
+    if not mask.any() and dates is not None:
+        mask = np.asarray((compiled.index >= dates[0]) & (compiled.index <= dates[1]))
+    return mask
+
+
+def ingest_folder(inputfile, manifest, compiled=None, trm=True, wildcard="*", workers=None, return_errors=False):
+    """Incrementally compiles a transducer directory, parsing only files that are new or changed since the last run.
+
+    Args:
+        inputfile (file):
+            directory of transducer files
+        manifest (IngestManifest):
+            record of previously ingested files; updated with every file parsed here
+        compiled (pd.DataFrame):
+            output of a previous `compilation` or `ingest_folder` run of the same directory; defaults to None
+        trm (bool):
+            whether or not to trim the end
+        wildcard (str):
+            pattern of file names to include; defaults to '*'
+        workers (int):
+            number of worker processes used to parse files; defaults to None (parse serially in this process)
+        return_errors (bool):
+            if True, files that fail to parse are left out and a tuple of the compiled data and a DataFrame of
+            those files and their errors is returned; otherwise the first error is raised
+    Returns:
+        Pandas DataFrame of `compiled` with the new and changed files merged in. Rows already in `compiled` take
+        precedence over new rows at the same time; rows of changed files are replaced by the new parse, and rows
+        named after files matching `wildcard` that were deleted from the directory are dropped along with their
+        manifest entries.
+    Example::
+        >>> manifest = IngestManifest('O:/Transducer Data/manifest.sqlite')
+        >>> compiled = ingest_folder('O:/Transducer Data/all', manifest)
+        >>> compiled = ingest_folder('O:/Transducer Data/all', manifest, compiled)
+    """
+    filelist = _trans_filelist(inputfile, wildcard)
+    changed = manifest.changed_files(filelist)
+    gone = [infile for infile in manifest.missing_files(inputfile) if _matches_filelist(infile, inputfile, wildcard)]
+
+    # drop the rows of changed files so their new parse replaces them, and the rows named after deleted files;
+    # the rows of a changed file are found by its recorded dates if none carry its name
+    if compiled is not None and len(compiled) > 0 and (changed or gone):
+        names = compiled["filename"].astype(str) if "filename" in compiled.columns else None
+        keep = np.ones(len(compiled), dtype=bool)
+        for infile, status, digest in changed:
+            if status == "changed":
+                keep &= ~_file_rows(compiled, names, infile, manifest.date_range(infile))
+        for infile in gone:
+            keep &= ~_file_rows(compiled, names, infile)
+        compiled = compiled[keep]
+
+    f, errors = _parse_files([infile for infile, status, digest in changed], trm, workers, return_errors)
+    for infile in gone:
+        manifest.remove(infile)
+    failed = set(error["file"] for error in errors)
+    for infile, status, digest in changed:
+        # files that parse to no data are recorded too, so they are not parsed again on every run
+        if str(infile) not in failed:
+            manifest.record(infile, digest, f.get(str(infile)))
+
+    f = {key: df for key, df in f.items() if df is not None}
+    if not f:
+        g = compiled if compiled is not None else pd.DataFrame()
+    else:
+        if compiled is not None and len(compiled) > 0:
+            # existing rows first so they win duplicate times
+            f = {"": compiled, **f}
+        g = _merge_compiled(f)
+    if return_errors:
+        return g, pd.DataFrame(errors, columns=["file", "error"])
     return g
 
 
@@ -1414,6 +3002,54 @@ def get_line_num(filename, lookup="Date and Time,Seconds"):
     return linenum
 
 
+# formats of files whose content `sniff_trans_format` does not recognize, by file extension
+EXTENSION_FORMATS = {".xle": "xle", ".lev": "lev", ".csv": "csv", ".htm": "troll-htm", ".html": "troll-htm"}
+
+
+def sniff_trans_format(infile, nbytes=8192):
+    """Identifies the dialect of a raw transducer file from the first few kilobytes of its content,
+    so the file can be sent straight to a single parser.
+
+    Args:
+        infile (file):
+            complete file path to transducer file
+        nbytes (int):
+            number of bytes at the start of the file to examine; defaults to 8192
+
+    Returns:
+        one of 'xle', 'xle-old', 'solinst-csv', 'global-csv', 'troll-csv', 'troll-htm' or 'lev';
+        None if the format is not recognized
+
+    Examples:
+        >>> sniff_trans_format('test/pw10a 20171208.xle')
+        'xle'
+    """
+    with open(infile, "rb") as fd:
+        head = fd.read(nbytes).decode("ISO-8859-1")
+    lower = head.lower()
+
+    if "<body_xle" in lower:
+        # older Levelogger software writes Log records without an id attribute
+        log = re.search(r"<Log\b([^>]*)>", head)
+        if log is not None and "id=" not in log.group(1):
+            return "xle-old"
+        return "xle"
+    elif "<html" in lower and ("isi-group" in lower or "isi-property" in lower):
+        return "troll-htm"
+    elif "[data]" in lower or "[instrument info" in lower or "[channel 1" in lower:
+        return "lev"
+    elif "Date and Time" in head:
+        return "troll-csv"
+
+    txt = head.splitlines()
+    if len(txt) > 1:
+        if "Serial" in txt[0]:
+            return "solinst-csv"
+        elif "Date" in txt[1]:
+            return "global-csv"
+    return None
+
+
 def read_troll_csv(filename):
     df = pd.read_csv(
         filename,
@@ -1520,6 +3156,316 @@ def drop_duplicates_keep_max_by_field(
     return deduped
 
 
+# version of the transducer readers' output; bump it when a reader changes so cached frames are parsed again
+TRANS_PARSER_VERSION = 1
+
+
+class TransCache(object):
+    """On-disk cache of parsed transducer files that sits in front of `NewTransImp`.
+
+    Files are identified by their path, size, modification time and a content hash. A file whose size or mtime
+    has changed is re-hashed, so edits invalidate the cache automatically while a touched-but-unchanged file is
+    still a hit. Parsed frames are keyed by file path, content hash, `TRANS_PARSER_VERSION` and import options
+    (the readers put the file name in the frame, so identical files under different names are kept apart) and
+    stored as pandas pickles (binary column blocks, no extra dependencies). The least recently used frames are
+    evicted once the cache grows past `max_bytes`.
+
+    Args:
+        cache_dir (str): directory that holds the index database and the cached frames
+        max_bytes (int): size budget for cached frames in bytes; defaults to 2 GB
+
+    Examples:
+        >>> NewTransImp.cache = TransCache('~/.loggerloader/cache')
+        >>> well = NewTransImp('test/pw10a 20171208.xle').well  # parsed and stored
+        >>> well = NewTransImp('test/pw10a 20171208.xle').well  # read from the cache
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024**3):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.index_file = self.cache_dir / "index.sqlite"
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files "
+                "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, hash TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS frames "
+                "(key TEXT PRIMARY KEY, nbytes INTEGER, last_used REAL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.index_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def content_hash(infile, blocksize=1024**2):
+        """Returns the hex digest of the contents of `infile`"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(infile, "rb") as fd:
+            for block in iter(lambda: fd.read(blocksize), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def file_hash(self, infile):
+        """Returns the content hash of `infile`, re-hashing only when its size or mtime has changed"""
+        path = str(Path(infile).resolve())
+        stat = os.stat(path)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT size, mtime, hash FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                return row[2]
+            digest = self.content_hash(path)
+            conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+        return digest
+
+    @staticmethod
+    def frame_key(infile, digest, trim_end=True, jumptol=1.0):
+        """Returns the cache key of `infile` with content hash `digest` parsed with the given options"""
+        path = hashlib.blake2b(str(Path(infile).resolve()).encode("utf-8"), digest_size=8).hexdigest()
+        return f"{digest}-{path}-v{TRANS_PARSER_VERSION}-{int(bool(trim_end))}-{float(jumptol):g}"
+
+    def load(self, infile, trim_end=True, jumptol=1.0):
+        """Returns the cached frame for `infile` or None if it has not been cached"""
+        key = self.frame_key(infile, self.file_hash(infile), trim_end, jumptol)
+        frame_file = self.cache_dir / f"{key}.pkl"
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM frames WHERE key = ?", (key,)).fetchone() is None:
+                return None
+            try:
+                df = pd.read_pickle(frame_file)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                conn.execute("DELETE FROM frames WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE frames SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return df
+
+    def store(self, infile, df, trim_end=True, jumptol=1.0):
+        """Writes the parsed frame for `infile` to the cache and evicts old frames if over budget"""
+        key = self.frame_key(infile, self.file_hash(infile), trim_end, jumptol)
+        frame_file = self.cache_dir / f"{key}.pkl"
+        tmp_file = frame_file.with_suffix(f".{os.getpid()}.tmp")
+        df.to_pickle(tmp_file)
+        os.replace(tmp_file, frame_file)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO frames VALUES (?, ?, ?)",
+                (key, frame_file.stat().st_size, time.time()),
+            )
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used frames until the cache fits in `max_bytes`"""
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM frames").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, nbytes in conn.execute(
+                "SELECT key, nbytes FROM frames ORDER BY last_used"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                (self.cache_dir / f"{key}.pkl").unlink(missing_ok=True)
+                conn.execute("DELETE FROM frames WHERE key = ?", (key,))
+                total -= nbytes
+
+    def clear(self):
+        """Removes every cached frame and file hash"""
+        with self._connect() as conn:
+            for (key,) in conn.execute("SELECT key FROM frames").fetchall():
+                (self.cache_dir / f"{key}.pkl").unlink(missing_ok=True)
+            conn.execute("DELETE FROM frames")
+            conn.execute("DELETE FROM files")
+
+
+class IngestManifest(object):
+    """Record of the transducer files already ingested from a directory.
+
+    Each file is stored with its path, size, modification time, content hash and the date range of its parsed data.
+    `changed_files` reports only the files that are new or whose contents changed since they were recorded, so a
+    refresh of a large archive only parses what was added. Files are re-hashed only when their size or mtime changed.
+
+    Entries are kept per consumer: `ingest_folder` and `compile_end_beg_dates` record the same files separately,
+    so a file recorded by one of them is still new to the other when they share a manifest.
+
+    Args:
+        manifest_file (str): path of the SQLite manifest; created if it does not exist
+
+    Examples:
+        >>> manifest = IngestManifest('O:/Transducer Data/manifest.sqlite')
+        >>> compiled = ingest_folder('O:/Transducer Data/all', manifest)
+        >>> compiled = ingest_folder('O:/Transducer Data/all', manifest, compiled)  # only new or edited files parsed
+    """
+
+    def __init__(self, manifest_file):
+        self.manifest_file = Path(manifest_file).expanduser()
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(files)")]
+            if columns and "consumer" not in columns:
+                # manifests written before entries were kept per consumer only held ingest_folder entries
+                conn.execute("ALTER TABLE files RENAME TO files_old")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files "
+                "(path TEXT, consumer TEXT, size INTEGER, mtime INTEGER, hash TEXT, beginning TEXT, end TEXT, "
+                "PRIMARY KEY (path, consumer))"
+            )
+            if columns and "consumer" not in columns:
+                conn.execute(
+                    "INSERT INTO files SELECT path, 'ingest_folder', size, mtime, hash, beginning, end FROM files_old"
+                )
+                conn.execute("DROP TABLE files_old")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.manifest_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _key(infile):
+        return str(Path(infile).resolve())
+
+    def changed_files(self, filelist, consumer="ingest_folder"):
+        """Returns a list of (file, status, content hash) for files in `filelist` that are new or changed
+
+        status is 'new' for files `consumer` has not recorded and 'changed' for files whose contents differ from the
+        recorded hash; files that were only touched get their size and mtime updated and are not returned.
+        """
+        changed = []
+        with self._connect() as conn:
+            for infile in filelist:
+                path = self._key(infile)
+                stat = os.stat(path)
+                row = conn.execute(
+                    "SELECT size, mtime, hash FROM files WHERE path = ? AND consumer = ?", (path, consumer)
+                ).fetchone()
+                if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+                    continue
+                digest = TransCache.content_hash(path)
+                if row is None:
+                    changed.append((infile, "new", digest))
+                elif row[2] != digest:
+                    changed.append((infile, "changed", digest))
+                else:
+                    conn.execute(
+                        "UPDATE files SET size = ?, mtime = ? WHERE path = ? AND consumer = ?",
+                        (stat.st_size, stat.st_mtime_ns, path, consumer),
+                    )
+        return changed
+
+    def record(self, infile, digest, df, consumer="ingest_folder"):
+        """Stores `infile` for `consumer` with its content hash and the date range of its parsed data `df`"""
+        path = self._key(infile)
+        stat = os.stat(path)
+        if df is not None and len(df) > 0:
+            beginning, end = str(df.index.min()), str(df.index.max())
+        else:
+            beginning, end = None, None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, consumer, stat.st_size, stat.st_mtime_ns, digest, beginning, end),
+            )
+
+    def missing_files(self, directory, consumer="ingest_folder"):
+        """Returns the files `consumer` recorded within `directory` that no longer exist"""
+        folder = Path(directory).expanduser().resolve()
+        with self._connect() as conn:
+            paths = [Path(row[0]) for row in conn.execute(
+                "SELECT path FROM files WHERE consumer = ? ORDER BY path", (consumer,)
+            )]
+        return [path for path in paths if folder in path.parents and not path.exists()]
+
+    def remove(self, infile, consumer="ingest_folder"):
+        """Removes the entry `consumer` recorded for `infile` from the manifest"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files WHERE path = ? AND consumer = ?", (self._key(infile), consumer))
+
+    def date_range(self, infile, consumer="ingest_folder"):
+        """Returns the (beginning, end) `consumer` recorded for `infile`, or None if it has not recorded the file"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT beginning, end FROM files WHERE path = ? AND consumer = ?", (self._key(infile), consumer)
+            ).fetchone()
+        if row is None:
+            return None
+        return pd.to_datetime(row[0]), pd.to_datetime(row[1])
+
+    def table(self, consumer="ingest_folder"):
+        """Returns the entries of `consumer` as a DataFrame with columns path, consumer, size, mtime, hash, beginning
+        and end; all entries if `consumer` is None"""
+        with self._connect() as conn:
+            if consumer is None:
+                df = pd.read_sql_query("SELECT * FROM files ORDER BY path, consumer", conn)
+            else:
+                df = pd.read_sql_query("SELECT * FROM files WHERE consumer = ? ORDER BY path", conn,
+                                       params=(consumer,))
+        df["beginning"] = pd.to_datetime(df["beginning"])
+        df["end"] = pd.to_datetime(df["end"])
+        return df
+
+
+def compact_frame(df, tol=1e-4, derived=("julian", "date", "datediff", "datechange")):
+    """Reduces the memory footprint of an imported transducer frame.
+
+    The filename column is stored as a categorical, float64 channels are downcast to float32 where the round trip
+    stays within `tol`, the index is kept as a datetime64[ns] (int64 nanosecond) DatetimeIndex and derived helper
+    columns are dropped.
+
+    Args:
+        df (pd.DataFrame):
+            transducer data with a datetime index
+        tol (float):
+            largest absolute change allowed when downcasting a channel to float32; defaults to 1e-4
+        derived (tuple):
+            helper columns to drop
+
+    Returns:
+        compacted DataFrame
+    """
+    df = df.drop(columns=[col for col in derived if col in df.columns])
+    if not isinstance(df.index, pd.DatetimeIndex) or df.index.dtype != "datetime64[ns]":
+        index = pd.to_datetime(df.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        df.index = index.astype("datetime64[ns]").rename(df.index.name)
+    for col in df.columns:
+        if col == "filename":
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                # convert each distinct name to a string rather than every row
+                names = df[col].astype("category")
+                labels = names.cat.categories.astype(str)
+                if labels.is_unique:
+                    df[col] = names.cat.rename_categories(labels)
+                else:
+                    df[col] = df[col].astype(str).astype("category")
+        elif df[col].dtype == np.float64:
+            values = df[col].to_numpy()
+            small = values.astype(np.float32)
+            with np.errstate(invalid="ignore"):
+                err = np.nanmax(np.abs(small - values), initial=0.0)
+            if err <= tol:
+                df[col] = small
+    return df
+
+
 class NewTransImp(object):
     """This class uses an imports and cleans the ends of transducer file.
 
@@ -1533,97 +3479,79 @@ class NewTransImp(object):
         A Pandas DataFrame containing the transducer data
     """
 
-    def __init__(self, infile, trim_end=True, jumptol=1.0):
+    # TransCache shared by every import when set; see `TransCache`
+    cache = None
+    # return `compact_frame` output from every import when True
+    compact = False
+
+    def __init__(self, infile, trim_end=True, jumptol=1.0, cache=None, compact=None):
         """
 
         :param infile: complete file path to input file
         :param trim_end: turns on the dataendclean function
         :param jumptol: minimum amount of jump to search for that was caused by an out-of-water experience
+        :param cache: TransCache to read parsed files from; defaults to NewTransImp.cache
+        :param compact: return the data in the reduced form of `compact_frame`; defaults to NewTransImp.compact
         """
 
         self.well = None
         self.infile = infile
         if type(self.infile) is str:
             self.infile = Path(self.infile)
-        file_ext = self.infile.name.split(".")[-1]
-        try:
-            if file_ext == "xle":
-                try:
-                    self.well = self.new_xle_imp()
-                except (ParseError, KeyError):
-                    self.well = self.old_xle_imp()
-            elif file_ext == "lev":
-                self.well = self.new_lev_imp()
-            elif file_ext == "csv":
-                self.well = self.new_csv_imp()
-            elif file_ext in ['htm', 'html']:
-                self.well = self.read_troll_htm()
-            else:
-                print("filetype not recognized")
-                self.well = None
+        if cache is None:
+            cache = NewTransImp.cache
+        if compact is None:
+            compact = NewTransImp.compact
+        self.file_format = sniff_trans_format(self.infile)
+        if self.file_format is None:
+            self.file_format = EXTENSION_FORMATS.get(self.infile.suffix.lower())
+
+        if cache is not None:
+            self.well = cache.load(self.infile, trim_end, jumptol)
+
+        if self.well is None:
+            readers = {
+                "xle": self.xle_imp,
+                "xle-old": self.old_xle_imp,
+                "lev": self.new_lev_imp,
+                "solinst-csv": self.new_csv_imp,
+                "global-csv": self.new_csv_imp,
+                "csv": self.new_csv_imp,
+                "troll-csv": lambda: read_troll_csv(self.infile),
+                "troll-htm": self.read_troll_htm,
+            }
+            try:
+                if self.file_format in readers:
+                    self.well = readers[self.file_format]()
+                else:
+                    print("filetype not recognized")
+                    self.well = None
+
+                if self.well is None:
+                    pass
+                elif trim_end and "Level" in self.well.columns:
+                    self.well = dataendclean(self.well, "Level", jumptol=jumptol)
+                else:
+                    pass
 
-            if self.well is None:
-                pass
-            elif trim_end:
-                self.well = dataendclean(self.well, "Level", jumptol=jumptol)
+            except AttributeError as e:
+                print("Bad File", e)
+                print(e)
             else:
-                pass
-            return
+                if cache is not None and self.well is not None:
+                    cache.store(self.infile, self.well, trim_end, jumptol)
 
-        except AttributeError as e:
-            print("Bad File", e)
-            print(e)
-            return
+        if compact and self.well is not None:
+            self.well = compact_frame(self.well)
 
     def read_troll_htm(self):
         """given a path to the .htm (html) file, function will read in the data and produce pandas dataframe
-        Args:
-            filepath (str):
-                path to data file
 
         Return:
             df:
                 dataframe
         """
-        with self.infile.open("r") as f:
-            html_string = f.read()
-
-        # use BeautifulSoup to parse the HTML content of the page
-        soup = BeautifulSoup(html_string, "html.parser")
-        table_rows = soup.find_all('tr', {'class': 'data'})
-        header = soup.find_all('tr', {'class': 'dataHeader'})
-        heads = header[0].find_all('td')
-        colnames = [head.text.strip() for head in heads]
-        data = []
-        for row in table_rows:
-            cols = row.find_all("td")
-            cols = [col.text.strip() for col in cols]
-            data.append(cols)
-
-                # convert the list of data into a pandas dataframe
-        df = pd.DataFrame(data)
-        df.columns = colnames
-
-        for col in df.columns:
-            if "Date" in col or "date" in col:
-                df[col] = pd.to_datetime(df[col])
-                df = df.rename(columns={col: "DateTime"})  # Renaming the column to match name from xle files
-                df = df.set_index("DateTime")
-            elif "Press" in col:
-                df[col] = pd.to_numeric(df[col])
-                if "psi" in col:
-                    df["Level"] = df[col] * 2.3067
-                elif "Hg" in col:
-                    df['Level'] = df[col] * 0.044603
-                df = df.drop(columns=[col])
-            elif 'Temp' in col:
-                df[col] = pd.to_numeric(df[col])
-                df = df.rename(columns={col: "Temperature"})
-                if 'F)' in col:
-                    df[col] = (df[col] - 32.0) * 5 / 9
-                    print(f"CH. 2 units in {chunit}, converting to deg C...")
-            elif "Depth" in col or "Cond" in col or "Total" in col or "Salin" in col or "Dens" in col:
-                df[col] = pd.to_numeric(df[col])
+        df = read_troll_htm(self.infile)
         df['filename'] = self.infile.stem
 
         return df
@@ -1636,7 +3564,8 @@ class NewTransImp(object):
         """
         nm = self.infile.name
         with self.infile.open("r") as fd:
-            txt = fd.readlines()
+            # only the header lines are needed; read_csv reads the data
+            txt = list(islice(fd, 13))
             if len(txt) > 1:
                 if "Serial" in txt[0]:
                     print("{:} is Solinst".format(nm))
@@ -1736,61 +3665,79 @@ class NewTransImp(object):
     def new_lev_imp(self):
         nm = self.infile.name.split(".")[0]
         with self.infile.open("r") as fd:
-            txt = fd.readlines()
+            try:
+                # single pass over the header; stops at the record count line below [Data]
+                channels = {}
+                line = fd.readline()
+                while line and line != "[Data]\n":
+                    if line in ("[CHANNEL 1 from data header]\n", "[CHANNEL 2 from data header]\n"):
+                        channels[line[9]] = (fd.readline().split("=")[-1].strip().title(),
+                                             fd.readline().split("=")[-1].strip().lower())
+                    line = fd.readline()
+                if not line or len(channels) < 2:
+                    raise ValueError("missing [Data] or channel headers")
+                level, level_units = channels["1"]
+                temp, temp_units = channels["2"]
+                count = fd.readline().strip()
+                nrows = int(count) if count.isdigit() else None
+                if nrows is None:
+                    # without a record count, the END OF DATA FILE footer is cut off before parsing
+                    data = fd.read()
+                    footer = data.find("END OF DATA FILE")
+                    source = io.StringIO(data if footer < 0 else data[:footer])
+                else:
+                    source = fd
+
+                df = pd.read_csv(
+                    source,
+                    sep=r"\s+",
+                    header=None,
+                    names=["Date", "Time", level, temp],
+                    dtype={"Date": str, "Time": str, level: "float64", temp: "float64"},
+                    nrows=nrows,
+                    engine="c",
+                )
+            except ValueError:
+                print("File {:} has formatting issues".format(nm))
+                return None
+
+        df.index = pd.to_datetime(df.pop("Date") + " " + df.pop("Time"))
+        df.index.name = "DateTime"
+
+        if level_units == "feet" or level_units == "ft":
+            pass
+        elif level_units == "kpa":
+            df[level] = df[level] * 0.33456
+            print("Units in kpa, converting {:} to ft...".format(nm))
+        elif level_units == "mbar":
+            df[level] = df[level] * 0.0334552565551
+        elif level_units == "psi":
+            df[level] = df[level] * 2.306726
+            print("Units in psi, converting {:} to ft...".format(nm))
+        elif level_units == "m" or level_units == "meters":
+            df[level] = df[level] * 3.28084
+            print("Units in psi, converting {:} to ft...".format(nm))
+        else:
+            print("Unknown units, no conversion")
+
+        if temp_units == "Deg C" or temp_units == "\N{DEGREE SIGN}" + "C":
+            pass
+        elif temp_units == "Deg F" or temp_units == "\N{DEGREE SIGN}" + "F":
+            print("Temp in F, converting {:} to C...".format(nm))
+            df[temp] = (df[temp] - 32.0) * 5.0 / 9.0
+        df["filename"] = getfilename(self.infile)
+        return df
 
+    def xle_imp(self):
+        """Imports a Solinst xle file with `stream_xle_imp`, falling back to `old_xle_imp` for files it cannot read.
+
+        Returns:
+            A Pandas DataFrame containing the transducer data
+        """
         try:
-            data_ind = txt.index("[Data]\n")
-            # inst_info_ind = txt.index('[Instrument info from data header]\n')
-            ch1_ind = txt.index("[CHANNEL 1 from data header]\n")
-            ch2_ind = txt.index("[CHANNEL 2 from data header]\n")
-            level = txt[ch1_ind + 1].split("=")[-1].strip().title()
-            level_units = txt[ch1_ind + 2].split("=")[-1].strip().lower()
-            temp = txt[ch2_ind + 1].split("=")[-1].strip().title()
-            temp_units = txt[ch2_ind + 2].split("=")[-1].strip().lower()
-            # serial_num = txt[inst_info_ind+1].split('=')[-1].strip().strip(".")
-            # inst_num = txt[inst_info_ind+2].split('=')[-1].strip()
-            # location = txt[inst_info_ind+3].split('=')[-1].strip()
-            # start_time = txt[inst_info_ind+6].split('=')[-1].strip()
-            # stop_time = txt[inst_info_ind+7].split('=')[-1].strip()
-
-            df = pd.read_table(
-                self.infile,
-                parse_dates=[[0, 1]],
-                sep=r"\s+",
-                skiprows=data_ind + 2,
-                names=["Date", "Time", level, temp],
-                skipfooter=1,
-                engine="python",
-            )
-            df.rename(columns={"Date_Time": "DateTime"}, inplace=True)
-            df.set_index("DateTime", inplace=True)
-
-            if level_units == "feet" or level_units == "ft":
-                df[level] = pd.to_numeric(df[level])
-            elif level_units == "kpa":
-                df[level] = pd.to_numeric(df[level]) * 0.33456
-                print("Units in kpa, converting {:} to ft...".format(nm))
-            elif level_units == "mbar":
-                df[level] = pd.to_numeric(df[level]) * 0.0334552565551
-            elif level_units == "psi":
-                df[level] = pd.to_numeric(df[level]) * 2.306726
-                print("Units in psi, converting {:} to ft...".format(nm))
-            elif level_units == "m" or level_units == "meters":
-                df[level] = pd.to_numeric(df[level]) * 3.28084
-                print("Units in psi, converting {:} to ft...".format(nm))
-            else:
-                df[level] = pd.to_numeric(df[level])
-                print("Unknown units, no conversion")
-
-            if temp_units == "Deg C" or temp_units == "\N{DEGREE SIGN}" + "C":
-                df[temp] = df[temp]
-            elif temp_units == "Deg F" or temp_units == "\N{DEGREE SIGN}" + "F":
-                print("Temp in F, converting {:} to C...".format(nm))
-                df[temp] = (df[temp] - 32.0) * 5.0 / 9.0
-            df["filename"] = self.infile
-            return df
-        except ValueError:
-            print("File {:} has formatting issues".format(nm))
+            return self.stream_xle_imp()
+        except (ParseError, KeyError):
+            return self.old_xle_imp()
 
     def old_xle_imp(self):
         """This function uses an exact file path to upload a xle transducer file.
@@ -1947,6 +3894,103 @@ class NewTransImp(object):
         f = f.reset_index()
         f = f.set_index("DateTime")
 
+        f = self.xle_channels(f, ch)
+        f["filename"] = self.infile.name.split(".")[0]
+        return f
+
+    def stream_xle_imp(self, chunksize=65536):
+        """Imports a Solinst xle file by streaming it through an incremental XML parser.
+
+        Each ``Log`` record is written into preallocated columnar arrays and cleared from the tree as soon as it
+        is read, so memory stays proportional to the number of records rather than the size of the XML tree.
+        Timestamps are parsed in a single vectorized call. Returns the same DataFrame as `new_xle_imp`.
+
+        Args:
+            chunksize (int): number of characters read from the file per parser feed; defaults to 65536
+
+        Returns:
+            A Pandas DataFrame containing the transducer data
+        """
+        parser = eletree.XMLPullParser(events=("start", "end"))
+        ch = {}
+        cols = {}
+        nrows = 0
+        capacity = 0
+        depth = 0
+        data = None
+
+        with self.infile.open("r", encoding="ISO-8859-1") as fd:
+            while True:
+                chunk = fd.read(chunksize)
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if depth == 2 and elem.tag == "Data":
+                            data = elem
+                        continue
+                    depth -= 1
+                    if depth == 1 and "Ch" in elem.tag:
+                        ch[elem.tag[:3].lower()] = {
+                            item.tag: item.text for item in elem if item.text is not None
+                        }
+                    elif depth == 1 and elem.tag == "Instrument_info_data_header":
+                        num_log = elem.findtext("Num_log")
+                        if num_log is not None and num_log.strip().isdigit():
+                            capacity = int(num_log)
+                    elif depth == 2 and data is not None and elem.tag == "Log":
+                        if nrows >= capacity:
+                            capacity = max(2 * capacity, 1024)
+                            for tag, arr in cols.items():
+                                cols[tag] = self._grow_column(arr, capacity)
+                        for child in elem:
+                            arr = cols.get(child.tag)
+                            if arr is None:
+                                arr = self._new_column(child.tag in ch, capacity)
+                                cols[child.tag] = arr
+                            if arr.dtype.kind == "f":
+                                arr[nrows] = np.nan if child.text is None else float(child.text)
+                            else:
+                                arr[nrows] = child.text
+                        nrows += 1
+                        del data[:]
+                if not chunk:
+                    break
+
+        f = pd.DataFrame({tag: arr[:nrows] for tag, arr in cols.items()})
+        f["DateTime"] = pd.to_datetime(f["Date"] + " " + f["Time"])
+        f = f.set_index("DateTime")
+
+        f = self.xle_channels(f, ch)
+        f["filename"] = self.infile.name.split(".")[0]
+        return f
+
+    @staticmethod
+    def _new_column(numeric, capacity):
+        if numeric:
+            return np.full(capacity, np.nan)
+        return np.full(capacity, None, dtype=object)
+
+    @staticmethod
+    def _grow_column(arr, capacity):
+        grown = NewTransImp._new_column(arr.dtype.kind == "f", capacity)
+        grown[: len(arr)] = arr
+        return grown
+
+    @staticmethod
+    def xle_channels(f, ch):
+        """Renames and converts the ``chN`` columns of an xle import using the channel headers.
+
+        Args:
+            f (pd.DataFrame): raw xle records with ``chN`` columns
+            ch (dict): channel header fields keyed by lowercase ``chN`` tag
+
+        Returns:
+            A Pandas DataFrame with named channels in feet and deg C
+        """
         levelconv = {
             "feet": 1,
             "ft": 1,
@@ -1982,7 +4026,6 @@ class NewTransImp(object):
                         print(f"CH. 2 units in {chunit}, converting to deg C...")
             elif col in ["ms", "Date", "Time", "index"]:
                 f = f.drop(col, axis=1)
-        f["filename"] = self.infile.name.split(".")[0]
         return f
 
 
@@ -2003,13 +4046,138 @@ def getfilename(path):
     return path.name.split(".")[0]
 
 
-def compile_end_beg_dates(infile, ext="xle"):
+def read_head(fd, marker, nbytes=8192):
+    """Reads an open binary file from its current position until `marker` has been read or the file ends"""
+    head = fd.read(nbytes)
+    while marker not in head:
+        block = fd.read(nbytes)
+        if not block:
+            break
+        head += block
+    return head
+
+
+def read_tail(fd, marker, nbytes=8192):
+    """Reads the end of an open binary file, seeking back from the end until `marker` is included"""
+    fd.seek(0, os.SEEK_END)
+    size = fd.tell()
+    while True:
+        fd.seek(max(size - nbytes, 0))
+        tail = fd.read()
+        if marker in tail or nbytes >= size:
+            return tail
+        nbytes *= 2
+
+
+def xle_file_ends(infile):
+    """Reads the header sections and the first and last Log records of an xle file without parsing the data block.
+
+    Args:
+        infile (file):
+            complete file path to xle file
+
+    Returns:
+        header (Element) with the sections that precede `Data`, first Log record (Element), last Log record (Element)
+
+    Raises:
+        ValueError: if the file has no Data section or no complete Log records
+    """
+    log_start = re.compile(r"<Log[\s>]")
+    with open(infile, "rb") as fd:
+        head = read_head(fd, b"</Log>").decode("ISO-8859-1")
+        tail = read_tail(fd, b"<Log").decode("ISO-8859-1")
+
+    data_start = head.find("<Data")
+    first_match = log_start.search(head, data_start) if data_start >= 0 else None
+    last_starts = [m.start() for m in log_start.finditer(tail) if "</Log>" in tail[m.start():]]
+    if first_match is None or "</Log>" not in head[first_match.start():] or not last_starts:
+        raise ValueError(f"{infile} has no Log records")
+    header = eletree.fromstring(head[:data_start] + "</Body_xle>")
+
+    first_start = first_match.start()
+    first = eletree.fromstring(head[first_start : head.index("</Log>", first_start) + 6])
+
+    last_start = last_starts[-1]
+    last = eletree.fromstring(tail[last_start : tail.index("</Log>", last_start) + 6])
+    return header, first, last
+
+
+# lines before the column names of the csv formats that `csv_file_ends` and `csv_record_count` read
+CSV_HEADER_ROWS = {"solinst-csv": 13, "global-csv": 1}
+
+
+def csv_record_count(infile):
+    """Counts the data records of a Solinst or Global Water csv file from its lines, without parsing them.
+
+    Lines after the column names with as many fields as the column names are counted. The first record of a
+    Global Water file is left out, as `NewTransImp` drops it; records it also drops for not advancing in time or
+    for following a gap of a day or more are still counted.
+
+    Args:
+        infile (file):
+            complete file path to csv file
+
+    Returns:
+        number of records (int)
+    """
+    fmt = sniff_trans_format(infile)
+    with open(infile, "rb") as fd:
+        header = next(islice(fd, CSV_HEADER_ROWS[fmt], None))
+        nfields = header.count(b",")
+        count = sum(1 for line in fd if line.strip() and line.count(b",") == nfields)
+    if fmt == "global-csv":
+        count = max(count - 1, 0)
+    return count
+
+
+def csv_file_ends(infile, nrows=2):
+    """Parses the first `nrows` records and the last record of a Solinst or Global Water csv file without reading
+    the rest of the file.
+
+    Args:
+        infile (file):
+            complete file path to csv file
+        nrows (int):
+            number of records to read from the start of the file; defaults to 2
+
+    Returns:
+        Pandas DataFrame of the records indexed by DateTime, with stripped column names
+    """
+    fmt = sniff_trans_format(infile)
+    skiprows = CSV_HEADER_ROWS[fmt]
+    if fmt == "global-csv":
+        # new_csv_imp only keeps records that advance in time, which always drops the first one
+        nrows += 1
+    with open(infile, "rb") as fd:
+        head = [line.decode("ISO-8859-1") for line in islice(fd, skiprows + 1 + nrows)]
+        tail = read_tail(fd, b"\n", nbytes=4096).decode("ISO-8859-1").splitlines()
+
+    header = head[skiprows]
+    nfields = header.count(",")
+    last = [line for line in tail if line.strip() and line.count(",") == nfields][-1:]
+
+    f = pd.read_csv(io.StringIO("".join(head[skiprows:]) + "\n".join(last) + "\n"))
+    f.columns = f.columns.str.strip()
+    f.index = pd.to_datetime(
+        f.iloc[:, 0].astype(str) + " " + f.iloc[:, 1].astype(str), errors="coerce"
+    )
+    f.index.name = "DateTime"
+    f = f[f.index.notnull()]
+    if fmt == "global-csv":
+        f = f.iloc[1:]
+    return f.iloc[:, 2:]
+
+
+def compile_end_beg_dates(infile, ext="xle", manifest=None):
     """Searches through directory and compiles transducer files, returning a dataframe of the file name,
     beginning measurement, and ending measurement. Complements xle_head_table, which derives these dates from an
     xle header.
     Args:
         infile (directory):
             folder containing transducer files
+        manifest (IngestManifest):
+            if given, only new or changed files are parsed and the dates of the rest come from the manifest; these
+            entries are kept apart from those of `ingest_folder`
     Returns:
         A Pandas DataFrame containing the file name, beginning measurement date, and end measurement date
     Example::
@@ -2020,10 +4188,21 @@ def compile_end_beg_dates(infile, ext="xle"):
     filelist = glob.glob(infile + f"/*{ext}")
     f = {}
 
+    if manifest is not None and ext == "xle":
+        consumer = "compile_end_beg_dates"
+        for changed, status, digest in manifest.changed_files(filelist, consumer):
+            manifest.record(changed, digest, NewTransImp(changed).well, consumer)
+        dflist = []
+        for infile in filelist:
+            dates = manifest.date_range(infile, consumer)
+            if dates is not None and pd.notna(dates[0]):
+                dflist.append((getfilename(Path(infile)), dates[0], dates[1]))
+        return pd.DataFrame(dflist, columns=["filename", "beginning", "end"])
+
     # iterate through list of relevant files
     if ext == "xle":
         for infile in filelist:
-            f[getfilename(infile)] = NewTransImp(infile).well
+            f[getfilename(Path(infile))] = NewTransImp(infile).well
     # elif ext == 'csv':
 
     dflist = []
@@ -2044,6 +4223,7 @@ class HeaderTable(object):
         workspace=None,
         conn_file_root=None,
         loc_table="ugs_ngwmn_monitoring_locations",
+        compact=False,
     ):
         """
 
@@ -2053,8 +4233,10 @@ class HeaderTable(object):
             filelist: list of files in folder
             workspace:
             loc_table: Table of location table in the SDE
+            compact: read data in the reduced form of `compact_frame`; defaults to False
         """
         self.folder = folder
+        self.compact = compact
 
         if filelist:
             self.filelist = filelist
@@ -2078,18 +4260,27 @@ class HeaderTable(object):
     # examine and tabulate header information from files
 
     def file_summary_table(self):
+        """Summarizes the headers of the transducer files in the folder without parsing their data.
+
+        beginning and end are the first and last records in each file, before any trimming of jumps at the
+        ends that `NewTransImp` does; xle files without records are reported and left out.
+        """
         # create temp directory and populate it with relevant files
         self.filelist = self.xle_csv_filelist()
         fild = {}
         for file in self.filelist:
             file_extension = os.path.splitext(file)[1]
 
+            # only the header fields are kept, so skip parsing the data series
             if file_extension == ".xle":
-                fild[file], dta = self.xle_head(file)
+                try:
+                    fild[file], dta = self.xle_head(file, read_data=False)
+                except ValueError as e:
+                    print(e)
             elif file_extension == ".csv":
-                fild[file], dta = self.csv_head(file)
+                fild[file], dta = self.csv_head(file, read_data=False)
             elif file_extension == ".htm":
-                fild[file], dta = self.html_head(file)
+                fild[file], dta = self.html_head(file, read_data=False)
 
         df = pd.DataFrame.from_dict(fild, orient="index")
         return df
@@ -2121,9 +4312,19 @@ class HeaderTable(object):
             files_grabbed += self.folder.glob(ext)
         return files_grabbed
 
-    def xle_head(self, file):
+    def xle_head(self, file, read_data=True):
         """Creates a Pandas DataFrame containing header information from all xle files in a folder
 
+        Args:
+            file: xle file to summarize
+            read_data (bool): if False, only the header and the first and last Log records are read; beginning
+                and end come from those records and no data are returned; defaults to True. With data, beginning
+                and end are those of the imported data, which are later than the raw records when `NewTransImp`
+                trims jumps from the ends of the file
+
+        Raises:
+            ValueError: if the file has no Log records
+
         Returns:
             A Pandas DataFrame containing the transducer header data
 
@@ -2133,20 +4334,23 @@ class HeaderTable(object):
         # open text file
         df1 = {}
         df1["file_name"] = getfilename(file)
-        with io.open(file, "r", encoding="ISO-8859-1") as f:
-            contents = f.read()
-            tree = eletree.fromstring(contents)
+        tree, first, last = xle_file_ends(file)
 
-            for child in tree[1]:
-                df1[child.tag] = child.text
+        for child in tree[1]:
+            df1[child.tag] = child.text
 
-            for child in tree[2]:
-                df1[child.tag] = child.text
+        for child in tree[2]:
+            df1[child.tag] = child.text
 
         df1["trans type"] = "Solinst"
-        xledata = NewTransImp(file).well.sort_index()
-        df1["beginning"] = xledata.first_valid_index()
-        df1["end"] = xledata.last_valid_index()
+        if read_data:
+            xledata = NewTransImp(file, compact=self.compact).well.sort_index()
+            df1["beginning"] = xledata.first_valid_index()
+            df1["end"] = xledata.last_valid_index()
+        else:
+            xledata = None
+            df1["beginning"] = pd.to_datetime(first.findtext("Date") + " " + first.findtext("Time"))
+            df1["end"] = pd.to_datetime(last.findtext("Date") + " " + last.findtext("Time"))
         # df = pd.DataFrame.from_dict(df1, orient='index').T
         return df1, xledata
 
@@ -2181,56 +4385,25 @@ class HeaderTable(object):
         # Apply the conversion and summation to each list in the series
         return series.apply(convert_and_sum)
 
-    def html_head(self, file):
-        """Parse ISI report sections into a pandas DataFrame with properties and values."""
-        with open(file, "r", encoding="utf-8") as f:
-            html_content = f.read()
-
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Store section data
-        sections_data = {}
-        current_section = None
-
-        for row in soup.find_all("tr"):
-            if "sectionHeader" in row.get("class", []):
-                # Get section name from td with isi-group attribute
-                section_td = row.find("td", attrs={"isi-group": True})
-                if section_td:
-                    current_section = section_td.text.strip()
-
-            elif "sectionMember" in row.get("class", []):
-                if current_section:
-                    # Get property name from isi-property attribute
-                    property_td = row.find("td", attrs={"isi-property": True})
-                    if property_td:
-                        property_name = property_td["isi-property"]
-                        # Get value from the entire td text
-                        value = property_td.text.strip()
-                        # Extract just the value after the '=' if present
-                        if "=" in value:
-                            value = value.split("=")[1].strip()
-
-                        sections_data[property_name] = value
-            if not sections_data:
-                raise ValueError("No section data found")
+    def html_head(self, file, read_data=True):
+        """Parse ISI report sections into a pandas DataFrame with properties and values.
+
+        Args:
+            file: Troll htm file to summarize
+            read_data (bool): if False, the data table is not parsed and None is returned for it; defaults to True
+        """
+        sections_data, _ = parse_troll_htm(file, sections_only=True)
+        if not sections_data:
+            raise ValueError("No section data found")
 
         df = pd.Series(sections_data)
 
         df["StartTime"] = pd.to_datetime(df["StartTime"])
-        df["Days"] = self.sum_list_values(df["Duration"].str.split(":"))
-        df["ExpectedRecords"] = (
-            df["Days"]
-            / pd.to_numeric(
-                self.sum_list_values(df["Interval"].str.split(":"), freq="H")
-            )
-            * 24
-        ).round(0)
+        df["Days"] = self.sum_list_values(pd.Series([df["Duration"].split(":")]))[0]
+        df["ExpectedRecords"] = round(
+            df["Days"] / self.sum_list_values(pd.Series([df["Interval"].split(":")]), freq="H")[0] * 24, 0)
         df["trans type"] = "Troll"
-        for i in df.index:
-            df.loc[i, "end"] = df.loc[i, "StartTime"] + pd.Timedelta(
-                df.loc[i, "Days"], unit="D"
-            )
+        df["end"] = df["StartTime"] + pd.Timedelta(df["Days"], unit="D")
 
         rename_fields = {
             "StartTime": "beginning",
@@ -2240,36 +4413,54 @@ class HeaderTable(object):
             "Name": "Location",
         }
         df = df.rename(rename_fields)
-        dta = NewTransImp(file).well.sort_index()
+        if read_data:
+            dta = NewTransImp(file, compact=self.compact).well.sort_index()
+        else:
+            dta = None
 
         return df, dta
 
-    def csv_head(self, file):
+    def csv_head(self, file, read_data=True):
+        """Summarizes a Global Water or Solinst csv file
+
+        Args:
+            file: csv file to summarize
+            read_data (bool): if False, only the first two and the last records are read, the records are counted
+                from the lines of the file (see `csv_record_count`) and no data are returned; beginning and end are
+                then the raw first and last records, before any trimming of jumps at the ends; defaults to True
+        """
         cfile = {}
         csvdata = pd.DataFrame()
         try:
             cfile["file_name"] = getfilename(file)
-            csvdata = NewTransImp(file).well.sort_index()
-            if "Volts" in csvdata.columns:
+            if read_data:
+                csvdata = NewTransImp(file, compact=self.compact).well.sort_index()
+                ends = csvdata
+                num_log = len(csvdata)
+            else:
+                csvdata = None
+                ends = csv_file_ends(file)
+                num_log = csv_record_count(file)
+            if "Volts" in ends.columns:
                 cfile["Battery_level"] = int(
                     round(
-                        csvdata.loc[csvdata.index[-1], "Volts"]
-                        / csvdata.loc[csvdata.index[0], "Volts"]
+                        ends.loc[ends.index[-1], "Volts"]
+                        / ends.loc[ends.index[0], "Volts"]
                         * 100,
                         0,
                     )
                 )
-            cfile["Sample_rate"] = (csvdata.index[1] - csvdata.index[0]).seconds * 100
+            cfile["Sample_rate"] = (ends.index[1] - ends.index[0]).seconds * 100
             # cfile['filename'] = file
-            cfile["beginning"] = csvdata.first_valid_index()
-            cfile["end"] = csvdata.last_valid_index()
+            cfile["beginning"] = ends.first_valid_index()
+            cfile["end"] = ends.last_valid_index()
             # cfile['last_reading_date'] = csvdata.last_valid_index()
             cfile["Location"] = " ".join(cfile["file_name"].split(" ")[:-1])
             cfile["trans type"] = "Global Water"
-            cfile["Num_log"] = len(csvdata)
+            cfile["Num_log"] = num_log
             # df = pd.DataFrame.from_dict(cfile, orient='index').T
 
-        except (KeyError, AttributeError):
+        except (KeyError, AttributeError, IndexError):
             pass
 
         return cfile, csvdata
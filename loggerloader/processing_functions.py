@@ -1,3 +1,5 @@
+import warnings
+
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -286,6 +288,100 @@ def linear_drift_correction(df: pd.DataFrame,
 
     return corrected_df
 
+def _sectional_segments(df1, df2, value_col1, value_col2, freq='H', max_lag=24, window_size='7D'):
+    """
+    Resamples and aligns two series and cuts them into the windows compared by
+    detect_sectional_offsets_indexed. Windows shorter than 2 * max_lag are left out.
+
+    Returns:
+    - list of (window start, values of df1, values of df2) tuples
+    """
+    s1 = df1[value_col1].resample(freq).mean()
+    s2 = df2[value_col2].resample(freq).mean()
+
+    # Align both series to ensure same timestamps
+    s1, s2 = s1.align(s2, join='inner')
+    s1 = s1.ffill()
+    s2 = s2.ffill()
+    if len(s1) == 0:
+        return []
+
+    # windows include both ends, like label slicing s1[start:end]
+    window_starts = pd.date_range(s1.index.min(), s1.index.max(), freq=window_size)
+    window_ends = window_starts + pd.to_timedelta(window_size)
+    lefts = s1.index.searchsorted(window_starts, side='left')
+    rights = s1.index.searchsorted(window_ends, side='right')
+    v1 = s1.to_numpy(dtype=float)
+    v2 = s2.to_numpy(dtype=float)
+
+    return [
+        (start, v1[left:right], v2[left:right])
+        for start, left, right in zip(window_starts, lefts, rights)
+        if right - left >= max_lag * 2
+    ]
+
+
+def _lagged_correlations(segments, max_lag, chunk_size=4_000_000):
+    """
+    Pearson correlation of every window of segments at every lag from -max_lag to max_lag,
+    matching Series.corr(Series.shift(lag)) within each window: pairs with a missing value
+    are left out and constant pairs give NaN.
+
+    All windows are padded to one length with NaN and the shifted copies are strided views,
+    so every lag of every window is computed in a few array operations.
+
+    Returns:
+    - array of shape (number of windows, 2 * max_lag + 1)
+    """
+    nlags = 2 * max_lag + 1
+    if not segments:
+        return np.empty((0, nlags))
+    length = max(len(x) for start, x, y in segments)
+    xs = np.full((len(segments), length), np.nan)
+    ys = np.full((len(segments), length + 2 * max_lag), np.nan)
+    for i, (start, x, y) in enumerate(segments):
+        xs[i, :len(x)] = x
+        ys[i, max_lag:max_lag + len(y)] = y
+
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        # correlation does not change with an offset; centering keeps the sums well conditioned
+        scale = np.fmax(np.nanmax(np.abs(xs), axis=1), np.nanmax(np.abs(ys), axis=1))
+        xs -= np.nanmean(xs, axis=1, keepdims=True)
+        ys -= np.nanmean(ys, axis=1, keepdims=True)
+
+        corr = np.full((len(segments), nlags), np.nan)
+        step = max(1, chunk_size // (nlags * length))
+        for lo in range(0, len(segments), step):
+            x = xs[lo:lo + step, None, :]
+            # row r is y shifted by max_lag - r; reverse so columns run from -max_lag to max_lag
+            y = np.lib.stride_tricks.sliding_window_view(ys[lo:lo + step], length, axis=1)[:, ::-1, :]
+            valid = ~np.isnan(x) & ~np.isnan(y)
+            x0 = np.where(valid, x, 0.0)
+            y0 = np.where(valid, y, 0.0)
+            n = valid.sum(axis=2)
+            sx, sy = x0.sum(axis=2), y0.sum(axis=2)
+            varx = (x0 * x0).sum(axis=2) - sx * sx / n
+            vary = (y0 * y0).sum(axis=2) - sy * sy / n
+            cov = (x0 * y0).sum(axis=2) - sx * sy / n
+            tol = 1e-14 * n * scale[lo:lo + step, None] ** 2
+            ok = (n > 1) & (varx > tol) & (vary > tol)
+            corr[lo:lo + step] = np.where(ok, np.clip(cov / np.sqrt(varx * vary), -1, 1), np.nan)
+    return corr
+
+
+def _best_lags(segments, corr, max_lag):
+    """Picks the lag with the highest correlation for each window; windows without any correlation are dropped"""
+    lags = np.arange(-max_lag, max_lag + 1)
+    found = ~np.isnan(corr).all(axis=1) if len(corr) else np.zeros(0, dtype=bool)
+    best = np.nanargmax(np.where(found[:, None], corr, 0.0), axis=1) if len(corr) else np.zeros(0, dtype=int)
+    return pd.DataFrame({
+        'window_start': [start for (start, x, y), keep in zip(segments, found) if keep],
+        'best_lag': lags[best[found]],
+        'correlation': corr[found, best[found]] if len(corr) else np.zeros(0),
+    })
+
+
 def detect_sectional_offsets_indexed(
     df1, df2, value_col1, value_col2,
     freq='H', max_lag=24, window_size='7D'
@@ -294,6 +390,9 @@ def detect_sectional_offsets_indexed(
     Evaluates time offsets between two time series data frames ((datetime-indexed) in
     rolling sections. Returns the best lag with the best offset for each time window.
 
+    Correlations for every lag of every window are computed together with strided arrays
+    (see _lagged_correlations) rather than one Series.corr call per window and lag.
+
     Parameters:
     - df1, df2: DataFrames with datetime index.
     - value_col1: name of the column with numerical values to compare for df1
@@ -305,44 +404,43 @@ def detect_sectional_offsets_indexed(
     Returns:
     - DataFrame with lag information per window.
     """
+    segments = _sectional_segments(df1, df2, value_col1, value_col2, freq, max_lag, window_size)
+    corr = _lagged_correlations(segments, max_lag)
+    result_df = _best_lags(segments, corr, max_lag)
+    if result_df.empty:
+        return pd.DataFrame()
 
-    # Resample both series to ensure regular intervals
-    s1 = df1[value_col1].resample(freq).mean()
-    s2 = df2[value_col2].resample(freq).mean()
-
-    # Align both series to ensure same timestamps
-    s1, s2 = s1.align(s2, join='inner')
-    s1 = s1.fillna(method='ffill')
-    s2 = s2.fillna(method='ffill')
-
-    # Create window start times
-    window_starts = pd.date_range(s1.index.min(), s1.index.max(), freq=window_size)
-    results = []
-
-    for start in window_starts:
-        end = start + pd.to_timedelta(window_size)
-        seg1 = s1[start:end]
-        seg2 = s2[start:end]
-
-        if len(seg1) < max_lag * 2 or len(seg2) < max_lag * 2:
-            continue  # Skip short or empty windows
-
-        lags = np.arange(-max_lag, max_lag + 1)
-        correlations = [seg1.corr(seg2.shift(lag)) for lag in lags]
+    return result_df
 
-        if all(pd.isna(correlations)):
-            continue
 
-        best_lag = lags[np.nanargmax(correlations)]
-        best_corr = np.nanmax(correlations)
+def detect_sectional_offsets_batch(
+    pairs, value_col1, value_col2,
+    freq='H', max_lag=24, window_size='7D', key_name='locationid'
+):
+    """
+    Runs detect_sectional_offsets_indexed for many pairs of series at once, e.g. every
+    well against its barometer, to screen the whole network for clock offsets. The windows
+    of all pairs are correlated in one batch.
 
-        results.append({
-            'window_start': start,
-            'best_lag': best_lag,
-            'correlation': best_corr
-        })
+    Parameters:
+    - pairs: dictionary of (df1, df2) tuples, keyed by well or pair id
+    - value_col1, value_col2, freq, max_lag, window_size: as in detect_sectional_offsets_indexed
+    - key_name: name of the column holding the keys of pairs
 
-    result_df = pd.DataFrame(results)
+    Returns:
+    - DataFrame of key_name, window_start, best_lag and correlation for every pair and window.
+    """
+    segments = []
+    keys = []
+    for key, (df1, df2) in pairs.items():
+        pair_segments = _sectional_segments(df1, df2, value_col1, value_col2, freq, max_lag, window_size)
+        segments.extend(pair_segments)
+        keys.extend([key] * len(pair_segments))
+
+    corr = _lagged_correlations(segments, max_lag)
+    found = ~np.isnan(corr).all(axis=1) if len(corr) else np.zeros(0, dtype=bool)
+    result_df = _best_lags(segments, corr, max_lag)
+    result_df.insert(0, key_name, [key for key, keep in zip(keys, found) if keep])
 
     return result_df
 
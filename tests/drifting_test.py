@@ -161,8 +161,12 @@ class TestDrifting(unittest.TestCase):
 
     def test_trim_end_functionality(self):
         """Test the trim_end functionality."""
-        # Create data with jumps at the endpoints
-        jumpy_data = self.transducer_data.copy()
+        # Create hourly data with jumps at the endpoints; like dataendclean, segments of 50 readings or fewer are
+        # not trimmed
+        jumpy_data = {
+            'datetime': pd.date_range(start='2023-01-01', periods=90 * 24, freq='h'),
+            'corrwl': np.linspace(10.0, 13.0, 90 * 24)
+        }
         jumpy_df = pd.DataFrame(jumpy_data)
         jumpy_df.iloc[0, jumpy_df.columns.get_loc('corrwl')] += 5  # Add jump at start
         jumpy_df.iloc[-1, jumpy_df.columns.get_loc('corrwl')] += 5  # Add jump at end
@@ -3,16 +3,63 @@ from loggerloader.loader import (
     detect_jumps,
     analyze_jumps,
     detect_mean_offset,
+    NewTransImp,
+    sniff_trans_format,
+    TransCache,
+    compilation,
+    HeaderTable,
+    read_troll_htm,
+    compact_frame,
+    well_baro_merge,
+    IngestManifest,
+    ingest_folder,
+    compile_end_beg_dates,
+    hourly_resample,
+    baro_compensate,
+    well_baro_merge_batch,
+    BaroStore,
+    well_baro_merge_bulk,
+    bulk_baro_assignments,
+    BaroIndex,
+    barodistance,
+    correct_be,
+    estimate_be,
+    correct_be_bulk,
+    rollmeandiff,
+    NearestTime,
+    fcl,
+    fix_drift_batch,
+    fix_drift_bulk,
+    fix_drift_update,
 )
 from loggerloader.drifting import DriftFeatures, Drifting
+from loggerloader import loader
+from loggerloader.processing_functions import (
+    detect_sectional_offsets_indexed,
+    detect_sectional_offsets_batch,
+    subset_final_processed_data,
+)
 
 
 import unittest
+from unittest.mock import patch
+import io
+from contextlib import redirect_stdout
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Callable
 import matplotlib.pyplot as plt
+import os
+import functools
+import multiprocessing
+import shutil
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+import tempfile
+from pathlib import Path
+
+TEST_FILES = Path(__file__).resolve().parent.parent / "test"
 
 
 class TestTimeSeriesJumpDetection(unittest.TestCase):
@@ -313,8 +360,12 @@ class TestDrifting(unittest.TestCase):
 
     def test_trim_end_functionality(self):
         """Test the trim_end functionality."""
-        # Create data with jumps at the endpoints
-        jumpy_data = self.transducer_data.copy()
+        # Create hourly data with jumps at the endpoints; like dataendclean, segments of 50 readings or fewer are
+        # not trimmed
+        jumpy_data = {
+            "datetime": pd.date_range(start="2023-01-01", periods=90 * 24, freq="h"),
+            "corrwl": np.linspace(10.0, 13.0, 90 * 24)
+        }
         jumpy_df = pd.DataFrame(jumpy_data)
         jumpy_df.iloc[0, jumpy_df.columns.get_loc("corrwl")] += 5  # Add jump at start
         jumpy_df.iloc[-1, jumpy_df.columns.get_loc("corrwl")] += 5  # Add jump at end
@@ -332,5 +383,1137 @@ class TestDrifting(unittest.TestCase):
         self.assertFalse(corrected_trim_df.equals(corrected_no_trim_df))
 
 
+class TestStreamXleImport(unittest.TestCase):
+    def test_matches_new_xle_imp(self):
+        """Streaming xle reader returns the same frame as the tree-based reader"""
+        xle_files = sorted(TEST_FILES.glob("*.xle"))
+        self.assertTrue(len(xle_files) > 0)
+        for xle in xle_files:
+            with self.subTest(file=xle.name):
+                nti = NewTransImp(xle, trim_end=False)
+                expected = nti.new_xle_imp()
+                result = nti.stream_xle_imp(chunksize=4096)
+                pd.testing.assert_frame_equal(result, expected, check_freq=False)
+
+    def test_default_import_uses_stream(self):
+        """NewTransImp output for xle files is unchanged"""
+        xle = TEST_FILES / "pw10a 20171208.xle"
+        nti = NewTransImp(xle, trim_end=False)
+        pd.testing.assert_frame_equal(nti.well, nti.new_xle_imp(), check_freq=False)
+
+
+class TestSniffTransFormat(unittest.TestCase):
+    def test_xle_files(self):
+        """Solinst xle files in test/ are detected as the current dialect"""
+        for xle in TEST_FILES.glob("*.xle"):
+            self.assertEqual(sniff_trans_format(xle), "xle")
+
+    def test_text_dialects(self):
+        """Each supported text dialect is identified from the file head"""
+        heads = {
+            "old.xle": '<?xml version="1.0" ?>\n<Body_xle>\n<Data>\n<Log>\n<Date>2017/08/16</Date>',
+            "solinst.csv": "Serial_number:\n1037276\nProject ID:\n",
+            "global.csv": "Site,pw02a\nDate,Time,Feet,Temp C\n",
+            "troll.csv": "Log File Name,pw03\nDate and Time,Seconds,Pressure (PSI)\n",
+            "troll.htm": '<html><table><tr class="sectionHeader"><td isi-group="Report">',
+            "well.lev": "Data file for DataLogger.\n[Instrument info]\nSerial number=1\n",
+            "processed.csv": "DateTime,Level,Temperature\n2017-03-08 11:00:00,18.2,13.7\n",
+            "page.htm": "<html><body><p>Level report</p></body></html>",
+            "notes.csv": "Note,Value\nisi-sensor swapped,1\n",
+        }
+        expected = {
+            "old.xle": "xle-old",
+            "solinst.csv": "solinst-csv",
+            "global.csv": "global-csv",
+            "troll.csv": "troll-csv",
+            "troll.htm": "troll-htm",
+            "well.lev": "lev",
+            "processed.csv": None,
+            "page.htm": None,
+            "notes.csv": None,
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, head in heads.items():
+                path = Path(tmp) / name
+                path.write_text(head)
+                self.assertEqual(sniff_trans_format(path), expected[name], name)
+
+    def test_xle_fallback(self):
+        """xle files the streaming parser cannot read are imported with old_xle_imp"""
+        text = (TEST_FILES / "pw10a 20171208.xle").read_text(encoding="ISO-8859-1")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "records.xle"
+            path.write_text(text.replace("<Data>", "<Records>").replace("</Data>", "</Records>"),
+                            encoding="ISO-8859-1")
+            self.assertEqual(sniff_trans_format(path), "xle")
+            nti = NewTransImp(path, trim_end=False)
+            self.assertIsNotNone(nti.well)
+            pd.testing.assert_frame_equal(nti.well, nti.old_xle_imp())
+
+
+class TestTransCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = TransCache(Path(self.tmp.name) / "cache")
+        self.xle = Path(self.tmp.name) / "pw10a.xle"
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", self.xle)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cached_frame_matches_parse(self):
+        """Second import comes from the cache and matches the parsed frame"""
+        parsed = NewTransImp(self.xle, cache=self.cache).well
+        self.assertIsNotNone(self.cache.load(self.xle))
+        cached = NewTransImp(self.xle, cache=self.cache).well
+        pd.testing.assert_frame_equal(cached, parsed)
+
+    def test_changed_file_invalidates(self):
+        """Editing a file changes its hash so the old frame is not returned"""
+        NewTransImp(self.xle, cache=self.cache)
+        text = self.xle.read_text(encoding="ISO-8859-1")
+        self.xle.write_text(text.replace("<ch1>12.2639</ch1>", "<ch1>99.0</ch1>"), encoding="ISO-8859-1")
+        self.assertIsNone(self.cache.load(self.xle))
+        well = NewTransImp(self.xle, trim_end=False, cache=self.cache).well
+        self.assertEqual(well["Level"].iloc[0], 99.0)
+
+    def test_lru_eviction(self):
+        """Least recently used frames are dropped once over budget"""
+        self.cache.max_bytes = 1
+        NewTransImp(self.xle, cache=self.cache)
+        self.assertIsNone(self.cache.load(self.xle))
+
+    def test_identical_files_kept_apart(self):
+        """Two files with the same contents get their own frames and names"""
+        other = Path(self.tmp.name) / "pw10b.xle"
+        shutil.copy(self.xle, other)
+        first = NewTransImp(self.xle, cache=self.cache).well
+        second = NewTransImp(other, cache=self.cache).well
+        self.assertEqual(first["filename"].unique().tolist(), ["pw10a"])
+        self.assertEqual(second["filename"].unique().tolist(), ["pw10b"])
+
+    def test_parser_version_in_key(self):
+        """Frames cached by another reader version are parsed again"""
+        NewTransImp(self.xle, cache=self.cache)
+        with patch.object(loader, "TRANS_PARSER_VERSION", loader.TRANS_PARSER_VERSION + 1):
+            self.assertIsNone(self.cache.load(self.xle))
+
+
+class TestParallelCompilation(unittest.TestCase):
+    def test_workers_match_serial(self):
+        """Process-pool compilation returns the same frame as the serial loop"""
+        serial = compilation(TEST_FILES, wildcard="*.xle")
+        parallel, errors = compilation(
+            TEST_FILES, wildcard="*.xle", workers=2, return_errors=True
+        )
+        pd.testing.assert_frame_equal(parallel, serial)
+        self.assertTrue(errors.empty)
+        self.assertTrue(serial.index.is_unique)
+
+    def test_spawned_workers_compact(self):
+        """Spawned workers, which do not inherit NewTransImp defaults, return the compact frames of the serial loop"""
+        spawn = functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn"))
+        with patch.object(NewTransImp, "compact", True), patch.object(loader, "ProcessPoolExecutor", spawn):
+            serial = compilation(TEST_FILES, wildcard="pw10*.xle")
+            parallel = compilation(TEST_FILES, wildcard="pw10*.xle", workers=2)
+        pd.testing.assert_frame_equal(parallel, serial)
+        self.assertEqual(serial["Level"].dtype, np.float32)
+
+    def test_errors_match_serial(self):
+        """A file that fails to parse is reported, or raised, the same way serially and with workers"""
+        with tempfile.TemporaryDirectory() as tmp:
+            shutil.copy(TEST_FILES / "pw10a 20171208.xle", tmp)
+            broken = Path(tmp) / "broken.xle"
+            broken.write_text('<?xml version="1.0"?><Body_xle><Log id="1"><Date>')
+            results = []
+            for workers in [None, 2]:
+                with self.subTest(workers=workers):
+                    with self.assertRaises(Exception):
+                        compilation(tmp, workers=workers)
+                    results.append(compilation(tmp, workers=workers, return_errors=True))
+            pd.testing.assert_frame_equal(results[0][0], results[1][0])
+            pd.testing.assert_frame_equal(results[0][1], results[1][1])
+            self.assertEqual(results[0][1]["file"].tolist(), [str(broken)])
+
+
+class TestHeaderOnly(unittest.TestCase):
+    def test_xle_header_matches_full_parse(self):
+        """Header-only xle summary matches the summary built from the parsed data of files that need no trimming"""
+        ht = HeaderTable(TEST_FILES)
+        for xle in TEST_FILES.glob("*.xle"):
+            with self.subTest(file=xle.name):
+                full, data = ht.xle_head(xle)
+                head, nodata = ht.xle_head(xle, read_data=False)
+                self.assertEqual(head, full)
+                self.assertIsNone(nodata)
+
+    def test_global_csv_header_matches_full_parse(self):
+        """Header-only csv summary reads the first and last records from the file ends"""
+        dates = pd.date_range("2020-01-01", periods=500, freq="h")
+        lines = ["Global Water Instrumentation\n", "Date, Time, Feet, Temp C, Volts\n"] + [
+            f"{x:%m/%d/%Y}, {x:%H:%M:%S}, {10 + i * 0.001:.3f}, 12.1, {13.0 - i * 0.001:.3f}\n"
+            for i, x in enumerate(dates)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            csv = Path(tmp) / "pw03 20200101.csv"
+            csv.write_text("".join(lines))
+            ht = HeaderTable(Path(tmp))
+            full, data = ht.csv_head(csv)
+            head, nodata = ht.csv_head(csv, read_data=False)
+        self.assertEqual(head, full)
+        self.assertIsNone(nodata)
+
+    def test_csv_count_with_gap(self):
+        """Header-only record counts hold for records with gaps and interval changes"""
+        dates = pd.date_range("2020-01-01", periods=300, freq="h").append(
+            pd.date_range("2020-01-13 20:00", periods=200, freq="15min"))
+        lines = ["Global Water Instrumentation\n", "Date, Time, Feet, Temp C, Volts\n"] + [
+            f"{x:%m/%d/%Y}, {x:%H:%M:%S}, {10 + i * 0.001:.3f}, 12.1, 13.0\n" for i, x in enumerate(dates)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            csv = Path(tmp) / "pw03 20200101.csv"
+            csv.write_text("".join(lines))
+            ht = HeaderTable(Path(tmp))
+            full, data = ht.csv_head(csv)
+            head, nodata = ht.csv_head(csv, read_data=False)
+        self.assertEqual(head["Num_log"], len(data))
+        self.assertEqual(head, full)
+
+    def test_xle_without_records(self):
+        """An xle file without Log records raises a ValueError and is left out of the summary table"""
+        with tempfile.TemporaryDirectory() as tmp:
+            text = (TEST_FILES / "pw10a 20171208.xle").read_text(encoding="ISO-8859-1")
+            empty = text[:text.index("<Data>") + 6] + "</Data></Body_xle>"
+            (Path(tmp) / "empty.xle").write_text(empty, encoding="ISO-8859-1")
+            shutil.copy(TEST_FILES / "pw10a 20171208.xle", tmp)
+            ht = HeaderTable(Path(tmp))
+            with self.assertRaises(ValueError):
+                ht.xle_head(Path(tmp) / "empty.xle", read_data=False)
+            with redirect_stdout(io.StringIO()):
+                table = ht.file_summary_table()
+        self.assertEqual([Path(name).name for name in table.index], ["pw10a 20171208.xle"])
+
+
+class TestTrollHtm(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.htm = Path(self.tmp) / "troll well.htm"
+        rows = "".join(
+            f'<tr class="data"><td>2023-01-01 {h:02d}:00:00</td><td>{10 + h * 0.1:.3f}</td>'
+            f'<td>{50 + h * 0.01:.2f}</td></tr>\n'
+            for h in range(24)
+        )
+        self.htm.write_text(
+            "<html><body><table>\n"
+            '<tr class="sectionHeader"><td isi-group="Instrument Properties">Instrument Properties</td></tr>\n'
+            '<tr class="sectionMember"><td isi-property="Model">Device Model = Level TROLL 500</td></tr>\n'
+            '<tr class="sectionMember"><td isi-property="SerialNumber">Device SN = 123456</td></tr>\n'
+            '<tr class="sectionHeader"><td isi-group="Log Settings">Log Settings</td></tr>\n'
+            '<tr class="sectionMember"><td isi-property="Name">Log Name = Well 1</td></tr>\n'
+            '<tr class="sectionMember"><td isi-property="StartTime">Start Time = 2023-01-01 00:00:00</td></tr>\n'
+            '<tr class="sectionMember"><td isi-property="Duration">Duration = 0:23:00</td></tr>\n'
+            '<tr class="sectionMember"><td isi-property="Interval">Interval = 1:00:00</td></tr>\n'
+            '<tr class="sectionMember"><td isi-property="Readings">Readings = 24</td></tr>\n'
+            "<tr class=\"dataHeader\"><td>Date Time</td><td>Pressure (psi)</td><td>Temperature (F)</td></tr>\n"
+            + rows
+            + "</table></body></html>\n"
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_read_troll_htm(self):
+        """Data table is converted to Level and degrees C on a DateTime index"""
+        df = read_troll_htm(self.htm)
+        self.assertEqual(len(df), 24)
+        self.assertEqual(df.index.name, "DateTime")
+        self.assertAlmostEqual(df["Level"].iloc[0], 10 * 2.3067)
+        self.assertAlmostEqual(df["Temperature"].iloc[0], 10.0)
+        self.assertEqual(NewTransImp(self.htm).well["filename"].iloc[0], "troll well")
+
+    def test_padded_head(self):
+        """Reports whose markers are past the sniffed bytes are read by their extension"""
+        text = self.htm.read_text()
+        self.htm.write_text(text.replace("<html>", "<html><head><style>" + "td {}\n" * 2000 + "</style></head>", 1))
+        self.assertIsNone(sniff_trans_format(self.htm))
+        nti = NewTransImp(self.htm)
+        self.assertEqual(nti.file_format, "troll-htm")
+        pd.testing.assert_frame_equal(nti.well, nti.read_troll_htm())
+
+    def test_html_head(self):
+        """Report sections are summarized without reading the data table"""
+        head, data = HeaderTable(Path(self.tmp)).html_head(self.htm, read_data=False)
+        self.assertIsNone(data)
+        self.assertEqual(head["Serial_number"], "123456")
+        self.assertEqual(head["Location"], "Well 1")
+        self.assertEqual(head["ExpectedRecords"], 23)
+        self.assertEqual(head["beginning"], pd.Timestamp("2023-01-01"))
+
+
+class TestLevImport(unittest.TestCase):
+    HEADER = (
+        "Data file for DataLogger.\n"
+        "[Instrument info from data header]\n"
+        "Instrument type=LT_EDGE F15 M5\n"
+        "Serial number=1234567\n"
+        "[CHANNEL 1 from data header]\n"
+        "Identification=LEVEL\n"
+        "Unit=kPa\n"
+        "[CHANNEL 2 from data header]\n"
+        "Identification=TEMPERATURE\n"
+        "Unit=Deg C\n"
+        "[Data]\n"
+    )
+
+    def read_lev(self, count, bad_row=None):
+        lines = [f"2007/01/01 {h:02d}:00:00.0      {10 + h:.4f}      {5 + h / 10:.3f}\n" for h in range(24)]
+        if bad_row is not None:
+            lines[5] = bad_row
+        with tempfile.TemporaryDirectory() as tmp:
+            lev = Path(tmp) / "pw03 20070101.lev"
+            lev.write_text(self.HEADER + count + "".join(lines) + "END OF DATA FILE OF DATALOGGER FOR WINDOWS\n")
+            return NewTransImp(lev).well
+
+    def test_lev_footer_dropped(self):
+        """Trailing END OF DATA FILE line is dropped with or without a record count"""
+        for count in ["         24\n", "\n"]:
+            with self.subTest(count=count.strip()):
+                df = self.read_lev(count)
+                self.assertEqual(len(df), 24)
+                self.assertEqual(df.index[-1], pd.Timestamp("2007-01-01 23:00"))
+                self.assertAlmostEqual(df["Level"].iloc[0], 10 * 0.33456)
+                self.assertAlmostEqual(df["Temperature"].iloc[-1], 7.3)
+                self.assertEqual(df["filename"].unique().tolist(), ["pw03 20070101"])
+
+    def test_lev_bad_row_reported(self):
+        """Malformed data rows are reported instead of being dropped"""
+        for count in ["         24\n", "\n"]:
+            for bad_row in ["2007/01/01 05:00:00.0  15.0000  5.500  7.1\n", "2007/01/01 05:00:00.0  15.0000  --\n"]:
+                with self.subTest(count=count.strip(), bad_row=bad_row.strip()):
+                    out = io.StringIO()
+                    with redirect_stdout(out):
+                        df = self.read_lev(count, bad_row)
+                    self.assertIsNone(df)
+                    self.assertIn("formatting issues", out.getvalue())
+
+
+class TestCompactFrame(unittest.TestCase):
+    def setUp(self):
+        self.well = NewTransImp(TEST_FILES / "pw10a 20171208.xle").well
+        self.baro = NewTransImp(TEST_FILES / "pw10baro 20171208.xle").well
+
+    def test_compact_dtypes(self):
+        """Channels are float32, filename is categorical and the index stays datetime64[ns]"""
+        df = self.well.copy()
+        df["julian"] = df.index.to_julian_date()
+        small = compact_frame(df)
+        self.assertEqual(small["Level"].dtype, np.float32)
+        self.assertIsInstance(small["filename"].dtype, pd.CategoricalDtype)
+        self.assertEqual(small.index.dtype, "datetime64[ns]")
+        self.assertNotIn("julian", small.columns)
+        self.assertLess(small.memory_usage(deep=True).sum(), self.well.memory_usage(deep=True).sum())
+        np.testing.assert_allclose(small["Level"], self.well["Level"], atol=1e-4)
+
+    def test_precision_kept(self):
+        """Channels that do not survive the float32 round trip stay float64"""
+        df = pd.DataFrame({"Level": [1e6 + 0.123456]}, index=pd.to_datetime(["2020-01-01"]))
+        self.assertEqual(compact_frame(df)["Level"].dtype, np.float64)
+
+    def test_import_compact(self):
+        """NewTransImp returns the compact form when asked"""
+        small = NewTransImp(TEST_FILES / "pw10a 20171208.xle", compact=True).well
+        pd.testing.assert_frame_equal(small, compact_frame(self.well))
+
+    def test_drifting_compact(self):
+        """Drift correction of compact frames matches the full frames"""
+        results = []
+        for well, baro, compact in [(self.well, self.baro, False),
+                                    (compact_frame(self.well), compact_frame(self.baro), True)]:
+            wb = well_baro_merge(well, baro)
+            man = pd.DataFrame({"measureddtw": [wb["corrwl"].iloc[0] + 0.3, wb["corrwl"].iloc[-1] - 0.2]},
+                               index=[wb.index[0], wb.index[-1]])
+            drift = loader.Drifting(man, wb, "corrwl", "measureddtw", compact=compact)
+            results.append(drift.process_drift())
+        self.assertNotIn("julian", results[1][0].columns)
+        self.assertAlmostEqual(results[0][2], results[1][2], places=3)
+        np.testing.assert_allclose(results[0][0]["waterelevation"], results[1][0]["waterelevation"], atol=1e-3)
+
+
+class TestIngestFolder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.folder = self.tmp / "trans"
+        self.folder.mkdir()
+        self.manifest = IngestManifest(self.tmp / "manifest.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_incremental_matches_compilation(self):
+        """Adding files and re-ingesting gives the same data as compiling the whole folder"""
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", self.folder)
+        first = ingest_folder(self.folder, self.manifest)
+        pd.testing.assert_frame_equal(first, compilation(self.folder))
+
+        shutil.copy(TEST_FILES / "SCR-1_2018_04_24.xle", self.folder)
+        os.utime(self.folder / "pw10a 20171208.xle")
+        changed = self.manifest.changed_files(list(self.folder.glob("*")))
+        self.assertEqual([(Path(f).name, status) for f, status, digest in changed],
+                         [("SCR-1_2018_04_24.xle", "new")])
+
+        second = ingest_folder(self.folder, self.manifest, first)
+        pd.testing.assert_frame_equal(second, compilation(self.folder))
+        self.assertEqual(self.manifest.changed_files(list(self.folder.glob("*"))), [])
+        self.assertEqual(len(self.manifest.table()), 2)
+
+    def test_changed_file_replaced(self):
+        """Rows of a file whose contents changed are replaced by the new parse"""
+        target = self.folder / "pw10a 20171208.xle"
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", target)
+        first = ingest_folder(self.folder, self.manifest)
+        shutil.copy(TEST_FILES / "1037276_Pw10a_2017_08_16.xle", target)
+        second = ingest_folder(self.folder, self.manifest, first)
+        pd.testing.assert_frame_equal(second, compilation(self.folder))
+        self.assertEqual(self.manifest.date_range(target), (second.index[0], second.index[-1]))
+
+    def test_changed_dotted_name_replaced(self):
+        """Rows of a changed file with a dot in its name are matched by the name the reader gives them"""
+        target = self.folder / "pw10a.2017.xle"
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", target)
+        first = ingest_folder(self.folder, self.manifest)
+        self.assertEqual(first["filename"].unique().tolist(), ["pw10a"])
+        shutil.copy(TEST_FILES / "1037276_Pw10a_2017_08_16.xle", target)
+        second = ingest_folder(self.folder, self.manifest, first)
+        pd.testing.assert_frame_equal(second, compilation(self.folder))
+
+    def test_deleted_file_dropped(self):
+        """Rows and manifest entries of deleted files are removed"""
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", self.folder)
+        shutil.copy(TEST_FILES / "SCR-1_2018_04_24.xle", self.folder)
+        first = ingest_folder(self.folder, self.manifest)
+        (self.folder / "SCR-1_2018_04_24.xle").unlink()
+        second = ingest_folder(self.folder, self.manifest, first)
+        pd.testing.assert_frame_equal(second, compilation(self.folder))
+        self.assertEqual([Path(path).name for path in self.manifest.table()["path"]], ["pw10a 20171208.xle"])
+
+    def test_deleted_file_outside_wildcard_kept(self):
+        """Deleted files are only dropped by runs whose wildcard lists them, and only by their file name"""
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", self.folder)
+        shutil.copy(TEST_FILES / "SCR-1_2018_04_24.xle", self.folder)
+        first = ingest_folder(self.folder, self.manifest)
+        (self.folder / "SCR-1_2018_04_24.xle").unlink()
+        second = ingest_folder(self.folder, self.manifest, first, wildcard="pw*")
+        pd.testing.assert_frame_equal(second, first)
+        self.assertEqual(len(self.manifest.table()), 2)
+
+        renamed = first.assign(filename="other")
+        third = ingest_folder(self.folder, self.manifest, renamed)
+        pd.testing.assert_frame_equal(third, renamed)
+        self.assertEqual(len(self.manifest.table()), 1)
+
+    def test_unreadable_file_recorded(self):
+        """Files that parse to no data are recorded and not parsed again"""
+        (self.folder / "processed.csv").write_text("DateTime,Level\n2017-03-08 11:00:00,18.2\n")
+        with redirect_stdout(io.StringIO()):
+            compiled = ingest_folder(self.folder, self.manifest)
+        self.assertEqual(len(compiled), 0)
+        self.assertEqual(self.manifest.changed_files(list(self.folder.glob("*"))), [])
+        self.assertTrue(self.manifest.table()["beginning"].isna().all())
+
+    def test_same_name_in_subfolders(self):
+        """Files with the same name in different folders are all ingested"""
+        for sub, source in [("a", "pw10a 20171208.xle"), ("b", "SCR-1_2018_04_24.xle")]:
+            (self.folder / sub).mkdir()
+            shutil.copy(TEST_FILES / source, self.folder / sub / "well.xle")
+        compiled = ingest_folder(self.folder, self.manifest, wildcard="*/*.xle")
+        self.assertEqual(len(compiled), len(NewTransImp(self.folder / "a" / "well.xle").well)
+                         + len(NewTransImp(self.folder / "b" / "well.xle").well))
+
+    def test_shared_with_end_beg_dates(self):
+        """Files recorded by compile_end_beg_dates are still ingested from a shared manifest"""
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", self.folder)
+        dates = compile_end_beg_dates(str(self.folder), manifest=self.manifest)
+        self.assertEqual(dates["filename"].tolist(), ["pw10a 20171208"])
+        compiled = ingest_folder(self.folder, self.manifest)
+        pd.testing.assert_frame_equal(compiled, compilation(self.folder))
+        self.assertEqual(sorted(self.manifest.table(None)["consumer"]), ["compile_end_beg_dates", "ingest_folder"])
+
+    def test_manifest_without_consumers(self):
+        """Entries of a manifest written before consumers were recorded belong to ingest_folder"""
+        shutil.copy(TEST_FILES / "pw10a 20171208.xle", self.folder)
+        ingest_folder(self.folder, self.manifest)
+        with sqlite3.connect(self.manifest.manifest_file) as conn:
+            conn.execute("CREATE TABLE old AS SELECT path, size, mtime, hash, beginning, end FROM files")
+            conn.execute("DROP TABLE files")
+            conn.execute("ALTER TABLE old RENAME TO files")
+        conn.close()
+        manifest = IngestManifest(self.manifest.manifest_file)
+        self.assertEqual(manifest.changed_files(list(self.folder.glob("*"))), [])
+        self.assertEqual(len(manifest.changed_files(list(self.folder.glob("*")), "compile_end_beg_dates")), 1)
+
+
+class TestHourlyResample(unittest.TestCase):
+    @staticmethod
+    def upsampled(df, bse=0, minutes=60):
+        """Reference result: 1-minute upsample, time interpolation and right-closed asfreq"""
+        df = df.resample("1min").mean(numeric_only=True).interpolate(method="time", limit=90)
+        return df.resample(f"{minutes}min", closed="right", label="right", offset=f"{bse:0.0f}min").asfreq()
+
+    def test_matches_upsample(self):
+        """Direct-to-grid resampling matches upsampling to every minute"""
+        rng = np.random.default_rng(0)
+        n = 3000
+        times = pd.Timestamp("2020-01-01 00:07:13") + pd.to_timedelta(
+            np.cumsum(rng.integers(1, 200, n)) * 17, unit="s")
+        df = pd.DataFrame({"Level": rng.normal(size=n), "Temperature": rng.normal(size=n)}, index=times)
+        df.loc[df.index[::7], "Level"] = np.nan
+        df["filename"] = "pw03"
+        xle = NewTransImp(TEST_FILES / "pw10a 20171208.xle").well
+        for data in [df, xle]:
+            for bse, minutes in [(0, 60), (15, 60), (0, 15), (3, 7)]:
+                with self.subTest(rows=len(data), bse=bse, minutes=minutes):
+                    pd.testing.assert_frame_equal(
+                        hourly_resample(data, bse, minutes), self.upsampled(data, bse, minutes), check_freq=False)
+
+    def test_gap_limit(self):
+        """Only the first 90 minutes after a reading are filled"""
+        df = pd.DataFrame({"Level": [0.0, 4.0]}, index=pd.to_datetime(["2020-01-01 00:00", "2020-01-01 04:00"]))
+        res = hourly_resample(df)
+        self.assertEqual(res["Level"].tolist()[:2], [0.0, 1.0])
+        self.assertTrue(res["Level"].iloc[2:4].isna().all())
+        self.assertEqual(res["Level"].iloc[-1], 4.0)
+
+
+class TestBaroCompensation(unittest.TestCase):
+    def setUp(self):
+        self.well = NewTransImp(TEST_FILES / "pw10a 20171208.xle").well
+        self.baro = NewTransImp(TEST_FILES / "pw10baro 20171208.xle").well
+
+    def test_matches_row_apply(self):
+        """Vectorized compensation matches the cumulative sum of per-row differences"""
+        wellbaro = well_baro_merge(self.well, self.baro.drop(self.baro.index[100:300]))
+        expected = (wellbaro["dwl"] - wellbaro["dbp"]).cumsum() + wellbaro["Level"].iloc[0]
+        expected.iloc[0] = wellbaro["Level"].iloc[0]
+        np.testing.assert_allclose(wellbaro["corrwl"], expected, rtol=1e-12)
+        self.assertFalse(wellbaro[["barometer", "Level"]].isna().any().any())
+
+    def test_empty(self):
+        """Compensating an empty record raises IndexError like the previous implementation"""
+        with self.assertRaises(IndexError):
+            baro_compensate([], [])
+
+    def test_batch(self):
+        """Batch compensation against one barometer matches compensating each well on its own"""
+        wells = {1: self.well, 2: self.well.iloc[: len(self.well) // 2], 3: self.well.iloc[:0]}
+        res = well_baro_merge_batch(wells, self.baro)
+        self.assertEqual(res.index.names, ["locationid", "DateTime"])
+        self.assertEqual(sorted(res.index.get_level_values(0).unique()), [1, 2])
+        for key in [1, 2]:
+            pd.testing.assert_frame_equal(
+                res.loc[key], well_baro_merge(wells[key], self.baro), check_names=False, check_freq=False)
+
+    def test_baro_store(self):
+        """A barometer is resampled once per interval and gives the same result as resampling per well"""
+        bulk = pd.concat({1: self.well, 9003: self.baro}, names=["locationid", "DateTime"])
+        baros = BaroStore(bulk)
+        first = baros.get(9003)
+        self.assertIs(baros.get(9003), first)
+        self.assertIsNot(baros.get(9003, sampint=15), first)
+        pd.testing.assert_frame_equal(
+            well_baro_merge(bulk.loc[1], first, baro_resampled=True), well_baro_merge(self.well, self.baro))
+        res = well_baro_merge_batch({1: self.well}, first, baro_resampled=True)
+        pd.testing.assert_frame_equal(res.loc[1], well_baro_merge(self.well, self.baro),
+                                      check_names=False, check_freq=False)
+
+    def test_baro_store_offset(self):
+        """A barometer taken from the store at an offset lines up with the well resampled at that offset"""
+        baros = BaroStore({9003: self.baro})
+        wellbaro = well_baro_merge(self.well, baros.get(9003, bse=15), baro_resampled=True, bse=15)
+        self.assertGreater(len(wellbaro), 0)
+        self.assertTrue((wellbaro.index.minute == 15).all())
+        pd.testing.assert_frame_equal(wellbaro, well_baro_merge(self.well, self.baro, bse=15))
+        res = well_baro_merge_batch({1: self.well}, baros.get(9003, bse=15), baro_resampled=True, bse=15)
+        pd.testing.assert_frame_equal(res.loc[1], wellbaro, check_names=False, check_freq=False)
+
+
+class TestBulkAlignment(unittest.TestCase):
+    def setUp(self):
+        well = NewTransImp(TEST_FILES / "pw10a 20171208.xle").well
+        self.bulk = pd.concat(
+            {
+                1: well,
+                2: NewTransImp(TEST_FILES / "SCR-1_2018_04_24.xle").well,
+                3: well.iloc[:50],
+                4: NewTransImp(TEST_FILES / "1037276_Pw10a_2017_08_16.xle").well,
+                9003: NewTransImp(TEST_FILES / "pw10baro 20171208.xle").well,
+                9004: NewTransImp(TEST_FILES / "SCR BARO_2018_04_24.xle").well,
+            },
+            names=["locationid", "DateTime"],
+        )
+        self.baro_map = {1: 9003, 2: 9004, 3: 9003, 4: 9003}
+
+    def test_pool_matches_serial(self):
+        """Aligning in worker processes with shared barometers matches aligning each well in turn"""
+        serial, report = well_baro_merge_bulk(self.bulk, self.baro_map, vented={3: True})
+        pooled, pool_report = well_baro_merge_bulk(self.bulk, self.baro_map, vented={3: True}, workers=2)
+        pd.testing.assert_frame_equal(serial, pooled)
+        self.assertEqual(serial.index.names, ["locationid", "DateTime"])
+        for wellid in [1, 2]:
+            expected = well_baro_merge(self.bulk.loc[wellid], self.bulk.loc[self.baro_map[wellid]])
+            pd.testing.assert_frame_equal(serial.loc[wellid], expected[serial.columns],
+                                          check_names=False, check_freq=False)
+        # well 4 predates its barometer and is reported instead of aligned
+        self.assertEqual(pool_report.set_index("locationid").loc[4, "rows"], 0)
+        self.assertIsNotNone(pool_report.set_index("locationid").loc[4, "error"])
+        self.assertNotIn(4, serial.index.get_level_values(0))
+
+    def test_attached_baros_closed(self):
+        """Shared memory blocks attached to align a well can be closed once the well is aligned"""
+        baro = BaroStore(self.bulk).get(9003, 60)
+        meta, blocks = loader._publish_baro(baro)
+        try:
+            wellid, dat, seconds, error = loader._align_well(1, self.bulk.loc[1], meta)
+            self.assertIsNone(error)
+            self.assertEqual(len(loader._attached_baros), len(blocks))
+            loader._close_attached_baros()
+            self.assertEqual(loader._attached_baros, {})
+            self.assertGreater(len(dat), 1)
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    def test_assignments(self):
+        """Wells are matched to barometers like the bulk alignment tab"""
+        info = pd.DataFrame({"barologgertype": ["9003", "9004", "", "9003", "None"]}, index=[1, 2, 3, 4, 9003])
+        files = pd.DataFrame({"locationid": [1, 2, 3, 4, 9003, 9004],
+                              "trans type": ["Solinst", "Global Water", "Solinst", "Solinst", "Solinst", "Solinst"]})
+        baro_map, vented = bulk_baro_assignments(info, files, self.bulk.index.get_level_values(0).unique())
+        self.assertEqual(baro_map, {1: 9003, 2: 9004, 4: 9003})
+        self.assertEqual(vented, {1: False, 2: True, 4: False})
+
+
+class TestBaroIndex(unittest.TestCase):
+    def setUp(self):
+        self.baros = pd.DataFrame(
+            {
+                "UTMEasting": [240327.49, 271127.67, 305088.9],
+                "UTMNorthing": [4314993.95, 4356071.98, 4389630.71],
+                "G_Elev_m": [1623.079737, 1605.187759, 1412.673738],
+                "beginning": pd.to_datetime(["2010-01-01", "2015-01-01", None]),
+                "end": pd.to_datetime(["2016-01-01", None, None]),
+            },
+            index=[9003, 9010, 9019],
+        )
+
+    def test_closest_matches_brute_force(self):
+        """Nearest barometer matches the smallest distance to every barometer"""
+        rng = np.random.default_rng(1)
+        wells = pd.DataFrame({"UTMEasting": rng.uniform(220000, 320000, 200),
+                              "UTMNorthing": rng.uniform(4300000, 4400000, 200),
+                              "G_Elev_m": rng.uniform(1300, 1800, 200)})
+        dist = pd.DataFrame({baro: np.sqrt(((wells - self.baros.loc[baro, wells.columns].astype(float)) ** 2).sum(axis=1))
+                             for baro in self.baros.index})
+        expected = dist.idxmin(axis=1)
+        result = BaroIndex(self.baros).query(wells, start=None, end=None)
+        self.assertTrue((result == expected).all())
+        named = self.baros.set_axis(["pw03", "pw10", "pw19"])
+        self.assertTrue((barodistance(wells.copy(), named)["closest_baro"] == expected.map(
+            dict(zip(self.baros.index, named.index)))).all())
+
+    def test_coverage(self):
+        """A closer barometer without data over the well's window is skipped"""
+        wells = pd.DataFrame(
+            {
+                "UTMEasting": [240000.0, 240000.0, 240000.0, np.nan],
+                "UTMNorthing": [4315000.0] * 4,
+                "G_Elev_m": [1600.0] * 4,
+                "beginning": pd.to_datetime(["2011-01-01", "2017-01-01", "2009-01-01", "2011-01-01"]),
+                "end": pd.to_datetime(["2012-01-01", "2018-01-01", "2012-01-01", "2012-01-01"]),
+            }
+        )
+        result = BaroIndex(self.baros).query(wells)
+        self.assertEqual(result.name, "barologgertype")
+        self.assertEqual(result.iloc[:3].tolist(), [9003, 9010, 9019])
+        self.assertTrue(pd.isna(result.iloc[3]))
+
+    def test_widened_search(self):
+        """Wells that the nearest barometers do not cover are matched from farther ones"""
+        rng = np.random.default_rng(3)
+        baros = pd.DataFrame({"UTMEasting": rng.uniform(0, 1000, 50), "UTMNorthing": rng.uniform(0, 1000, 50),
+                              "G_Elev_m": 0.0, "beginning": pd.Timestamp("2010-01-01"),
+                              "end": pd.Timestamp("2012-01-01")}, index=range(50))
+        baros.loc[[7, 31], "end"] = pd.NaT
+        wells = pd.DataFrame({"UTMEasting": rng.uniform(0, 1000, 100), "UTMNorthing": rng.uniform(0, 1000, 100),
+                              "G_Elev_m": 0.0, "beginning": pd.Timestamp("2011-01-01"),
+                              "end": pd.Timestamp("2011-06-01")})
+        wells.loc[::3, "end"] = pd.Timestamp("2015-01-01")
+        index = BaroIndex(baros)
+        pos, dist = index.ranked(wells)
+        covers = (index.begin[pos] <= index._dates(wells, "beginning", 0)[:, None]) & (
+            index.end[pos] >= index._dates(wells, "end", 0)[:, None])
+        expected = index.ids[pos[np.arange(len(pos)), covers.argmax(axis=1)]]
+        self.assertEqual(index.query(wells, k=2).tolist(), expected.tolist())
+        self.assertTrue(set(index.query(wells).iloc[::3]) <= {7, 31})
+
+
+class TestBaroEfficiency(unittest.TestCase):
+    def synthetic(self, be=0.0, response=None, n=4000, seed=0):
+        """Aligned record of a nonvented well whose head responds to barometric changes"""
+        rng = np.random.default_rng(seed)
+        times = pd.date_range("2020-01-01", periods=n, freq="h")
+        baro = np.cumsum(rng.normal(0, 0.05, n)) + 25
+        dbp = np.diff(baro, prepend=baro[0])
+        resp = be * dbp if response is None else np.convolve(dbp, response)[:n]
+        head = 100 + 0.0001 * np.arange(n) - np.cumsum(resp) + rng.normal(0, 0.001, n)
+        return well_baro_merge(pd.DataFrame({"Level": head + baro}, index=times),
+                               pd.DataFrame({"Level": baro}, index=times))
+
+    def test_estimate(self):
+        """BE is recovered from the aligned changes, skipping gaps"""
+        wellbaro = self.synthetic(0.4)
+        table = estimate_be(wellbaro.drop(wellbaro.index[100:200]))
+        self.assertAlmostEqual(table.loc[0, "BaroEfficiency"], 0.4, places=2)
+        self.assertGreater(table.loc[0, "r2"], 0.9)
+        self.assertEqual(table.loc[0, "n"], len(wellbaro) - 100 - 2)
+
+    def test_estimate_fallback(self):
+        """A BE that cannot be estimated falls back to the well table, or to 0"""
+        wellbaro = self.synthetic(0.4, n=3)
+        well_table = pd.DataFrame({"wellid": [7], "BaroEfficiency": [0.25]})
+        for table, expected in [(well_table, 0.25), (None, 0.0)]:
+            with self.subTest(expected=expected):
+                out = io.StringIO()
+                with redirect_stdout(out):
+                    welldata, be = correct_be(7, table, wellbaro.copy(), be="estimate")
+                self.assertEqual(be, expected)
+                self.assertIn("Too few regular readings", out.getvalue())
+                np.testing.assert_allclose(welldata["baroefficiencylevel"],
+                                           welldata["corrwl"] + expected * welldata["barometer"])
+                self.assertFalse(welldata["baroefficiencylevel"].isna().any())
+
+    def test_multi_lag(self):
+        """A lagged response is summed into one BE"""
+        table = estimate_be(self.synthetic(response=[0.2, 0.2, 0.1]), lags=3)
+        self.assertAlmostEqual(table.loc[0, "BaroEfficiency"], 0.5, places=2)
+
+    def test_network(self):
+        """Every well of an aligned network table is estimated and corrected"""
+        bulk = pd.concat({i: self.synthetic(i / 10, n=1000, seed=i) for i in range(5)},
+                         names=["locationid", "DateTime"])
+        table = estimate_be(bulk)
+        np.testing.assert_allclose(table["BaroEfficiency"], np.arange(5) / 10, atol=0.01)
+        corrected = correct_be_bulk(bulk.copy(), table["BaroEfficiency"])
+        for i in range(5):
+            welldata, be = correct_be(i, None, bulk.loc[i].copy(), be=table.loc[i, "BaroEfficiency"])
+            np.testing.assert_allclose(corrected.loc[i, "baroefficiencylevel"], welldata["baroefficiencylevel"])
+            np.testing.assert_allclose(welldata["baroefficiencylevel"],
+                                       welldata["corrwl"] + be * welldata["barometer"])
+
+
+class TestSectionalOffsets(unittest.TestCase):
+    @staticmethod
+    def looped(df1, df2, col1, col2, freq="h", max_lag=24, window_size="7D"):
+        """Reference result: one Series.corr per window and lag"""
+        s1, s2 = df1[col1].resample(freq).mean().align(df2[col2].resample(freq).mean(), join="inner")
+        s1, s2 = s1.ffill(), s2.ffill()
+        results = []
+        for start in pd.date_range(s1.index.min(), s1.index.max(), freq=window_size):
+            end = start + pd.to_timedelta(window_size)
+            seg1, seg2 = s1[start:end], s2[start:end]
+            if len(seg1) < max_lag * 2:
+                continue
+            lags = np.arange(-max_lag, max_lag + 1)
+            correlations = [seg1.corr(seg2.shift(lag)) for lag in lags]
+            if all(pd.isna(correlations)):
+                continue
+            results.append({"window_start": start, "best_lag": lags[np.nanargmax(correlations)],
+                            "correlation": np.nanmax(correlations)})
+        return pd.DataFrame(results)
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        times = pd.date_range("2018-01-01 00:30", periods=2000, freq="h")
+        signal = np.cumsum(rng.normal(size=len(times)))
+        self.df1 = pd.DataFrame({"v": signal + rng.normal(0, 0.1, len(times))}, index=times)
+        self.df2 = pd.DataFrame({"v": np.roll(signal, 5)}, index=times)
+        self.df2.iloc[:30] = np.nan
+        self.df1.iloc[1000:1200] = 7.0
+
+    def test_matches_looped(self):
+        """All-lag correlation gives the same table as correlating each lag in turn"""
+        for max_lag, window_size in [(24, "7D"), (6, "2D")]:
+            with self.subTest(max_lag=max_lag, window_size=window_size):
+                expected = self.looped(self.df1, self.df2, "v", "v", max_lag=max_lag, window_size=window_size)
+                result = detect_sectional_offsets_indexed(self.df1, self.df2, "v", "v", freq="h",
+                                                          max_lag=max_lag, window_size=window_size)
+                pd.testing.assert_frame_equal(result[["window_start", "best_lag"]],
+                                              expected[["window_start", "best_lag"]], check_dtype=False)
+                np.testing.assert_allclose(result["correlation"], expected["correlation"], rtol=1e-9)
+        self.assertEqual(result["best_lag"].mode()[0], -5)
+
+    def test_batch(self):
+        """A batch of pairs gives the table of each pair"""
+        pairs = {1: (self.df1, self.df2), 2: (self.df1.iloc[:500], self.df2)}
+        batch = detect_sectional_offsets_batch(pairs, "v", "v", freq="h")
+        for key, (df1, df2) in pairs.items():
+            expected = detect_sectional_offsets_indexed(df1, df2, "v", "v", freq="h")
+            pd.testing.assert_frame_equal(
+                batch[batch["locationid"] == key].drop(columns="locationid").reset_index(drop=True), expected)
+
+
+class TestRollMeanDiff(unittest.TestCase):
+    @staticmethod
+    def minutely(df1, p1, df2, p2, win):
+        """Reference result: rolling means of both records interpolated to one minute"""
+        win = win * 60 * 24
+        s1 = df1[p1].resample("1min").mean().interpolate(method="time").rolling(window=win, center=True).mean()
+        s2 = df2[p2].resample("1min").mean().interpolate(method="time").rolling(window=win, center=True).mean()
+        s1, s2 = s1.align(s2, join="inner")
+        return round((s1 - s2).dropna().mean(), 3)
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        times = pd.date_range("2020-01-01", periods=2000, freq="15min")
+        times = times + pd.to_timedelta(rng.integers(0, 600, len(times)), unit="s")
+        self.df1 = pd.DataFrame({"Level": np.sin(np.arange(len(times)) / 50) + 10}, index=times)
+        self.df2 = pd.DataFrame({"Level": np.sin(np.arange(1500) / 40 + .3) + 9},
+                                index=pd.date_range("2020-01-02", periods=1500, freq="20min"))
+
+    def test_matches_minutely(self):
+        """Native-interval rolling means give the one-minute difference"""
+        for win in [1, 2]:
+            with self.subTest(win=win):
+                expected = self.minutely(self.df1, "Level", self.df2, "Level", win)
+                self.assertAlmostEqual(rollmeandiff(self.df1, "Level", self.df2, "Level", win), expected, delta=0.002)
+
+    def test_incremental(self):
+        """Running sums give the same difference as pandas rolling"""
+        self.assertEqual(rollmeandiff(self.df1, "Level", self.df2, "Level", 1, incremental=True),
+                         rollmeandiff(self.df1, "Level", self.df2, "Level", 1))
+
+    def test_no_overlap(self):
+        """Records without a shared full window have no difference"""
+        self.assertTrue(np.isnan(rollmeandiff(self.df1, "Level", self.df2, "Level", 30)))
+
+
+class TestDriftSegments(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        idx = pd.date_range("2000-01-01", periods=5000, freq="h", name="DateTime")
+        self.well = pd.DataFrame({"corrwl": np.cumsum(rng.normal(0, .01, len(idx))) + np.linspace(0, 2, len(idx))},
+                                 index=idx)
+        self.well.loc[rng.random(len(idx)) < .05, "corrwl"] = np.nan
+        self.well = self.well.sample(frac=1, random_state=1)
+        mandates = pd.to_datetime(["1999-12-30 00:00", "2000-01-20 13:10", "2000-03-02 08:00", "2000-03-02 09:30",
+                                   "2000-05-11 00:00", "2000-07-28 16:45"])
+        self.man = pd.DataFrame({"measureddtw": rng.normal(0, .1, len(mandates))}, index=mandates)
+
+    def test_segments_match_masks(self):
+        """Positional segments hold the readings between each pair of breakpoints"""
+        drift = loader.Drifting(self.man.copy(), self.well.copy(), "corrwl", "measureddtw")
+        drift.breakpoints_calc()
+        drift.segment_bounds()
+        well = drift.transducer_df
+        for i in range(len(drift.breakpoints) - 1):
+            drift.beginning_end(i)
+            expected = well[(well.index >= drift.breakpoints[i]) & (well.index < drift.breakpoints[i + 1])]
+            pd.testing.assert_frame_equal(drift.bracketedwls[i], expected.dropna(subset=["corrwl"]).sort_index())
+
+    def test_results_share_readings(self):
+        """Corrected readings reuse the transducer columns and each segment is corrected from its own start"""
+        well = self.well.dropna()
+        drift = loader.Drifting(self.man.copy(), well, "corrwl", "measureddtw")
+        df, info, max_drift = drift.process_drift()
+        self.assertTrue(np.shares_memory(df["corrwl"].to_numpy(), drift.transducer_df["corrwl"].to_numpy()))
+        self.assertEqual(list(df.columns), ["level_0", "corrwl", "driftcorrection", "driftcorrwoffset", "julian",
+                                            "waterelevation"])
+        for i, segment in df.groupby("level_0"):
+            julian = segment.index.to_julian_date() - segment.index[0].to_julian_date()
+            np.testing.assert_allclose(segment["driftcorrection"], julian * info.loc[i, "slope"])
+            pd.testing.assert_frame_equal(drift.bracketedwls[i], segment)
+
+    def test_trim_end(self):
+        """Readings trimmed from the ends of a segment are left out of the results"""
+        well = self.well.dropna().sort_index()
+        well.iloc[:3, 0] += 5
+        drift = loader.Drifting(self.man.copy(), well, "corrwl", "measureddtw", trim_end=True)
+        df, info, max_drift = drift.process_drift()
+        self.assertNotIn(well.index[0], df.index)
+        self.assertEqual(df.index[0], well.index[4])
+        self.assertFalse(df["waterelevation"].isna().any())
+
+
+class TestNearestTime(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        times = pd.to_datetime("2020-01-01") + pd.to_timedelta(rng.integers(0, 500, 300) * 600, unit="s")
+        self.series = pd.Series(np.arange(len(times)), index=times)
+        self.queries = pd.to_datetime("2019-12-31") + pd.to_timedelta(rng.integers(0, 200, 100) * 3600, unit="s")
+
+    def test_matches_argmin(self):
+        """Nearest lookups find the row a full scan of the index finds"""
+        near = NearestTime(self.series.index)
+        sorted_series = self.series.sort_index(kind="stable")
+        for q in self.queries:
+            with self.subTest(q=q):
+                expected = sorted_series.iloc[np.argmin(np.abs(sorted_series.index - q))]
+                self.assertEqual(near.take(self.series, q), expected)
+                self.assertEqual(fcl(sorted_series, q), expected)
+
+    def test_vector_tolerance_asof(self):
+        """Vector queries honour the tolerance and the backward/forward directions"""
+        near = NearestTime(pd.DatetimeIndex(["2020-01-01 02:00", "2020-01-01 00:00", pd.NaT, "2020-01-01 01:00"]))
+        queries = ["2020-01-01 00:20", "2020-01-01 00:40", "2020-01-01 05:00", "2019-12-31 23:00"]
+        np.testing.assert_array_equal(near.get_loc(queries), [1, 3, 0, 1])
+        np.testing.assert_array_equal(near.get_loc(queries, tolerance="30min"), [1, 3, -1, -1])
+        np.testing.assert_array_equal(near.asof(queries), [1, 1, 0, -1])
+        np.testing.assert_array_equal(near.get_loc(queries, direction="forward"), [3, 3, -1, 1])
+        self.assertIsNone(near.take(pd.Series(range(4)), "2020-01-02", tolerance="1h"))
+
+
+class TestFixDriftBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        readings, manual = {}, {}
+        for well in range(1001, 1009):
+            idx = pd.date_range(pd.Timestamp("2000-01-01") + pd.Timedelta(days=int(rng.integers(0, 100))),
+                                periods=int(rng.integers(1000, 3000)), freq="h", name="DateTime")
+            df = pd.DataFrame({"corrwl": np.cumsum(rng.normal(0, .01, len(idx))) + np.linspace(0, 1, len(idx))},
+                              index=idx)
+            df.loc[rng.random(len(idx)) < .05, "corrwl"] = np.nan
+            readings[well] = df
+            span = pd.date_range(idx[0] - pd.Timedelta("6D"), idx[-1] + pd.Timedelta("6D"), freq="13min")
+            mandates = pd.DatetimeIndex(np.sort(rng.choice(span, int(rng.integers(1, 6)), replace=False)),
+                                        name="readingdate")
+            manual[well] = pd.DataFrame({"dtwbelowcasing": rng.normal(0, .1, len(mandates))}, index=mandates)
+        self.readings = pd.concat(readings, names=["locationid"])
+        self.manual = pd.concat(manual, names=["locationid"])
+
+    def test_matches_drifting(self):
+        """Each well gets the corrections and drift table of its own Drifting run"""
+        corrected, driftinfo, max_drift = fix_drift_batch(self.readings, self.manual, "corrwl", "dtwbelowcasing",
+                                                          output_field="DTW_WL")
+        for well in self.readings.index.get_level_values(0).unique():
+            with self.subTest(well=well):
+                df, info, drift = loader.Drifting(self.manual.loc[well].copy(), self.readings.loc[well].copy(),
+                                                  "corrwl", "dtwbelowcasing", output_field="DTW_WL").process_drift()
+                for column in ["driftcorrection", "DTW_WL"]:
+                    pd.testing.assert_series_equal(corrected.loc[well, column], df[column], check_freq=False)
+                self.assertEqual(list(driftinfo.loc[well].index), list(info.index))
+                for column in ["slope", "intercept", "drift", "quality"]:
+                    np.testing.assert_array_equal(driftinfo.loc[well, column], info[column].astype(float))
+                np.testing.assert_array_equal(max_drift[well], drift)
+
+    def test_no_manual(self):
+        """Wells without manual measurements are left out"""
+        corrected, driftinfo, max_drift = fix_drift_batch(self.readings, self.manual.drop(1003, level=0),
+                                                          "corrwl", "dtwbelowcasing")
+        self.assertNotIn(1003, max_drift.index)
+        self.assertNotIn(1003, corrected.index.get_level_values(0))
+        self.assertEqual(len(max_drift), 7)
+
+
+class TestFixDriftBulk(unittest.TestCase):
+    setUp = TestFixDriftBatch.setUp
+
+    def test_matches_batch(self):
+        """Per-well runs in a pool give the batch results"""
+        expected = fix_drift_batch(self.readings, self.manual, "corrwl", "dtwbelowcasing", output_field="DTW_WL")
+        with tempfile.TemporaryDirectory() as tmp:
+            *result, report = fix_drift_bulk(self.readings, self.manual, tmp, "corrwl", "dtwbelowcasing",
+                                             output_field="DTW_WL", workers=2)
+        pd.testing.assert_frame_equal(result[0], expected[0], check_freq=False)
+        pd.testing.assert_frame_equal(result[1], expected[1], check_dtype=False)
+        pd.testing.assert_series_equal(result[2], expected[2])
+        self.assertTrue(report["error"].isna().all())
+
+    def test_resume(self):
+        """A second run reuses the checkpoints of wells whose data did not change"""
+        with tempfile.TemporaryDirectory() as tmp:
+            first = fix_drift_bulk(self.readings, self.manual, tmp, "corrwl", "dtwbelowcasing")
+            self.assertFalse(first[3]["resumed"].any())
+            (Path(tmp) / "1002.pkl").unlink()
+            readings = self.readings.copy()
+            readings.loc[1004, "corrwl"] = readings.loc[1004, "corrwl"].to_numpy() + 1
+            second = fix_drift_bulk(readings, self.manual, tmp, "corrwl", "dtwbelowcasing")
+        self.assertEqual(second[3].loc[~second[3]["resumed"], "locationid"].tolist(), [1002, 1004])
+        pd.testing.assert_frame_equal(second[0].drop(1004, level=0), first[0].drop(1004, level=0))
+
+
+class TestDriftingParity(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.wells = []
+        for _ in range(6):
+            idx = pd.date_range("2001-01-01", periods=int(rng.integers(800, 2500)), freq="h", name="DateTime")
+            well = pd.DataFrame({"corrwl": np.cumsum(rng.normal(0, .01, len(idx))) + np.linspace(0, 1, len(idx))},
+                                index=idx)
+            well.loc[rng.random(len(idx)) < .05, "corrwl"] = np.nan
+            well.loc[rng.random(len(idx)) < .01, "corrwl"] += 2
+            # manual measurements about every 10 days, some too far beyond the ends of the readings
+            mandates = pd.date_range(idx[0] - pd.Timedelta("5D"), idx[-1] + pd.Timedelta("5D"), freq="10D")
+            mandates = mandates + pd.to_timedelta(rng.integers(-2000, 2000, len(mandates)), unit="min")
+            man = pd.DataFrame({"measureddtw": rng.normal(0, .1, len(mandates))}, index=mandates)
+            man.iloc[int(rng.integers(0, len(man)))] = np.nan
+            self.wells.append((man, well))
+        # segments of 30, 50 and 51 readings with spikes near their ends
+        idx = pd.date_range("2001-01-01", periods=400, freq="h", name="DateTime")
+        well = pd.DataFrame({"corrwl": np.linspace(0, 1, len(idx))}, index=idx)
+        well.iloc[[105, 125, 185, 236, 278], 0] += 2
+        man = pd.DataFrame({"measureddtw": rng.normal(0, .1, 6)}, index=idx[[0, 100, 130, 180, 231, 399]])
+        self.wells.append((man, well))
+
+    def assert_same_drift(self, trim_end):
+        for n, (man, well) in enumerate(self.wells):
+            with self.subTest(well=n):
+                with redirect_stdout(io.StringIO()):
+                    expected = loader.Drifting(man.copy(), well.copy(), "corrwl", "measureddtw",
+                                               trim_end=trim_end).process_drift()
+                    result = Drifting(man, well, "corrwl", "measureddtw", trim_end=trim_end).process_drift()
+                pd.testing.assert_frame_equal(result[0], expected[0], check_freq=False)
+                info = expected[1].infer_objects()
+                for column in ["t_beg", "man_beg", "t_end", "man_end"]:
+                    info[column] = pd.to_datetime(info[column])
+                pd.testing.assert_frame_equal(result[1], info, check_dtype=False, check_index_type=False)
+                np.testing.assert_array_equal(result[2], expected[2])
+
+    def test_matches_loader(self):
+        """Corrections and drift tables match loader.Drifting"""
+        self.assert_same_drift(trim_end=False)
+
+    def test_trim_end_matches_loader(self):
+        """Segments are trimmed as loader.Drifting trims them; those of 50 readings or fewer are not"""
+        self.assert_same_drift(trim_end=True)
+
+    def test_drift_features(self):
+        """Each segment with readings gets its features"""
+        man, well = self.wells[0]
+        drift = Drifting(man, well, "corrwl", "measureddtw")
+        with redirect_stdout(io.StringIO()):
+            df, info, max_drift = drift.process_drift()
+        self.assertEqual(sorted(drift.drift_features), list(info.index))
+        features = drift.drift_features[info.index[0]]
+        self.assertIsInstance(features, DriftFeatures)
+        self.assertFalse(hasattr(features, "__dict__"))
+        self.assertEqual(features.slope, info["slope"].iloc[0])
+
+
+class TestDriftCurve(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        idx = pd.date_range("2001-01-01", periods=24 * 200, freq="h", name="DateTime")
+        self.mandates = pd.date_range("2001-01-03", "2001-07-15", freq="17D")
+        self.offsets = rng.normal(0, .3, len(self.mandates))
+        self.drift = np.interp(idx.to_julian_date(), self.mandates.to_julian_date(), self.offsets)
+        self.noise = rng.normal(0, .05, len(idx))
+        self.idx = idx
+        self.man = pd.DataFrame({"measureddtw": np.full(len(self.mandates), 10.0)}, index=self.mandates)
+
+    def run_drift(self, values, method):
+        well = pd.DataFrame({"corrwl": values}, index=self.idx)
+        with redirect_stdout(io.StringIO()):
+            return loader.Drifting(self.man.copy(), well, "corrwl", "measureddtw", method=method).process_drift()
+
+    def test_recovers_drift(self):
+        """A piecewise-linear drift through the manual measurements is removed exactly"""
+        df, info, max_drift = self.run_drift(10 + self.drift, "lstsq")
+        np.testing.assert_allclose(df["waterelevation"], 10, atol=1e-9)
+        np.testing.assert_allclose(info["resid_beg"].dropna().astype(float), 0, atol=1e-9)
+        np.testing.assert_allclose(info["resid_end"].dropna().astype(float), 0, atol=1e-9)
+
+    def test_noise(self):
+        """Noisy readings at the segment ends move the curve less than the segment fits"""
+        error = {}
+        for method in ["segment", "lstsq"]:
+            df = self.run_drift(10 + self.drift + self.noise, method)[0]
+            truth = np.interp(df.index.to_julian_date(), self.mandates.to_julian_date(), self.offsets)
+            error[method] = np.abs(df["driftcorrwoffset"] - truth).mean()
+        self.assertLess(error["lstsq"], error["segment"] / 2)
+
+    def test_continuous(self):
+        """Each segment starts where the curve of the previous one ends"""
+        df, info, max_drift = self.run_drift(10 + self.drift + self.noise, "lstsq")
+        first = pd.DatetimeIndex(info["t_beg"]).to_julian_date().to_numpy()
+        slope, intercept = info["slope"].astype(float).to_numpy(), info["intercept"].astype(float).to_numpy()
+        np.testing.assert_allclose(intercept[:-1] + slope[:-1] * (first[1:] - first[:-1]), intercept[1:])
+
+    def test_columns(self):
+        """The drift table has the columns of the segment fits plus residuals"""
+        segment = self.run_drift(10 + self.drift, "segment")[1]
+        curve = self.run_drift(10 + self.drift, "lstsq")[1]
+        self.assertEqual(sorted(curve.columns), sorted(list(segment.columns) + ["resid_beg", "resid_end"]))
+        self.assertEqual(list(curve.index), list(segment.index))
+
+
+class TestFixDriftUpdate(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        idx = pd.date_range("2001-01-01", periods=4000, freq="h", name="DateTime")
+        self.well = pd.DataFrame({"corrwl": np.cumsum(rng.normal(0, .01, len(idx))) + np.linspace(0, 1, len(idx)),
+                                  "temp": rng.integers(0, 10, len(idx))}, index=idx)
+        self.well.loc[rng.random(len(idx)) < .05, "corrwl"] = np.nan
+        mandates = pd.DatetimeIndex(["2000-12-30 10:00", "2001-02-10 14:13", "2001-03-21 09:40",
+                                     "2001-04-30 11:05", "2001-06-15 16:20"])
+        self.man = pd.DataFrame({"measureddtw": rng.normal(0, .1, len(mandates))}, index=mandates)
+
+    def assert_matches_full_run(self, cut, known):
+        """The update gives the new rows and segments of correcting the whole record again"""
+        old, new = self.well.iloc[:cut], self.well.iloc[cut:]
+        with redirect_stdout(io.StringIO()):
+            wellbarofixed, driftinfo, max_drift = loader.Drifting(self.man[self.man.index <= known].copy(),
+                                                                  old.copy()).process_drift()
+            full = loader.Drifting(self.man.copy(), self.well.copy()).process_drift()
+            rows, drift, max_drift = fix_drift_update(new, self.man, driftinfo, wellbarofixed.iloc[-1])
+        expected, expected_drift = subset_final_processed_data("new", full[0], full[1], old_reading=old)
+        pd.testing.assert_frame_equal(rows, expected[expected.index > wellbarofixed.index[-1]], check_freq=False)
+        expected_drift = full[1].loc[sorted(rows["level_0"].unique())]
+        pd.testing.assert_frame_equal(drift.infer_objects(), expected_drift.infer_objects(), check_dtype=False)
+        np.testing.assert_array_equal(max_drift, expected_drift["drift"].abs().max())
+
+    def test_open_segment(self):
+        """New readings close the segment left open by the last manual measurement"""
+        self.assert_matches_full_run(2500, self.well.index[2500])
+
+    def test_closed_segment(self):
+        """A manual measurement after the old readings closes the last segment before the new readings"""
+        self.assert_matches_full_run(2800, self.man.index[3])
+
+    def test_gap_after_last_manual(self):
+        """A segment opened by a manual measurement more than daybuffer days before its readings is continued"""
+        gap = (self.well.index >= "2001-03-21 09:00") & (self.well.index <= "2001-03-28 09:00")
+        self.well = self.well[~gap]
+        manual = self.man.iloc[:3]
+        for later_visit in [None, "2001-03-30 12:00"]:
+            with self.subTest(later_visit=later_visit):
+                self.man = manual
+                if later_visit is not None:
+                    self.man = pd.concat([manual, pd.DataFrame({"measureddtw": [.05]},
+                                                               index=pd.DatetimeIndex([later_visit]))])
+                cut = int(np.searchsorted(self.well.index, pd.Timestamp("2001-03-29")))
+                self.assert_matches_full_run(cut, self.well.index[cut])
+
+    def test_only_new_rows(self):
+        """Old readings and segments are not returned"""
+        old, new = self.well.iloc[:2500], self.well.iloc[2500:]
+        with redirect_stdout(io.StringIO()):
+            wellbarofixed, driftinfo, max_drift = loader.Drifting(self.man.iloc[:3].copy(), old.copy()).process_drift()
+            rows, drift, max_drift = fix_drift_update(self.well, self.man, driftinfo, wellbarofixed.iloc[-1])
+        self.assertGreater(rows.index[0], wellbarofixed.index[-1])
+        self.assertEqual(drift.index[0], driftinfo.index[-1])
+        self.assertEqual(list(drift.index), sorted(rows["level_0"].unique()))
+
+    def test_no_new_readings(self):
+        """A download without readings after the last corrected one gives empty results"""
+        old = self.well.iloc[:2500]
+        with redirect_stdout(io.StringIO()):
+            wellbarofixed, driftinfo, max_drift = loader.Drifting(self.man.iloc[:3].copy(), old.copy()).process_drift()
+            rows, drift, max_drift = fix_drift_update(old.iloc[:-1], self.man, driftinfo, wellbarofixed.iloc[-1])
+        self.assertTrue(rows.empty)
+        self.assertTrue(drift.empty)
+        self.assertEqual(list(drift.columns), list(driftinfo.columns))
+        self.assertTrue(np.isnan(max_drift))
+
+
 if __name__ == "__main__":
     unittest.main()